@@ -0,0 +1 @@
+# Benchmark suite for hot paths (scraper, database, LLM pipeline)
@@ -0,0 +1,420 @@
+"""ベンチマークケース定義。
+
+各 ``*_cases`` 関数は計測を実行して ``BenchmarkResult`` のリストを返します。
+データベースは一時ディレクトリ内の SQLite ファイルを使い、``data/`` 配下には書き込みません。
+"""
+import logging
+import os
+import random
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from bs4 import BeautifulSoup
+
+from benchmarks import synthetic
+from benchmarks.fake_llm import FakeLLMClient
+from benchmarks.harness import BenchmarkResult, run_case
+from benchmarks.import_time import import_time_cases
+from core import metrics
+from core.embeddings import HashingEmbeddingBackend, normalize_rows
+from core.logger_setup import RateLimitFilter, attach_queue_handler
+from core.context_db import ContextDB
+from core.db_schemas import Episode, ProcessingStatus, WorldSetting
+from core.corpus_pack import CorpusPack, pack_path, sync_novel_pack
+from core.pipeline import analyze_novel, ingest_novel
+from core.vector_index import VectorIndex
+from scrapers.narou_scraper import NarouScraper
+
+RANDOM_LOOKUPS = 200
+METRICS_CALLS = 100000
+LOG_RECORDS = 20000
+CHUNKS_PER_EPISODE = 20
+VECTOR_QUERIES = 50
+FIXTURE_NOVEL_URL = "https://ncode.syosetu.com/n0000aa/"
+LLM_EPISODES = 200  # フェイクLLMは処理時間を実際に待つため、話数に上限を設ける
+CONTEXT_CHARACTERS = 80
+CONTEXT_SETTINGS = 60
+
+
+class FixtureNarouScraper(NarouScraper):
+    """HTTP の代わりにメモリ上のHTMLを返す NarouScraper。
+
+    ``reuse_soup`` が True の場合はパース済みの soup を使い回し、抽出処理のみを計測できます。
+    """
+
+    def __init__(self, pages: Dict[str, str], episode_html: Optional[str] = None,
+                 reuse_soup: bool = False):
+        super().__init__(request_delay_sec=0)
+        self.pages = pages
+        self.episode_html = episode_html
+        self.reuse_soup = reuse_soup
+        self._soups: Dict[str, BeautifulSoup] = {}
+
+    def _make_request(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[BeautifulSoup]:
+        html = self.pages.get(url, self.episode_html)
+        if html is None:
+            return None
+        if not self.reuse_soup:
+            return BeautifulSoup(html, "html.parser")
+        if url not in self._soups:
+            self._soups[url] = BeautifulSoup(html, "html.parser")
+        return self._soups[url]
+
+
+def _new_db(directory: str, name: str) -> ContextDB:
+    path = os.path.join(directory, f"{name}.db")
+    if os.path.exists(path):
+        os.remove(path)
+    return ContextDB(db_url=f"sqlite:///{path}")
+
+
+def _create_novel(db: ContextDB, url: str = synthetic.SYNTHETIC_NOVEL_URL) -> int:
+    novel, _ = db.get_or_create_novel(url=url, defaults={
+        "title": "合成長編小説", "author": "ベンチ作者", "platform": NarouScraper.PLATFORM_NAME})
+    if novel is None:
+        raise RuntimeError(f"Failed to create benchmark novel: {url}")
+    return novel.id
+
+
+def scraper_cases(sizes: Sequence[int], repeat: int) -> List[BenchmarkResult]:
+    """本文抽出 (ルビ処理) と目次メタデータ解析を計測します。"""
+    results = []
+    fixture_episode = BeautifulSoup(
+        synthetic.load_fixture(synthetic.EPISODE_FIXTURE), "html.parser")
+    fixture_body = fixture_episode.find("div", class_="js-novel-text p-novel__text")
+    scraper = NarouScraper(request_delay_sec=0)
+    results.append(run_case(
+        "scraper.extract_text_with_ruby", lambda: scraper._extract_text_with_ruby_as_plain(fixture_body),
+        repeat=repeat, ops=1, params={"source": "fixture"}))
+
+    fixture_top = FixtureNarouScraper(
+        {FIXTURE_NOVEL_URL: synthetic.load_fixture(synthetic.NOVEL_TOP_FIXTURE)}, reuse_soup=True)
+    results.append(run_case(
+        "scraper.fetch_novel_metadata.parse", lambda: fixture_top.fetch_novel_metadata(FIXTURE_NOVEL_URL),
+        repeat=repeat, params={"source": "fixture"}))
+
+    for size in sizes:
+        body = BeautifulSoup(synthetic.build_episode_html(size // 10 or 1), "html.parser").find(
+            "div", class_="js-novel-text p-novel__text")
+        results.append(run_case(
+            "scraper.extract_text_with_ruby", lambda b=body: scraper._extract_text_with_ruby_as_plain(b),
+            repeat=repeat, params={"paragraphs": size // 10 or 1}))
+
+        top_html = synthetic.build_novel_top_html(size)
+        parse_only = FixtureNarouScraper({synthetic.SYNTHETIC_NOVEL_URL: top_html}, reuse_soup=True)
+        results.append(run_case(
+            "scraper.fetch_novel_metadata.parse",
+            lambda s=parse_only: s.fetch_novel_metadata(synthetic.SYNTHETIC_NOVEL_URL),
+            repeat=repeat, ops=size, params={"episodes": size}))
+        with_soup = FixtureNarouScraper({synthetic.SYNTHETIC_NOVEL_URL: top_html})
+        results.append(run_case(
+            "scraper.fetch_novel_metadata.end_to_end",
+            lambda s=with_soup: s.fetch_novel_metadata(synthetic.SYNTHETIC_NOVEL_URL),
+            repeat=repeat, ops=size, params={"episodes": size}))
+    return results
+
+
+def context_db_cases(sizes: Sequence[int], repeat: int, work_dir: str) -> List[BenchmarkResult]:
+    """ContextDB の登録・範囲取得・ID取得・LLM結果更新を計測します。"""
+    results = []
+    for size in sizes:
+        episodes = synthetic.build_synthetic_episodes(size)
+        state: Dict[str, Any] = {}
+
+        def fresh_db(size: int = size) -> None:
+            state["db"] = _new_db(work_dir, f"insert_{size}")
+            state["novel_id"] = _create_novel(state["db"])
+
+        def insert_all() -> None:
+            db, novel_id = state["db"], state["novel_id"]
+            for episode in episodes:
+                db.get_or_create_episode(novel_id, episode["episode_url"], defaults=episode["defaults"])
+
+        def insert_in_transaction() -> None:
+            db, novel_id = state["db"], state["novel_id"]
+            with db.transaction() as tx:
+                for episode in episodes:
+                    tx.upsert_episode(novel_id, episode["episode_url"], **episode["defaults"])
+
+        # 挿入は毎回新しいDBで行うため、反復回数は抑える
+        results.append(run_case("context_db.transaction.upsert_episode", insert_in_transaction, repeat=1,
+                                warmup=0, ops=size, params={"episodes": size}, setup=fresh_db))
+        results.append(run_case("context_db.get_or_create_episode", insert_all, repeat=1, warmup=0,
+                                ops=size, params={"episodes": size}, setup=fresh_db))
+
+        db, novel_id = state["db"], state["novel_id"]
+        results.append(run_case(
+            "context_db.get_episodes_for_novel", lambda: db.get_episodes_for_novel(novel_id),
+            repeat=repeat, ops=size, params={"episodes": size}))
+        # 同じ列を ORM インスタンスと軽量な行モデルで読み比べる
+        columns = ["id", "novel_id", "episode_number", "episode_title", "episode_url", "publication_date",
+                   "char_count", "summary_generation_status"]
+        results.append(run_case(
+            "context_db.get_episodes_for_novel.columns",
+            lambda: db.get_episodes_for_novel(novel_id, only_fields=columns),
+            repeat=repeat, ops=size, params={"episodes": size}))
+        results.append(run_case(
+            "context_db.read_episodes", lambda: db.read_episodes(novel_id),
+            repeat=repeat, ops=size, params={"episodes": size}))
+        window = max(1, size // 10)
+        results.append(run_case(
+            "context_db.get_episodes_for_novel.range",
+            lambda: db.get_episodes_for_novel(novel_id, start_num=size // 2, end_num=size // 2 + window - 1),
+            repeat=repeat, ops=window, params={"episodes": size, "window": window}))
+
+        episode_ids = [e.id for e in db.get_episodes_for_novel(novel_id, only_fields=["id"])]
+        rng = random.Random(size)
+        lookups = [rng.choice(episode_ids) for _ in range(min(RANDOM_LOOKUPS, size))]
+        results.append(run_case(
+            "context_db.get_episode_by_id", lambda: [db.get_episode_by_id(i) for i in lookups],
+            repeat=repeat, ops=len(lookups), params={"episodes": size}))
+        results.append(run_case(
+            "context_db.update_episode_llm_results",
+            lambda: [db.update_episode_llm_results(i, {"summary_short": "bench"}) for i in lookups],
+            repeat=repeat, ops=len(lookups), params={"episodes": size}))
+        db.engine.dispose()
+    return results
+
+
+def pipeline_cases(sizes: Sequence[int], repeat: int, work_dir: str,
+                   paragraphs_per_episode: int = 30) -> List[BenchmarkResult]:
+    """フェイクLLMを使った取り込み〜要約までのパイプライン全体を計測します。"""
+    results = []
+    episode_html = synthetic.build_episode_html(paragraphs_per_episode)
+    for size in sizes:
+        pages = {synthetic.SYNTHETIC_NOVEL_URL: synthetic.build_novel_top_html(size)}
+        state: Dict[str, Any] = {}
+
+        def fresh_db(size: int = size) -> None:
+            state["db"] = _new_db(work_dir, f"pipeline_{size}")
+
+        def run_pipeline(pages: Dict[str, str] = pages) -> None:
+            db = state["db"]
+            scraper = FixtureNarouScraper(pages, episode_html=episode_html)
+            novel_id = ingest_novel(db, scraper, synthetic.SYNTHETIC_NOVEL_URL)
+            analyze_novel(db, FakeLLMClient(), novel_id)
+
+        results.append(run_case("pipeline.ingest_and_analyze", run_pipeline, repeat=1, warmup=0,
+                                ops=size, params={"episodes": size,
+                                                  "paragraphs": paragraphs_per_episode},
+                                setup=fresh_db))
+        state["db"].engine.dispose()
+    return results
+
+
+def _seed_novel_context(db: ContextDB, novel_id: int) -> None:
+    db.update_novel_metadata(novel_id, {"synopsis": "".join(synthetic.build_paragraph_text(i) for i in range(10))})
+    for i in range(CONTEXT_CHARACTERS):
+        db.get_or_create_character(novel_id, f"登場人物{i}", defaults={
+            "reading": f"とうじょうじんぶつ{i}", "role_in_story_llm": synthetic.build_paragraph_text(i)[:30]})
+    with db.engine.begin() as conn:
+        conn.execute(WorldSetting.__table__.insert(), [
+            {"novel_id": novel_id, "setting_key": f"設定{i}", "setting_value": synthetic.build_paragraph_text(i),
+             "category": "地理" if i % 2 else "魔法"} for i in range(CONTEXT_SETTINGS)])
+
+
+def llm_context_cases(sizes: Sequence[int], repeat: int, work_dir: str) -> List[BenchmarkResult]:
+    """作品の前置きを毎回送る場合と、コンテキストキャッシュで共有する場合の要約を比べます。
+
+    フェイクLLMは ``FakePricing`` の料金と処理時間を模しており、料金とトークン数を ``extra`` に記録します。
+    """
+    results = []
+    for size in sizes:
+        episode_count = min(size, LLM_EPISODES)
+        db = _new_db(work_dir, f"llm_{size}")
+        novel_id = _create_novel(db)
+        _seed_novel_context(db, novel_id)
+        with db.transaction() as tx:
+            for episode in synthetic.build_synthetic_episodes(episode_count):
+                content = episode["defaults"]["content_raw"]
+                tx.upsert_episode(novel_id, episode["episode_url"], content_cleaned=content,
+                                  char_count=len(content), **episode["defaults"])
+
+        def reset_summaries() -> None:
+            with db.engine.begin() as conn:
+                conn.execute(Episode.__table__.update().where(Episode.novel_id == novel_id).values(
+                    summary_generation_status=ProcessingStatus.PENDING))
+
+        for mode in ("inline", "cached"):
+            clients: List[FakeLLMClient] = []
+
+            def run(mode: str = mode) -> None:
+                llm = FakeLLMClient(prefix_cache=mode == "cached", simulate_latency=True)
+                clients.append(llm)
+                analyze_novel(db, llm, novel_id)
+
+            result = run_case("llm.analyze_novel", run, repeat=repeat, warmup=0, ops=episode_count,
+                              params={"episodes": episode_count, "context": mode}, setup=reset_summaries)
+            llm = clients[-1]
+            result.extra = {"cost_usd": round(llm.cost_usd, 6), "prompt_tokens": llm.prompt_tokens,
+                            "cached_tokens": llm.cached_tokens}
+            results.append(result)
+        db.engine.dispose()
+    return results
+
+
+def metrics_cases(repeat: int) -> List[BenchmarkResult]:
+    """計測デコレータ・タイマーの有効時/無効時のオーバーヘッドを計測します。"""
+    registry = metrics.MetricsRegistry()
+    histogram = registry.histogram("bench_seconds", "Benchmark histogram.")
+
+    def noop() -> None:
+        return None
+
+    timed_noop = metrics.timed(histogram)(noop)
+
+    def call_plain() -> None:
+        for _ in range(METRICS_CALLS):
+            noop()
+
+    def call_timed() -> None:
+        for _ in range(METRICS_CALLS):
+            timed_noop()
+
+    def use_timer() -> None:
+        for _ in range(METRICS_CALLS):
+            with histogram.time():
+                pass
+
+    results = [run_case("metrics.baseline_call", call_plain, repeat=repeat, ops=METRICS_CALLS)]
+    for enabled in (False, True):
+        registry.enabled = enabled
+        params = {"enabled": enabled}
+        results.append(run_case("metrics.timed_decorator", call_timed, repeat=repeat,
+                                ops=METRICS_CALLS, params=params))
+        results.append(run_case("metrics.timer_context", use_timer, repeat=repeat,
+                                ops=METRICS_CALLS, params=params))
+    return results
+
+
+def logging_cases(repeat: int, work_dir: str) -> List[BenchmarkResult]:
+    """同期/非同期ハンドラとレート制限で、呼び出し側スレッドのログ出力コストを計測します。"""
+    results = []
+    for mode in ("sync", "async", "rate_limited"):
+        bench_logger = logging.getLogger(f"bench.logging.{mode}")
+        bench_logger.propagate = False
+        bench_logger.setLevel(logging.INFO)
+        handler = logging.FileHandler(os.path.join(work_dir, f"{mode}.log"), encoding="utf-8")
+        handler.setFormatter(logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(module)s.%(funcName)s:%(lineno)d - %(message)s"))
+        bench_logger.addHandler(handler)
+        listener = attach_queue_handler(bench_logger, queue_size=0) if mode == "async" else None
+        if mode == "rate_limited":
+            bench_logger.addFilter(RateLimitFilter(max_per_window=10, window_sec=60))
+
+        def emit(target: logging.Logger = bench_logger) -> None:
+            for i in range(LOG_RECORDS):
+                target.info("Episode found: URL=%s, NovelID=%s, ID=%s", f"https://example.com/{i}/", 1, i)
+
+        results.append(run_case("logging.info", emit, repeat=repeat, ops=LOG_RECORDS,
+                                params={"mode": mode}))
+        if listener:
+            listener.stop()
+        for attached in list(bench_logger.handlers):
+            bench_logger.removeHandler(attached)
+            attached.close()
+        handler.close()
+    return results
+
+
+def vector_cases(sizes: Sequence[int], repeat: int, work_dir: str,
+                 dim: int = 256) -> List[BenchmarkResult]:
+    """チャンクの埋め込みと、flat / ivf 索引の top-k 検索を計測します。
+
+    検索は ``sizes`` の話数 x ``CHUNKS_PER_EPISODE`` 件のランダムなベクトルに対して行います。
+    """
+    backend = HashingEmbeddingBackend(dim=dim)
+    texts = [synthetic.build_paragraph_text(i) * 8 for i in range(100)]
+    results = [run_case("embeddings.hashing.embed", lambda: backend.embed(texts), repeat=repeat,
+                        ops=len(texts), params={"dim": dim})]
+    for size in sizes:
+        rows = size * CHUNKS_PER_EPISODE
+        rng = np.random.default_rng(size)
+        index_dir = os.path.join(work_dir, f"vectors_{size}")
+        index = VectorIndex(index_dir, dim)
+        for start in range(0, rows, 100000):
+            count = min(100000, rows - start)
+            index.append(range(start, start + count),
+                         normalize_rows(rng.normal(size=(count, dim)).astype(np.float32)),
+                         keys=[(start + i) // CHUNKS_PER_EPISODE for i in range(count)])
+        queries = normalize_rows(rng.normal(size=(VECTOR_QUERIES, dim)).astype(np.float32))
+        for mode in ("flat", "ivf"):
+            searcher = VectorIndex(index_dir, dim, mode=mode)
+            searcher.search(queries[0], k=10)  # ivf はここで重心を学習する
+            results.append(run_case(
+                "vector_index.search", lambda s=searcher: [s.search(q, k=10) for q in queries],
+                repeat=repeat, ops=VECTOR_QUERIES, params={"chunks": rows, "mode": mode, "dim": dim}))
+    return results
+
+
+def corpus_cases(sizes: Sequence[int], repeat: int, work_dir: str) -> List[BenchmarkResult]:
+    """コーパスパックの作成と、「第 n 話の k 段落目」のランダムアクセスを DB からの読み出しと比べます。"""
+    results = []
+    for size in sizes:
+        db = _new_db(work_dir, f"corpus_{size}")
+        novel_id = _create_novel(db)
+        with db.transaction() as tx:
+            for episode in synthetic.build_synthetic_episodes(size):
+                content = episode["defaults"]["content_raw"]
+                tx.upsert_episode(novel_id, episode["episode_url"], content_cleaned=content,
+                                  char_count=len(content), **episode["defaults"])
+        root = os.path.join(work_dir, f"corpus_{size}")
+        results.append(run_case("corpus_pack.sync", lambda: sync_novel_pack(db, novel_id, root=root, rebuild=True),
+                                repeat=1, warmup=0, ops=size, params={"episodes": size}))
+
+        pack = CorpusPack(pack_path(root, novel_id))
+        rows = {row.episode_number: row.id for row in db.read_episodes(novel_id)}
+        rng = random.Random(size)
+        lookups = []
+        for _ in range(RANDOM_LOOKUPS):
+            number = rng.randint(1, size)
+            lookups.append((number, rng.randrange(pack.episode(number).paragraph_count)))
+        results.append(run_case(
+            "corpus_pack.paragraph", lambda: [pack.paragraph_text(n, k) for n, k in lookups],
+            repeat=repeat, ops=len(lookups), params={"episodes": size}))
+        results.append(run_case(
+            "context_db.read_episode_text.paragraph",
+            lambda: [db.read_episode_text(rows[n]).content_cleaned.split("\n")[k] for n, k in lookups],
+            repeat=repeat, ops=len(lookups), params={"episodes": size}))
+        pack.close()
+        db.engine.dispose()
+    return results
+
+
+def run_all(sizes: Sequence[int], repeat: int, groups: Sequence[str],
+            work_dir: Optional[str] = None) -> List[BenchmarkResult]:
+    """指定グループのベンチマークをまとめて実行します。
+
+    Args:
+        sizes (Sequence[int]): 合成小説の話数 (例: 1000, 10000)。
+        repeat (int): 各ケースの計測回数。
+        groups (Sequence[str]): ``"scraper"``, ``"db"``, ``"pipeline"``, ``"llm"``, ``"metrics"``,
+            ``"logging"``, ``"vector"``, ``"corpus"``, ``"import"`` のうち実行するもの。
+        work_dir (Optional[str]): 一時DBの作成先。省略時は一時ディレクトリを作成します。
+
+    Returns:
+        List[BenchmarkResult]: 全ケースの計測結果。
+    """
+    with tempfile.TemporaryDirectory(prefix="novel_bench_") as tmp_dir:
+        target_dir = work_dir or tmp_dir
+        results: List[BenchmarkResult] = []
+        if "scraper" in groups:
+            results.extend(scraper_cases(sizes, repeat))
+        if "db" in groups:
+            results.extend(context_db_cases(sizes, repeat, target_dir))
+        if "pipeline" in groups:
+            results.extend(pipeline_cases(sizes, repeat, target_dir))
+        if "llm" in groups:
+            results.extend(llm_context_cases(sizes, repeat, target_dir))
+        if "metrics" in groups:
+            results.extend(metrics_cases(repeat))
+        if "logging" in groups:
+            results.extend(logging_cases(repeat, target_dir))
+        if "vector" in groups:
+            results.extend(vector_cases(sizes, repeat, target_dir))
+        if "corpus" in groups:
+            results.extend(corpus_cases(sizes, repeat, target_dir))
+        if "import" in groups:
+            results.extend(import_time_cases(repeat))
+        return results
@@ -0,0 +1,106 @@
+"""ネットワークに出ずに LLMClient の代わりをする決定的なフェイククライアント。"""
+import hashlib
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from core.llm_client import CachedContext, context_fingerprint, with_context
+
+CHARS_PER_TOKEN = 2  # 日本語テキストの大まかなトークン換算
+DEFAULT_CONTEXT_TTL_SEC = 3600
+
+
+class FakePricing(NamedTuple):
+    """プレフィックスキャッシュのある API を模した料金 (100万トークンあたり USD) と処理時間。
+
+    キャッシュから読んだトークンは通常の入力より安く速い一方、キャッシュの作成は通常の入力として
+    課金され、保持期間に応じた保存料がかかります。
+    """
+    input_per_mtok: float = 0.30
+    cached_input_per_mtok: float = 0.075
+    output_per_mtok: float = 2.50
+    cache_storage_per_mtok_hour: float = 1.00
+    base_latency_sec: float = 0.002
+    input_latency_sec_per_ktok: float = 0.001
+    cached_latency_sec_per_ktok: float = 0.0001
+
+
+class FakeLLMClient:
+    """``LLMClient.generate_text`` / ``register_context`` と同じインターフェースを持つフェイク実装。
+
+    応答はプロンプト (前置きを含む) から決定的に生成され、呼び出し回数・トークン数・
+    ``pricing`` に基づく料金と処理時間を記録します。
+
+    Args:
+        latency_sec (float): 呼び出しごとに実際に待つ秒数。
+        summary_chars (int): 応答の文字数。
+        pricing (Optional[FakePricing]): 料金と処理時間のモデル。
+        prefix_cache (bool): True の場合、``register_context`` の前置きをキャッシュしたものとして扱います。
+            False の場合は ``LLMClient`` のフォールバックと同じく、毎回プロンプトの先頭に付けて送ります。
+        simulate_latency (bool): True の場合、``pricing`` から求めた処理時間だけ実際に待ちます。
+    """
+
+    def __init__(self, latency_sec: float = 0.0, summary_chars: int = 120,
+                 pricing: Optional[FakePricing] = None, prefix_cache: bool = False,
+                 simulate_latency: bool = False):
+        self.latency_sec = latency_sec
+        self.summary_chars = summary_chars
+        self.pricing = pricing or FakePricing()
+        self.prefix_cache = prefix_cache
+        self.simulate_latency = simulate_latency
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+        self.cache_writes = 0
+        self.cost_usd = 0.0
+        self.simulated_sec = 0.0
+        self.prompts: List[str] = []
+        self.record_prompts = False
+        self._contexts: Dict[str, CachedContext] = {}
+
+    def register_context(self, key: str, text: str, ttl_sec: Optional[float] = None) -> CachedContext:
+        """前置きを登録します。内容が同じなら登録済みのものを返し、キャッシュの作成料を二重に数えません。"""
+        fingerprint = context_fingerprint(text)
+        current = self._contexts.get(key)
+        if current is not None and current.fingerprint == fingerprint:
+            return current
+        handle = None
+        if self.prefix_cache:
+            tokens = len(text) // CHARS_PER_TOKEN
+            hours = (ttl_sec or DEFAULT_CONTEXT_TTL_SEC) / 3600
+            self.cost_usd += tokens * (self.pricing.input_per_mtok
+                                       + self.pricing.cache_storage_per_mtok_hour * hours) / 1e6
+            self.cache_writes += 1
+            handle = f"cachedContents/{fingerprint}"
+        context = CachedContext(key, fingerprint, text, handle)
+        self._contexts[key] = context
+        return context
+
+    def generate_text(self, prompt_text: str, context: Optional[CachedContext] = None,
+                      **generation_kwargs: Any) -> str:
+        """プロンプトのハッシュと末尾部分から要約風のテキストを返します。"""
+        full_prompt = with_context(prompt_text, context)
+        cached = len(context.text) // CHARS_PER_TOKEN if context is not None and context.handle else 0
+        sent = len(full_prompt if cached == 0 else prompt_text) // CHARS_PER_TOKEN
+        output = self.summary_chars // CHARS_PER_TOKEN
+        self.calls += 1
+        self.prompt_tokens += sent
+        self.cached_tokens += cached
+        self.output_tokens += output
+        pricing = self.pricing
+        self.cost_usd += (sent * pricing.input_per_mtok + cached * pricing.cached_input_per_mtok
+                          + output * pricing.output_per_mtok) / 1e6
+        latency = (pricing.base_latency_sec + sent / 1000 * pricing.input_latency_sec_per_ktok
+                   + cached / 1000 * pricing.cached_latency_sec_per_ktok)
+        self.simulated_sec += latency
+        if self.record_prompts:
+            self.prompts.append(full_prompt)
+        if self.latency_sec or self.simulate_latency:
+            time.sleep(self.latency_sec + (latency if self.simulate_latency else 0.0))
+        digest = hashlib.sha1(full_prompt.encode("utf-8")).hexdigest()[:8]
+        body = prompt_text[-self.summary_chars:].replace("\n", " ")
+        return f"[fake-summary {digest}] {body}"
+
+    def get_model_info(self) -> Dict[str, Any]:
+        """フェイクモデルの情報を返します。"""
+        return {"configured_model_name": "fake-llm"}
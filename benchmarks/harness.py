@@ -0,0 +1,171 @@
+"""ベンチマークの計測・結果保存・比較を行うハーネス。
+
+結果は JSON で保存され、コミット間で ``compare_results`` により比較できます。
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+RESULTS_SCHEMA_VERSION = 1
+DEFAULT_REGRESSION_THRESHOLD = 0.10  # 中央値が10%以上悪化したら回帰とみなす
+
+
+class BenchmarkResult:
+    """1ケース分の計測結果。"""
+
+    def __init__(self, name: str, params: Dict[str, Any], timings_sec: List[float], ops: int):
+        self.name = name
+        self.params = params
+        self.timings_sec = timings_sec
+        self.ops = ops
+        # 時間以外に記録する値 (フェイクLLMの料金・トークン数など)
+        self.extra: Dict[str, Any] = {}
+
+    @property
+    def key(self) -> str:
+        """ケース名とパラメータから、比較用の一意なキーを返します。"""
+        param_text = ",".join(f"{k}={self.params[k]}" for k in sorted(self.params))
+        return f"{self.name}[{param_text}]" if param_text else self.name
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON 出力用の辞書に変換します。"""
+        timings = sorted(self.timings_sec)
+        median = statistics.median(timings)
+        return {
+            "name": self.name,
+            "key": self.key,
+            "params": self.params,
+            "repeat": len(timings),
+            "ops": self.ops,
+            "timings_sec": {
+                "min": timings[0],
+                "mean": statistics.mean(timings),
+                "median": median,
+                "p95": _percentile(timings, 95),
+                "max": timings[-1],
+            },
+            "ops_per_sec": (self.ops / median) if median > 0 else None,
+            "extra": self.extra,
+        }
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * percent / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def run_case(name: str, func: Callable[[], Any], repeat: int = 5, warmup: int = 1,
+             ops: int = 1, params: Optional[Dict[str, Any]] = None,
+             setup: Optional[Callable[[], None]] = None) -> BenchmarkResult:
+    """関数を繰り返し実行して計測します。
+
+    Args:
+        name (str): ケース名 (例: ``scraper.extract_text``)。
+        func (Callable[[], Any]): 計測対象の関数。
+        repeat (int): 計測回数。
+        warmup (int): 計測前に捨てる実行回数。
+        ops (int): 1回の実行で処理する件数 (スループット算出用)。
+        params (Optional[Dict[str, Any]]): 結果に記録するパラメータ。
+        setup (Optional[Callable[[], None]]): 各実行の直前に呼ぶ準備処理 (計測対象外)。
+
+    Returns:
+        BenchmarkResult: 計測結果。
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        func()
+    timings = []
+    for _ in range(max(1, repeat)):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return BenchmarkResult(name, params or {}, timings, ops)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)))
+        return completed.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(results: List[BenchmarkResult]) -> Dict[str, Any]:
+    """計測結果とメタ情報 (コミット、Python バージョン等) から出力用の辞書を組み立てます。"""
+    return {
+        "schema_version": RESULTS_SCHEMA_VERSION,
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": [r.to_dict() for r in results],
+    }
+
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+    """レポートを JSON ファイルに書き出します。"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    """JSON ファイルからレポートを読み込みます。"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[Dict[str, Any]]:
+    """2つのレポートを中央値で比較します。
+
+    Args:
+        baseline (Dict[str, Any]): 比較元のレポート。
+        current (Dict[str, Any]): 比較先のレポート。
+        threshold (float): 回帰・改善とみなす中央値の変化率。
+
+    Returns:
+        List[Dict[str, Any]]: 両方に存在するケースごとの比較結果。
+            ``status`` は ``"regression"``, ``"improvement"``, ``"unchanged"`` のいずれか。
+    """
+    baseline_by_key = {r["key"]: r for r in baseline.get("results", [])}
+    rows = []
+    for result in current.get("results", []):
+        old = baseline_by_key.get(result["key"])
+        if not old:
+            continue
+        old_median = old["timings_sec"]["median"]
+        new_median = result["timings_sec"]["median"]
+        ratio = (new_median / old_median) if old_median > 0 else float("inf")
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 - threshold:
+            status = "improvement"
+        else:
+            status = "unchanged"
+        rows.append({
+            "key": result["key"],
+            "baseline_median_sec": old_median,
+            "current_median_sec": new_median,
+            "ratio": ratio,
+            "status": status,
+        })
+    return rows
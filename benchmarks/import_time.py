@@ -0,0 +1,113 @@
+"""主要モジュールの import 時間を計測し、予算 (budget) を超えていないか確認するベンチマーク。
+
+各モジュールは新しいインタプリタで import し、インタプリタ起動時間を除いた import 部分だけを
+計測します。あわせて、遅延読み込みすべき重い依存 (LLM SDK、HTML パーサ等) が
+import 時点で読み込まれていないことも確認します。
+
+使用例:
+    python -m benchmarks.import_time --check
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from benchmarks.harness import BenchmarkResult
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RUNS = 5
+
+# モジュール -> import 時間の予算 (秒, 中央値)
+IMPORT_BUDGETS_SEC: Dict[str, float] = {
+    "core.config": 0.15,
+    "core.llm_client": 0.2,
+    "scrapers.narou_scraper": 0.2,
+    "core.context_db": 0.6,
+    "main": 0.3,
+}
+
+# モジュール -> import 直後に読み込まれていてはいけない依存
+FORBIDDEN_EAGER_IMPORTS: Dict[str, Tuple[str, ...]] = {
+    "core.llm_client": ("google.generativeai",),
+    "scrapers.narou_scraper": ("bs4", "requests"),
+    "main": ("google.generativeai", "bs4", "requests", "sqlalchemy"),
+}
+
+_MEASURE_SNIPPET = (
+    "import json, sys, time, warnings\n"
+    "warnings.simplefilter('ignore')\n"
+    "start = time.perf_counter()\n"
+    "__import__({module!r})\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {forbidden!r} if m in sys.modules]}}))\n"
+)
+
+
+def measure_import(module: str, forbidden: Sequence[str] = ()) -> Tuple[float, List[str]]:
+    """新しいインタプリタで module を import し、所要時間と読み込まれた禁止依存を返します。
+
+    Args:
+        module (str): import するモジュール名。
+        forbidden (Sequence[str]): import 後に ``sys.modules`` にあってはいけないモジュール名。
+
+    Returns:
+        Tuple[float, List[str]]: import 時間 (秒) と、読み込まれていた禁止依存のリスト。
+    """
+    completed = subprocess.run(
+        [sys.executable, "-c", _MEASURE_SNIPPET.format(module=module, forbidden=tuple(forbidden))],
+        capture_output=True, text=True, cwd=REPO_ROOT, check=True,
+        env={**os.environ, "PYTHONPATH": REPO_ROOT})
+    # import 時のログ出力が混ざるため、最終行の JSON だけを読む
+    data = json.loads(completed.stdout.strip().splitlines()[-1])
+    return data["elapsed"], data["loaded"]
+
+
+def import_time_cases(runs: int = DEFAULT_RUNS,
+                      modules: Optional[Sequence[str]] = None) -> List[BenchmarkResult]:
+    """予算対象モジュールの import 時間を計測します。"""
+    results = []
+    for module in modules or IMPORT_BUDGETS_SEC:
+        timings = [measure_import(module)[0] for _ in range(max(1, runs))]
+        results.append(BenchmarkResult("import_time", {"module": module}, timings, 1))
+    return results
+
+
+def check_budgets(results: List[BenchmarkResult]) -> List[str]:
+    """予算超過と、遅延読み込みされていない依存を検出してメッセージのリストで返します。"""
+    problems = []
+    for result in results:
+        module = result.params["module"]
+        median = statistics.median(result.timings_sec)
+        budget = IMPORT_BUDGETS_SEC.get(module)
+        if budget is not None and median > budget:
+            problems.append(f"{module}: import took {median:.3f}s (budget {budget:.3f}s)")
+    for module, forbidden in FORBIDDEN_EAGER_IMPORTS.items():
+        _, loaded = measure_import(module, forbidden)
+        if loaded:
+            problems.append(f"{module}: eagerly imports {', '.join(loaded)}")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """import 時間を表示し、``--check`` 指定時は予算超過で 1 を返します。"""
+    parser = argparse.ArgumentParser(description="Measure import time against the budget.")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Fresh interpreters per module.")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 when over budget.")
+    args = parser.parse_args(argv)
+
+    results = import_time_cases(args.runs)
+    for result in results:
+        module = result.params["module"]
+        print(f"{module:<28} median={statistics.median(result.timings_sec) * 1000:8.1f}ms "
+              f"budget={IMPORT_BUDGETS_SEC[module] * 1000:8.1f}ms")
+    problems = check_budgets(results)
+    for problem in problems:
+        print(f"OVER BUDGET: {problem}")
+    return 1 if problems and args.check else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
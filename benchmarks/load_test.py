@@ -0,0 +1,222 @@
+"""読み取りAPI (``core.read_api``) に同時に読むリーダーを模した負荷をかけ、レイテンシの分布を計測する。
+
+既定では合成の作品 (本文・要約・登場人物・世界設定付き) を一時DBに作り、同じプロセスの別スレッドで
+サーバーを起動して、応答キャッシュありとなしの両方を計測します。各リーダーは keep-alive の接続で
+話・目次・要約・登場人物のページを人気の偏り (前の話ほど読まれる) に従って読み、一度読んだページは
+``--revisit-ratio`` の割合で ETag 付きの再読込 (``If-None-Match``) をします。
+
+使用例:
+    python -m benchmarks.load_test --readers 32 --requests 100
+    python -m benchmarks.load_test --url http://127.0.0.1:8080 --novel-id 1
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_EPISODES = 1000
+DEFAULT_READERS = 32
+DEFAULT_REQUESTS = 100
+DEFAULT_REVISIT_RATIO = 0.2
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, target: str,
+                   etag: Optional[str] = None) -> Tuple[int, Dict[str, str], bytes]:
+    lines = [f"GET {target} HTTP/1.1", f"Host: {host}", "Accept-Encoding: gzip"]
+    if etag:
+        lines.append(f"If-None-Match: {etag}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    headers = {}
+    for line in head[1:]:
+        name, _, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0"))
+    body = await reader.readexactly(length) if length else b""
+    return int(head[0].split(" ")[1]), headers, body
+
+
+def _pick_target(rng: random.Random, novel_id: int, episode_count: int, page_size: int) -> str:
+    # 前の話ほど読まれる (パレート分布で話数を選ぶ)
+    number = min(int(rng.paretovariate(1.2)), episode_count)
+    roll = rng.random()
+    if roll < 0.6:
+        return f"/novels/{novel_id}/episodes/{number}"
+    if roll < 0.75:
+        after = (number - 1) // page_size * page_size
+        return f"/novels/{novel_id}/episodes?after={after}&limit={page_size}" if after else \
+            f"/novels/{novel_id}/episodes?limit={page_size}"
+    if roll < 0.85:
+        return f"/novels/{novel_id}/summaries?limit={page_size}"
+    if roll < 0.95:
+        return f"/novels/{novel_id}/characters"
+    return f"/novels/{novel_id}"
+
+
+async def _run_reader(host: str, port: int, novel_id: int, episode_count: int, page_size: int, requests: int,
+                      revisit_ratio: float, seed: int, latencies: List[float], statuses: Dict[int, int]) -> None:
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    etags: Dict[str, str] = {}
+    try:
+        for _ in range(requests):
+            target = _pick_target(rng, novel_id, episode_count, page_size)
+            etag = etags.get(target) if rng.random() < revisit_ratio else None
+            started = time.perf_counter()
+            status, headers, _ = await _request(reader, writer, host, target, etag)
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            if "etag" in headers:
+                etags[target] = headers["etag"]
+    finally:
+        writer.close()
+
+
+async def _load(host: str, port: int, novel_id: int, readers: int, requests: int, page_size: int,
+                revisit_ratio: float) -> Dict[str, Any]:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        status, headers, body = await _request(reader, writer, host, f"/novels/{novel_id}")
+    finally:
+        writer.close()
+    if status != 200:
+        raise RuntimeError(f"Novel {novel_id} is not served by {host}:{port} (status {status})")
+    if headers.get("content-encoding") == "gzip":
+        body = gzip.decompress(body)
+    episode_count = json.loads(body)["episode_count"]
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _run_reader(host, port, novel_id, episode_count, page_size, requests, revisit_ratio, seed,
+                    latencies, statuses) for seed in range(readers)))
+    elapsed = time.perf_counter() - started
+    cuts = statistics.quantiles(latencies, n=100)
+    return {
+        "requests": len(latencies),
+        "readers": readers,
+        "requests_per_sec": len(latencies) / elapsed,
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+        "max_ms": max(latencies) * 1000,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+def _build_db(directory: str, episode_count: int) -> Tuple[Any, int]:
+    from benchmarks import synthetic
+    from benchmarks.cases import _create_novel, _new_db, _seed_novel_context
+    from core.db_schemas import Episode, ProcessingStatus
+
+    db = _new_db(directory, "read_api")
+    novel_id = _create_novel(db)
+    _seed_novel_context(db, novel_id)
+    with db.transaction() as tx:
+        for episode in synthetic.build_synthetic_episodes(episode_count):
+            content = episode["defaults"]["content_raw"]
+            tx.upsert_episode(novel_id, episode["episode_url"], content_cleaned=content,
+                              char_count=len(content), **episode["defaults"])
+    with db.engine.begin() as conn:
+        conn.execute(Episode.__table__.update().where(Episode.novel_id == novel_id).values(
+            summary_short=synthetic.build_paragraph_text(0) * 3,
+            summary_generation_status=ProcessingStatus.COMPLETED))
+    return db, novel_id
+
+
+def _start_in_thread(api: Any) -> Tuple[int, Callable[[], None]]:
+    """サーバーを別スレッドのイベントループで起動し、(ポート, 停止関数) を返します。"""
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    started: Dict[str, Any] = {}
+
+    def run() -> None:
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(api.start("127.0.0.1", 0))
+        started["port"] = server.sockets[0].getsockname()[1]
+        ready.set()
+        loop.run_forever()
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+
+    thread = threading.Thread(target=run, name="read-api-load-test", daemon=True)
+    thread.start()
+    ready.wait()
+
+    def stop() -> None:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+    return started["port"], stop
+
+
+def _print_result(label: str, result: Dict[str, Any]) -> None:
+    print(f"{label:<12} {result['requests']:6d} req  {result['requests_per_sec']:8.1f} req/s  "
+          f"p50={result['p50_ms']:7.2f}ms  p95={result['p95_ms']:7.2f}ms  p99={result['p99_ms']:7.2f}ms  "
+          f"max={result['max_ms']:7.2f}ms  statuses={result['statuses']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the read API with concurrent readers.")
+    parser.add_argument("--url", default=None, help="Base URL of a running server (default: start one in-process).")
+    parser.add_argument("--novel-id", type=int, default=None, help="Novel to read (required with --url).")
+    parser.add_argument("--episodes", type=int, default=DEFAULT_EPISODES, help="Episodes of the synthetic novel.")
+    parser.add_argument("--readers", type=int, default=DEFAULT_READERS, help="Concurrent connections.")
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS, help="Requests per reader.")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--revisit-ratio", type=float, default=DEFAULT_REVISIT_RATIO,
+                        help="Share of requests sent with If-None-Match for an already read page.")
+    parser.add_argument("--workers", type=int, default=4, help="Server threads for DB reads (in-process only).")
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this path.")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    from core.config import config  # noqa: F401
+    from core.logger_setup import setup_logger
+    setup_logger().setLevel(args.log_level.upper())
+
+    def load(host: str, port: int, novel_id: int) -> Dict[str, Any]:
+        return asyncio.run(_load(host, port, novel_id, args.readers, args.requests, args.page_size,
+                                 args.revisit_ratio))
+
+    results: Dict[str, Dict[str, Any]] = {}
+    if args.url:
+        if args.novel_id is None:
+            parser.error("--novel-id is required with --url")
+        parts = urlsplit(args.url)
+        results["external"] = load(parts.hostname or "127.0.0.1", parts.port or 80, args.novel_id)
+        _print_result("external", results["external"])
+    else:
+        from core.read_api import ReadAPI
+
+        with tempfile.TemporaryDirectory(prefix="novel_load_") as work_dir:
+            db, novel_id = _build_db(work_dir, args.episodes)
+            for label, cache_entries in (("cache", 4096), ("no-cache", 0)):
+                api = ReadAPI(db, workers=args.workers, cache_entries=cache_entries, page_size=args.page_size)
+                port, stop = _start_in_thread(api)
+                try:
+                    results[label] = load("127.0.0.1", port, novel_id)
+                finally:
+                    stop()
+                    api.close()
+                _print_result(label, results[label])
+            db.engine.dispose()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""ベンチマークを実行し、結果を JSON で保存・比較するCLI。
+
+使用例:
+    python -m benchmarks.run_benchmarks --sizes 1000,10000 --output data/bench/results.json
+    python -m benchmarks.run_benchmarks --compare data/bench/base.json data/bench/results.json
+"""
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+from benchmarks.harness import (
+    DEFAULT_REGRESSION_THRESHOLD, build_report, compare_results, load_report, write_report
+)
+
+DEFAULT_SIZES = "1000"
+DEFAULT_GROUPS = "scraper,db,pipeline,llm,metrics,logging,vector,corpus,import"
+DEFAULT_OUTPUT = "data/bench/results.json"
+
+
+def _parse_csv(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def _print_comparison(rows: List[dict]) -> None:
+    for row in rows:
+        print(f"{row['status']:<12} {row['ratio']:6.2f}x  "
+              f"{row['baseline_median_sec'] * 1000:10.3f}ms -> {row['current_median_sec'] * 1000:10.3f}ms  "
+              f"{row['key']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI エントリーポイント。回帰を検出して ``--fail-on-regression`` 指定時は 1 を返します。"""
+    parser = argparse.ArgumentParser(description="Run hot-path benchmarks.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help="Comma separated synthetic novel sizes (episodes).")
+    parser.add_argument("--groups", default=DEFAULT_GROUPS,
+                        help="Comma separated groups: scraper, db, pipeline, llm, metrics, logging, vector, corpus, import.")
+    parser.add_argument("--repeat", type=int, default=5, help="Measured runs per case.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Path of the JSON result file.")
+    parser.add_argument("--log-level", default="WARNING",
+                        help="Application log level while benchmarking.")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="Compare two result files instead of running benchmarks.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Relative change of the median treated as regression/improvement.")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 when a regression is detected.")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        rows = compare_results(load_report(args.compare[0]), load_report(args.compare[1]),
+                               threshold=args.threshold)
+        _print_comparison(rows)
+        has_regression = any(r["status"] == "regression" for r in rows)
+        return 1 if has_regression and args.fail_on_regression else 0
+
+    # アプリのログ出力自体が計測を乱さないよう、既定では WARNING 以上のみ出力する
+    # (core.config の読み込み時にログ設定が適用されるため、その後でレベルを上書きする)
+    from core.config import config  # noqa: F401
+    from core.logger_setup import setup_logger
+    setup_logger().setLevel(args.log_level.upper())
+    from benchmarks.cases import run_all
+
+    sizes = [int(s) for s in _parse_csv(args.sizes)]
+    results = run_all(sizes, args.repeat, _parse_csv(args.groups))
+    report = build_report(results)
+    write_report(report, args.output)
+    for result in report["results"]:
+        timings = result["timings_sec"]
+        extra = " ".join(f"{k}={v}" for k, v in result["extra"].items())
+        print(f"{result['key']:<70} median={timings['median'] * 1000:10.3f}ms "
+              f"p95={timings['p95'] * 1000:10.3f}ms {extra}".rstrip())
+    print(f"Results written to {args.output}")
+    print(json.dumps(report["meta"], ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
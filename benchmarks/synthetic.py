@@ -0,0 +1,142 @@
+"""ベンチマーク用の合成データ (なろう形式のHTMLや大量話数の小説) を生成するモジュール。"""
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+NOVEL_TOP_FIXTURE = "narou_novel_top.html"
+EPISODE_FIXTURE = "narou_episode.html"
+SYNTHETIC_NCODE = "n9999zz"
+SYNTHETIC_NOVEL_URL = f"https://ncode.syosetu.com/{SYNTHETIC_NCODE}/"
+EPISODES_PER_CHAPTER = 50
+RUBY_EVERY_N_PARAGRAPHS = 3
+
+_SENTENCES = [
+    "星の降る夜、図書館の扉が静かに開いた。",
+    "彼女は書架の間を歩きながら、古い背表紙に指を滑らせた。",
+    "「この本には、まだ誰も読んでいない続きがあるの」",
+    "窓の外では、青白い光が石畳を濡らしている。",
+    "少年は絵本を胸に抱いたまま、言葉を探すように俯いた。",
+    "閉架書庫の鍵は、館長の机の引き出しにしまわれているはずだった。",
+    "遠くで鐘が鳴り、頁の間から小さな星がひとつこぼれ落ちた。",
+    "思い出せないのは、きっと思い出したくないからだ。",
+]
+
+
+def load_fixture(filename: str) -> str:
+    """fixtures ディレクトリに保存されたHTMLを読み込みます。
+
+    Args:
+        filename (str): fixtures ディレクトリ内のファイル名。
+
+    Returns:
+        str: HTML文字列。
+    """
+    with open(os.path.join(FIXTURE_DIR, filename), encoding="utf-8") as f:
+        return f.read()
+
+
+def build_novel_top_html(episode_count: int, ncode: str = SYNTHETIC_NCODE) -> str:
+    """指定話数の目次を持つ、なろう作品トップページ相当のHTMLを生成します。
+
+    Args:
+        episode_count (int): 目次に含める話数。
+        ncode (str): 作品のNコード。
+
+    Returns:
+        str: 生成したHTML文字列。
+    """
+    base_date = datetime(2020, 1, 1, 18, 0)
+    parts = [
+        '<!DOCTYPE html><html lang="ja"><head><meta charset="UTF-8">',
+        '<meta property="og:description" content="ファンタジー 長編 群像劇 合成データ">',
+        '</head><body><article class="p-novel">',
+        f'<h1 class="p-novel__title">合成長編小説 {episode_count}話</h1>',
+        '<div class="p-novel__author">作者：<a href="https://mypage.syosetu.com/1/">ベンチ作者</a></div>',
+        '<div id="novel_ex">ベンチマーク用に生成された長編小説です。<br>内容に意味はありません。</div>',
+        '<div class="p-eplist">',
+    ]
+    for number in range(1, episode_count + 1):
+        if (number - 1) % EPISODES_PER_CHAPTER == 0:
+            chapter = (number - 1) // EPISODES_PER_CHAPTER + 1
+            parts.append(f'<div class="p-eplist__chapter-title">第{chapter}章</div>')
+        published = (base_date + timedelta(days=number)).strftime("%Y/%m/%d %H:%M")
+        revised = ""
+        if number % 10 == 0:
+            revised_at = (base_date + timedelta(days=number + 30)).strftime("%Y/%m/%d %H:%M")
+            revised = f'<span title="{revised_at} 改稿">（<u>改</u>）</span>'
+        parts.append(
+            '<div class="p-eplist__sublist">'
+            f'<a href="/{ncode}/{number}/" class="p-eplist__subtitle">第{number}話　合成エピソード</a>'
+            f'<div class="p-eplist__update">{published}{revised}</div>'
+            '</div>'
+        )
+    parts.append("</div></article></body></html>")
+    return "".join(parts)
+
+
+def build_paragraph_text(index: int) -> str:
+    """段落番号から決定的な本文テキストを生成します。"""
+    return "".join(_SENTENCES[(index + i) % len(_SENTENCES)] for i in range(3))
+
+
+def build_episode_html(paragraph_count: int) -> str:
+    """指定段落数の本文を持つ、なろう各話ページ相当のHTMLを生成します。
+
+    Args:
+        paragraph_count (int): 本文の段落数。一定間隔でルビと空行を含みます。
+
+    Returns:
+        str: 生成したHTML文字列。
+    """
+    parts = [
+        '<!DOCTYPE html><html lang="ja"><head><meta charset="UTF-8"></head><body>',
+        '<div class="js-novel-text p-novel__text">',
+    ]
+    line_number = 0
+    for i in range(1, paragraph_count + 1):
+        text = build_paragraph_text(i)
+        if i % RUBY_EVERY_N_PARAGRAPHS == 0:
+            text = ("<ruby><rb>司書</rb><rp>(</rp><rt>ししょ</rt><rp>)</rp></ruby>"
+                    f"は言った。{text}<br>続く一文。")
+        line_number += 1
+        parts.append(f'<p id="L{line_number}">{text}</p>')
+        if i % 5 == 0:
+            # なろうの本文は空行も <p id="Ln"><br></p> として出力される
+            line_number += 1
+            parts.append(f'<p id="L{line_number}"><br></p>')
+    parts.append("</div></body></html>")
+    return "".join(parts)
+
+
+def build_synthetic_episodes(episode_count: int, paragraphs_per_episode: int = 30,
+                             novel_url: str = SYNTHETIC_NOVEL_URL,
+                             seed: int = 0) -> List[Dict[str, Any]]:
+    """ContextDB に投入するための合成エピソードデータを生成します。
+
+    Args:
+        episode_count (int): 生成する話数。
+        paragraphs_per_episode (int): 1話あたりの段落数。
+        novel_url (str): エピソードURLの基になる作品URL。
+        seed (int): 文字数を揺らすための乱数シード。
+
+    Returns:
+        List[Dict[str, Any]]: ``episode_url`` と ``defaults`` を持つ辞書のリスト。
+    """
+    rng = random.Random(seed)
+    base_date = datetime(2020, 1, 1, 18, 0)
+    episodes = []
+    for number in range(1, episode_count + 1):
+        paragraph_total = max(1, paragraphs_per_episode + rng.randint(-5, 5))
+        content = "\n\n".join(build_paragraph_text(number + i) for i in range(paragraph_total))
+        episodes.append({
+            "episode_url": f"{novel_url}{number}/",
+            "defaults": {
+                "episode_title": f"第{number}話　合成エピソード",
+                "episode_number": number,
+                "content_raw": content,
+                "publication_date": base_date + timedelta(days=number),
+            },
+        })
+    return episodes
@@ -1,6 +1,26 @@
+from typing import Any, Optional, Sequence, Tuple
+
+
 class BasePlugin:
+    # 購読するイベント種別 (core.events.EPISODE_STORED 等)。空ならイベント配送の対象外
+    subscribed_events: Tuple[str, ...] = ()
+    # 1バッチあたりの処理時間の上限 (秒)。None の場合は PluginManager の既定値
+    timeout_sec: Optional[float] = None
+
     def __init__(self, name):
         self.name = name
 
     def execute(self, *args, **kwargs):
         raise NotImplementedError("Execute method must be implemented by the plugin.")
+
+    def handle_events(self, event_name: str, events: Sequence[Any]) -> Any:
+        """購読イベントのバッチを処理します。既定では ``execute`` に委譲します。
+
+        Args:
+            event_name (str): イベント種別。
+            events (Sequence[Any]): ``core.events.Event`` のバッチ。全プラグインで共有されるため変更しないでください。
+
+        Returns:
+            Any: 処理結果。
+        """
+        return self.execute(event_name=event_name, events=events)
@@ -1,17 +1,80 @@
 import os
 from dotenv import load_dotenv
-from core.logger_setup import setup_logger
+from core.logger_setup import configure_logging, setup_logger
 
 logger = setup_logger()
 
 load_dotenv()
 
 
+def _env_bool(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 class Config:
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+    LLM_MODEL = os.getenv("LLM_MODEL", "gemini-pro")
+    # 作品ごとの前置き (あらすじ・登場人物・世界設定) をコンテキストキャッシュに登録して使い回す。
+    # キャッシュには最小トークン数があるため、これより短い前置きは毎回プロンプトに含めて送る
+    LLM_CONTEXT_CACHE_ENABLED = _env_bool("LLM_CONTEXT_CACHE_ENABLED", True)
+    LLM_CONTEXT_CACHE_MIN_CHARS = int(os.getenv("LLM_CONTEXT_CACHE_MIN_CHARS", "8000"))
+    LLM_CONTEXT_CACHE_TTL_SEC = float(os.getenv("LLM_CONTEXT_CACHE_TTL_SEC", "3600"))
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///data/novel_context.db")
+    # 接続プール (PostgreSQL 等のサーバー型DBのみ。複数ノードで同じDBを使う前提の設定)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT_SEC = float(os.getenv("DB_POOL_TIMEOUT_SEC", "30"))
+    DB_POOL_RECYCLE_SEC = int(os.getenv("DB_POOL_RECYCLE_SEC", "1800"))
+    DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+    # メトリクス (無効時はホットパスのオーバーヘッドをほぼゼロにする)
+    METRICS_ENABLED = _env_bool("METRICS_ENABLED")
+    METRICS_EXPORTERS = [e.strip() for e in os.getenv("METRICS_EXPORTERS", "json").split(",") if e.strip()]
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+    METRICS_JSON_PATH = os.getenv("METRICS_JSON_PATH", "data/metrics.json")
+    METRICS_JSON_INTERVAL_SEC = float(os.getenv("METRICS_JSON_INTERVAL_SEC", "60"))
+    # ログ (非同期モードではファイル/標準出力への書き込みを別スレッドで行う)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_ASYNC = _env_bool("LOG_ASYNC")
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", "0"))
+    LOG_RATE_LIMIT_WINDOW_SEC = float(os.getenv("LOG_RATE_LIMIT_WINDOW_SEC", "60"))
+    # プラグイン (イベントを購読するプラグインを thread / process プールで実行する)
+    PLUGIN_DIRECTORY = os.getenv("PLUGIN_DIRECTORY", "plugins")
+    PLUGIN_MANIFEST_PATH = os.getenv("PLUGIN_MANIFEST_PATH", "data/plugin_manifest.json")
+    PLUGIN_EXECUTOR = os.getenv("PLUGIN_EXECUTOR", "thread")
+    PLUGIN_MAX_WORKERS = int(os.getenv("PLUGIN_MAX_WORKERS", "4"))
+    PLUGIN_TIMEOUT_SEC = float(os.getenv("PLUGIN_TIMEOUT_SEC", "60"))
+    PLUGIN_SHUTDOWN_TIMEOUT_SEC = float(os.getenv("PLUGIN_SHUTDOWN_TIMEOUT_SEC", "120"))
+    EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "50"))
+    EVENT_FLUSH_INTERVAL_SEC = float(os.getenv("EVENT_FLUSH_INTERVAL_SEC", "2"))
+    # ベクトル検索 (episode_stored を受けて本文チャンクを索引に追記する)
+    VECTOR_INDEX_ENABLED = _env_bool("VECTOR_INDEX_ENABLED")
+    VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "data/vector_index")
+    VECTOR_INDEX_MODE = os.getenv("VECTOR_INDEX_MODE", "flat")
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "hashing")
+    # コーパスパック (novel_synced を受けて作品の本文をメモリマップ用のファイルに追記する)
+    CORPUS_PACK_ENABLED = _env_bool("CORPUS_PACK_ENABLED")
+    CORPUS_PACK_DIR = os.getenv("CORPUS_PACK_DIR", "data/corpus")
+    # 読み取りAPI (リーダー向けの HTTP サーバー。描画した応答を ETag・gzip 版とともにメモリに保持する)
+    READ_API_HOST = os.getenv("READ_API_HOST", "127.0.0.1")
+    READ_API_PORT = int(os.getenv("READ_API_PORT", "8080"))
+    READ_API_WORKERS = int(os.getenv("READ_API_WORKERS", "4"))
+    READ_API_CACHE_ENTRIES = int(os.getenv("READ_API_CACHE_ENTRIES", "2048"))
+    READ_API_CACHE_TTL_SEC = float(os.getenv("READ_API_CACHE_TTL_SEC", "30"))
+    READ_API_GZIP_MIN_BYTES = int(os.getenv("READ_API_GZIP_MIN_BYTES", "1024"))
+    READ_API_PAGE_SIZE = int(os.getenv("READ_API_PAGE_SIZE", "50"))
+    READ_API_MAX_PAGE_SIZE = int(os.getenv("READ_API_MAX_PAGE_SIZE", "200"))
+    # 改稿で変わった文字数の割合がこれ以上なら、話の要約・解析をやり直す
+    REVISION_REANALYZE_RATIO = float(os.getenv("REVISION_REANALYZE_RATIO", "0.1"))
 
     def __init__(self):
+        configure_logging(self.LOG_LEVEL, async_mode=self.LOG_ASYNC, queue_size=self.LOG_QUEUE_SIZE,
+                          rate_limit=self.LOG_RATE_LIMIT,
+                          rate_limit_window_sec=self.LOG_RATE_LIMIT_WINDOW_SEC)
         missing = []
         if not self.GEMINI_API_KEY:
             missing.append("GEMINI_API_KEY")
@@ -19,8 +82,9 @@ class Config:
             missing.append("DATABASE_URL")
         if missing:
             logger.warning(
-                f"The following environment variables are not set: {', '.join(missing)}. Please set them in your environment or .env file.")
-        logger.info(f"Database URL set to: {self.DATABASE_URL}")
+                "The following environment variables are not set: %s. Please set them in your environment or .env file.",
+                ", ".join(missing))
+        logger.info("Database URL set to: %s", self.DATABASE_URL)
 
 
 config = Config()
@@ -0,0 +1,178 @@
+"""LLM に渡す文脈を、過去の話の本文チャンクからベクトル検索で組み立てるモジュール。
+
+本文は段落単位でまとめたチャンクに分割して ``EpisodeChunk`` に保存し、そのベクトルを
+作品ごとの ``VectorIndex`` に追記します。"以前 X に何があったか" を尋ねるときは、
+要約を丸ごとプロンプトに詰める代わりに、関連するチャンクを top-k で取り出します。
+"""
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from core.context_db import ContextDB
+from core.embeddings import EmbeddingBackend, create_backend
+from core.logger_setup import setup_logger
+from core.vector_index import VectorIndex
+
+logger = setup_logger()
+
+DEFAULT_INDEX_DIR = "data/vector_index"
+DEFAULT_CHUNK_CHARS = 400
+DEFAULT_OVERLAP_CHARS = 80
+DEFAULT_TOP_K = 5
+DEFAULT_CONTEXT_CHARS = 4000
+OVERFETCH_FACTOR = 2  # 再索引で不要になったチャンクを読み飛ばす分だけ多めに検索する
+
+
+class RetrievedPassage(NamedTuple):
+    """検索で取り出した本文チャンク。"""
+    chunk_id: int
+    episode_id: int
+    episode_number: Optional[int]
+    episode_title: Optional[str]
+    score: float
+    text: str
+
+
+def chunk_text(text: str, max_chars: int = DEFAULT_CHUNK_CHARS,
+               overlap_chars: int = DEFAULT_OVERLAP_CHARS) -> List[Tuple[int, int, str]]:
+    """本文を段落の切れ目でまとめ、``max_chars`` 程度のチャンクに分割します。
+
+    1段落が ``max_chars`` を超える場合は ``overlap_chars`` だけ重ねて分割します。
+
+    Returns:
+        List[Tuple[int, int, str]]: (開始位置, 終了位置, チャンク本文) のリスト。
+    """
+    chunks: List[Tuple[int, int, str]] = []
+    step = max(1, max_chars - overlap_chars)
+    start: Optional[int] = None
+    end = position = 0
+    for paragraph in text.split("\n"):
+        para_start, para_end = position, position + len(paragraph)
+        position = para_end + 1
+        if not paragraph.strip():
+            continue
+        if start is not None and para_end - start > max_chars:
+            chunks.append((start, end, text[start:end]))
+            start = None
+        if start is None:
+            start = para_start
+        end = para_end
+        while end - start > max_chars:
+            chunks.append((start, start + max_chars, text[start:start + max_chars]))
+            start += step
+    if start is not None:
+        chunks.append((start, end, text[start:end]))
+    return chunks
+
+
+class ContextBuilder:
+    """作品ごとのベクトル索引を管理し、質問に関連する過去の本文を取り出します。
+
+    Args:
+        db (ContextDB): チャンクの保存先。
+        backend (Optional[EmbeddingBackend]): 埋め込みバックエンド。省略時は ``hashing``。
+        index_dir (str): 作品ごとの索引ディレクトリを置く場所。
+        mode (str): ``VectorIndex`` の検索モード (``flat`` / ``ivf``)。
+    """
+
+    def __init__(self, db: ContextDB, backend: Optional[EmbeddingBackend] = None,
+                 index_dir: str = DEFAULT_INDEX_DIR, mode: str = "flat",
+                 chunk_chars: int = DEFAULT_CHUNK_CHARS, overlap_chars: int = DEFAULT_OVERLAP_CHARS):
+        self.db = db
+        self.backend = backend or create_backend("hashing")
+        self.index_dir = index_dir
+        self.mode = mode
+        self.chunk_chars = chunk_chars
+        self.overlap_chars = overlap_chars
+        self._indexes: Dict[int, VectorIndex] = {}
+
+    def index_for(self, novel_id: int) -> VectorIndex:
+        """作品のベクトル索引を返します (初回は開くか作成します)。"""
+        index = self._indexes.get(novel_id)
+        if index is None:
+            index = VectorIndex(os.path.join(self.index_dir, f"novel_{novel_id}"), self.backend.dim,
+                                mode=self.mode, model=f"{self.backend.name}:{self.backend.dim}")
+            self._indexes[novel_id] = index
+        return index
+
+    def index_episode(self, episode_id: int, reuse: bool = True) -> int:
+        """話の本文をチャンクに分割して保存し、ベクトルを索引に追記します。
+
+        Args:
+            episode_id (int): 話ID。
+            reuse (bool): True の場合、本文の変わっていないチャンクは埋め込み済みのベクトルを使い回し、
+                改稿で変わったチャンクだけを埋め込みます。False の場合はすべて埋め込み直します。
+
+        Returns:
+            int: 追記したチャンク数。本文がない場合は 0。
+        """
+        episode = self.db.read_episode_text(episode_id)
+        if episode is None or not episode.content_cleaned:
+            return 0
+        pieces = chunk_text(episode.content_cleaned, self.chunk_chars, self.overlap_chars)
+        store = self.db.sync_episode_chunks if reuse else self.db.replace_episode_chunks
+        chunks = store(episode_id, [{"char_start": s, "char_end": e, "text": t} for s, e, t in pieces],
+                       embedding_backend=self.backend.name)
+        if not chunks:
+            return 0
+        vectors = self.backend.embed([chunk.text for chunk in chunks])
+        self.index_for(episode.novel_id).append(
+            [chunk.id for chunk in chunks], vectors, keys=[episode.episode_number or 0] * len(chunks))
+        return len(chunks)
+
+    def index_novel(self, novel_id: int, reindex: bool = False) -> int:
+        """作品の本文取得済みの話のうち、未索引のもの (``reindex`` 時は全話) を索引に追加します。
+
+        Returns:
+            int: 追記したチャンク数。
+        """
+        indexed = set() if reindex else set(self.db.get_chunked_episode_ids(novel_id))
+        episodes = self.db.read_episodes(novel_id)
+        total = 0
+        for episode in episodes:
+            if episode.id not in indexed and episode.char_count:
+                total += self.index_episode(episode.id, reuse=not reindex)
+        logger.info("Indexed %d chunks for NovelID=%s", total, novel_id)
+        return total
+
+    def retrieve(self, novel_id: int, query: str, k: int = DEFAULT_TOP_K,
+                 before_episode: Optional[int] = None) -> List[RetrievedPassage]:
+        """質問に関連する本文チャンクを類似度の高い順に返します。
+
+        Args:
+            novel_id (int): 作品ID。
+            query (str): 質問や検索語。
+            k (int): 返す件数。
+            before_episode (Optional[int]): 指定時、この話数より前の話だけを対象にします (ネタバレ防止)。
+
+        Returns:
+            List[RetrievedPassage]: 取り出したチャンク。
+        """
+        # 件数は別プロセスの追記で増えるため、ここでは見ずに search に任せる
+        index = self.index_for(novel_id)
+        max_key = before_episode - 1 if before_episode is not None else None
+        hits = index.search(self.backend.embed([query], is_query=True)[0], k=k * OVERFETCH_FACTOR,
+                            max_key=max_key)
+        chunks = {chunk.id: chunk for chunk in self.db.read_chunks([chunk_id for chunk_id, _ in hits])}
+        passages = []
+        for chunk_id, score in hits:
+            chunk = chunks.get(chunk_id)
+            if chunk is None:
+                continue
+            passages.append(RetrievedPassage(chunk.id, chunk.episode_id, chunk.episode_number,
+                                             chunk.episode_title, score, chunk.text))
+            if len(passages) >= k:
+                break
+        return passages
+
+    def build_context(self, novel_id: int, query: str, k: int = DEFAULT_TOP_K,
+                      before_episode: Optional[int] = None, max_chars: int = DEFAULT_CONTEXT_CHARS) -> str:
+        """``retrieve`` の結果を、``LLMClient.generate_text`` のプロンプトに埋め込める文字列にします。"""
+        blocks = []
+        used = 0
+        for passage in self.retrieve(novel_id, query, k=k, before_episode=before_episode):
+            block = f"【第{passage.episode_number}話 {passage.episode_title or ''}】\n{passage.text}"
+            if blocks and used + len(block) > max_chars:
+                break
+            blocks.append(block)
+            used += len(block)
+        return "\n\n".join(blocks)
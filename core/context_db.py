@@ -1,21 +1,221 @@
 import os
-from sqlalchemy import create_engine, desc, asc
-from sqlalchemy.orm import sessionmaker, Session, load_only, joinedload
+import threading
+from sqlalchemy import (
+    DateTime, cast, create_engine, desc, asc, extract, func, literal, nulls_first, or_, select, text, update
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import sessionmaker, Session, load_only, joinedload, make_transient_to_detached
 from contextlib import contextmanager
-from typing import List, Optional, Dict, Any, Type, TypeVar, Tuple, Generator
-from datetime import datetime
+from typing import List, NamedTuple, Optional, Dict, Any, Type, TypeVar, Tuple, Generator
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
 
 from core.db_schemas import (
-    Base, Novel, Episode, Character, Location, Item, PlotEvent, WorldSetting, Foreshadowing,
-    ProcessingStatus, ForeshadowingStatus
+    Base, Novel, Episode, EpisodeChunk, EpisodeParagraph, EpisodeRevision, CrawlTarget, Character, Location, Item,
+    PlotEvent, WorldSetting, Foreshadowing, ProcessingStatus, ForeshadowingStatus, SchemaVersion, SCHEMA_VERSION,
+    DEFAULT_UPDATE_INTERVAL_SEC
+)
+from core import metrics, migrations, paragraphs, profiling
+from core.read_models import (
+    CharacterRow, ChunkRow, EpisodeRow, EpisodeSummaryRow, EpisodeTextRow, NovelRow, WorldSettingRow, hydrate,
+    select_for
 )
 from core.config import config as app_config
 from core.logger_setup import setup_logger
 
 logger = setup_logger()
+
+SESSION_SECONDS = metrics.histogram(
+    "contextdb_session_seconds", "Duration of ContextDB sessions including commit.")
+SESSION_ERRORS_TOTAL = metrics.counter(
+    "contextdb_session_errors_total", "ContextDB sessions rolled back because of an error.")
 T = TypeVar('T', bound=Base)  # 型ヒント用（mypy対策でコメントアウト）
 T = TypeVar('T')
 
+# ON CONFLICT で競合を吸収できる自然キー (一意制約のある列)
+NATURAL_KEYS: Dict[Any, Tuple[str, ...]] = {
+    Novel: ("url",),
+    Episode: ("episode_url",),
+    CrawlTarget: ("novel_url",),
+    Character: ("novel_id", "name"),
+}
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+# 複数ノードが同時に起動してもスキーマ作成を1プロセスに限るための advisory lock のキー
+SCHEMA_LOCK_KEY = 7305021
+DEFAULT_FLUSH_EVERY = 500
+# 一括登録で読み込む話の列 (本文などの大きな列は読まない)
+_EPISODE_UPSERT_COLUMNS = (Episode.id, Episode.novel_id, Episode.episode_url, Episode.episode_title,
+                           Episode.episode_number, Episode.publication_date, Episode.char_count,
+                           Episode.revised_at)
+# 大きな改稿で未処理に戻す、話全体に依存する LLM 処理の状態列
+_EPISODE_ANALYSIS_STATUSES = ("summary_generation_status", "key_events_extraction_status", "llm_analysis_status")
+
+
+class ContentUpdate(NamedTuple):
+    """``store_episode_content`` の結果。
+
+    Attributes:
+        episode: 更新した話。
+        changed: 本文が保存済みのものから変わったか (初回の保存を含む)。
+        revision: 改稿として記録した版番号。初回の保存や本文が同じ場合は None。
+        diff: 改稿前後の段落の差分。初回の保存や本文が同じ場合は None。
+    """
+    episode: Episode
+    changed: bool
+    revision: Optional[int]
+    diff: Optional[paragraphs.ParagraphDiff]
+
+
+def engine_options(db_url: str) -> Dict[str, Any]:
+    """DB の種類に応じた ``create_engine`` の引数を返します。
+
+    SQLite はファイルロックで書き込みが直列化されるため既定のままにし、
+    サーバー型DB (PostgreSQL 等) にだけ接続プールの設定を渡します。
+    """
+    if db_url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": app_config.DB_POOL_SIZE,
+        "max_overflow": app_config.DB_MAX_OVERFLOW,
+        "pool_timeout": app_config.DB_POOL_TIMEOUT_SEC,
+        "pool_recycle": app_config.DB_POOL_RECYCLE_SEC,
+        "pool_pre_ping": app_config.DB_POOL_PRE_PING,
+    }
+
+
+class Transaction:
+    """``ContextDB.transaction()`` が返す作業単位 (unit of work)。
+
+    ブロック内の操作は1つのセッションとトランザクションを共有し、コミットはブロックを抜けるときの
+    1回だけです。``upsert_episode`` で追加した行は ``flush_every`` 件ごとにまとめて INSERT します。
+    新しい話は ``INSERT ... ON CONFLICT DO NOTHING`` で挿入するため、先読みの後に他のワーカーが
+    同じ話を作っていても IntegrityError にならず、その行を更新します。
+    ブロック内で呼んだ ContextDB の既存メソッドも同じセッションを使います。
+
+    Attributes:
+        session (Session): 共有するセッション。
+        error (Optional[BaseException]): ブロック内の ContextDB メソッドで発生したエラー。
+            設定されている場合、ブロックを抜けるときにロールバックして送出します。
+    """
+
+    def __init__(self, db: "ContextDB", session: Session, flush_every: int = DEFAULT_FLUSH_EVERY):
+        self.db = db
+        self.session = session
+        self.flush_every = flush_every
+        self.error: Optional[BaseException] = None
+        self._pending = 0
+        self._episodes: Dict[int, Dict[str, Episode]] = {}
+        self._new_episodes: List[Episode] = []
+
+    def add(self, instance: Any) -> None:
+        """新しい行を追加します。``flush_every`` 件たまると flush します。
+
+        話 (``Episode``) は flush 時に ``ON CONFLICT DO NOTHING`` でまとめて挿入します。
+        """
+        if isinstance(instance, Episode) and instance.episode_url is not None:
+            self._new_episodes.append(instance)
+        else:
+            self.session.add(instance)
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """追加・変更した行を DB に送ります (コミットはしません)。新しい行の ID はここで決まります。"""
+        self.session.flush()
+        if self._new_episodes:
+            self._insert_new_episodes()
+            # 他のワーカーが先に作っていた話への更新を送る
+            self.session.flush()
+        self._pending = 0
+
+    def _insert_new_episodes(self) -> None:
+        pending, self._new_episodes = self._new_episodes, []
+        insert = _UPSERT_INSERTS.get(self.session.get_bind().dialect.name)
+        if insert is None:
+            self.session.add_all(pending)
+            return
+        table = Episode.__table__
+        # ORM の INSERT と同じく、未設定の列は既定値か None にし、DB 側で決まる列は RETURNING で受け取る
+        generated = [c for c in table.columns if not c.primary_key and (
+            c.server_default is not None or (c.default is not None and not c.default.is_scalar))]
+        columns = [c for c in table.columns if not c.primary_key and c not in generated]
+        # 他のワーカーが先に作っていた話には、呼び出し側が指定した列だけを反映する
+        fields = {episode.episode_url: {key: value for key, value in vars(episode).items()
+                                        if key in table.columns and key not in ("id", "novel_id", "episode_url")}
+                  for episode in pending}
+        for episode in pending:
+            for column in columns:
+                if getattr(episode, column.key) is None:
+                    setattr(episode, column.key, column.default.arg if column.default is not None else None)
+        statement = insert(table).on_conflict_do_nothing(index_elements=list(NATURAL_KEYS[Episode])) \
+            .returning(table.c.episode_url, table.c.id, *generated)
+        inserted = {row[0]: row[1:] for row in self.session.execute(
+            statement, [{c.key: getattr(episode, c.key) for c in columns} for episode in pending])}
+        lost = {}
+        for episode in pending:
+            returned = inserted.get(episode.episode_url)
+            if returned is None:
+                lost[episode.episode_url] = episode
+                continue
+            # 挿入した値をそのまま持つ永続オブジェクトとしてセッションに登録する
+            episode.id = returned[0]
+            for column, value in zip(generated, returned[1:]):
+                setattr(episode, column.key, value)
+            make_transient_to_detached(episode)
+            self.session.add(episode)
+        if not lost:
+            return
+        existing = self.session.query(Episode).options(load_only(*_EPISODE_UPSERT_COLUMNS)).filter(
+            Episode.episode_url.in_(list(lost))).with_for_update().all()
+        for row in existing:
+            self._apply(row, fields[row.episode_url])
+            lost[row.episode_url].id = row.id
+            self._episodes.setdefault(row.novel_id, {})[row.episode_url] = row
+        logger.info("%d episodes were created by another writer first; updated them instead", len(existing))
+
+    @staticmethod
+    def _apply(instance: Any, fields: Dict[str, Any]) -> bool:
+        changed = False
+        for key, value in fields.items():
+            if getattr(instance, key) != value:
+                setattr(instance, key, value)
+                changed = True
+        return changed
+
+    def upsert_novel(self, url: str, **fields: Any) -> Tuple[Novel, bool]:
+        """作品を取得または作成し、``fields`` で更新します。(作品, 作成したか) を返します。"""
+        novel, action = self.db._get_or_create(self.session, Novel, defaults=fields, url=url)
+        return novel, action == "created"
+
+    def upsert_episode(self, novel_id: int, episode_url: str, **fields: Any) -> Tuple[Episode, bool]:
+        """話を取得または作成し、``fields`` で更新します。(話, 作成したか) を返します。
+
+        作品ごとに最初の呼び出しで既存の話を1回のクエリでまとめて読み込み、新しい話は
+        ``flush_every`` 件ごとにまとめて INSERT します。新しい話の ``id`` は ``flush()`` または
+        ブロック終了後に参照できます。
+        """
+        known = self._episodes.get(novel_id)
+        if known is None:
+            rows = self.session.query(Episode).options(load_only(*_EPISODE_UPSERT_COLUMNS)).filter(
+                Episode.novel_id == novel_id).all()
+            known = self._episodes[novel_id] = {e.episode_url: e for e in rows}
+        episode = known.get(episode_url)
+        if episode is not None:
+            self._apply(episode, fields)
+            return episode, False
+        episode = Episode(novel_id=novel_id, episode_url=episode_url, **fields)
+        known[episode_url] = episode
+        self.add(episode)
+        return episode, True
+
+    def upsert_character(self, novel_id: int, name: str, **fields: Any) -> Tuple[Character, bool]:
+        """登場人物を取得または作成し、``fields`` で更新します。(登場人物, 作成したか) を返します。"""
+        character, action = self.db._get_or_create(
+            self.session, Character, defaults=fields, novel_id=novel_id, name=name)
+        return character, action == "created"
+
 
 class ContextDB:
     """
@@ -26,16 +226,15 @@ class ContextDB:
     def __init__(self, db_url: Optional[str] = None):
         self.db_url = db_url or app_config.DATABASE_URL
         self._ensure_db_directory_exists()
-        self.engine = create_engine(self.db_url, echo=False)
-        try:
-            Base.metadata.create_all(self.engine)
-            logger.info(
-                f"Database tables checked/created successfully at {self.db_url}")
-        except Exception as e:
-            logger.error(
-                f"Error creating database tables at {self.db_url}: {e}", exc_info=True)
+        self.engine = create_engine(self.db_url, echo=False, **engine_options(self.db_url))
+        self._schema_ready = False
+        self._schema_error: Optional[migrations.MigrationError] = None
+        self._schema_lock = threading.Lock()
+        # transaction() の作業単位はスレッドごとに持つ
+        self._local = threading.local()
+        # コミット後も返却したオブジェクトの属性を参照できるよう expire しない
         self.SessionLocal = sessionmaker(
-            autocommit=False, autoflush=False, bind=self.engine)
+            autocommit=False, autoflush=False, expire_on_commit=False, bind=self.engine)
 
     def _ensure_db_directory_exists(self):
         if self.db_url.startswith("sqlite:///"):
@@ -46,57 +245,181 @@ class ContextDB:
             if db_dir and not os.path.exists(db_dir):
                 try:
                     os.makedirs(db_dir, exist_ok=True)
-                    logger.info(f"Created database directory: {db_dir}")
+                    logger.info("Created database directory: %s", db_dir)
                 except OSError as e:
                     logger.error(
-                        f"Failed to create database directory {db_dir}: {e}")
+                        "Failed to create database directory %s: %s", db_dir, e)
 
-    @contextmanager
-    def get_db(self) -> Generator[Session, None, None]:
-        db = self.SessionLocal()
+    def ensure_schema(self) -> None:
+        """スキーマを必要なときだけ作成・移行します。
+
+        インスタンスごとに最初のセッション開始時に1回だけ呼ばれ、DB に記録された
+        バージョンが ``SCHEMA_VERSION`` と一致する場合は何もしません。異なる場合は
+        ``core.migrations.upgrade`` で新規作成または未適用のマイグレーションを実行します。
+
+        Raises:
+            MigrationError: 自動では移行できない場合。このインスタンスは以後も同じエラーを送出します
+                (データを直してから ``python main.py migrate`` を実行してください)。
+        """
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            if self._schema_error is not None:
+                raise self._schema_error
+            try:
+                if self._stored_schema_version() != SCHEMA_VERSION:
+                    with self.engine.begin() as conn:
+                        if conn.dialect.name == "postgresql":
+                            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+                        applied = migrations.upgrade(conn)
+                    logger.info(
+                        "Database tables checked/created successfully at %s "
+                        "(schema version %s, migrations applied: %s)",
+                        self.db_url, SCHEMA_VERSION, applied or "none")
+                self._schema_ready = True
+            except migrations.MigrationError as e:
+                self._schema_error = e
+                logger.error("Database at %s is unusable until it is migrated: %s "
+                             "Fix the data and run `python main.py migrate`.", self.db_url, e)
+                raise
+            except Exception as e:
+                logger.error(
+                    "Error creating database tables at %s: %s", self.db_url, e, exc_info=True)
+                raise
+
+    def _stored_schema_version(self) -> Optional[int]:
         try:
-            yield db
-            db.commit()
-        except Exception as e:
-            logger.error(f"Database session error: {e}", exc_info=True)
-            db.rollback()
+            with self.engine.connect() as conn:
+                return conn.execute(
+                    SchemaVersion.__table__.select().with_only_columns(SchemaVersion.version)
+                ).scalar()
+        except SQLAlchemyError:
+            # テーブル未作成 (新規DB) の場合
             return None
+
+    @contextmanager
+    def transaction(self, expire_on_commit: bool = False,
+                    flush_every: int = DEFAULT_FLUSH_EVERY) -> Generator[Transaction, None, None]:
+        """複数の操作を1つのトランザクションにまとめる作業単位を開始します。
+
+        ブロックを正常に抜けると1回だけコミットし、例外が発生した場合はすべてロールバックして
+        例外を送出します。ブロック内で呼んだ ContextDB のメソッドも同じトランザクションに参加し、
+        入れ子の ``transaction()`` は外側の作業単位をそのまま返します。
+
+        Args:
+            expire_on_commit (bool): True の場合、コミット後に返却済みオブジェクトを expire します
+                (次に属性を読むと再読み込みされます)。既定では expire せず、そのまま参照できます。
+            flush_every (int): ``upsert_episode`` などで追加した行をまとめて flush する件数。
+
+        Yields:
+            Transaction: 作業単位。
+        """
+        active = getattr(self._local, "transaction", None)
+        if active is not None:
+            yield active
+            return
+        self.ensure_schema()
+        session = self.SessionLocal(expire_on_commit=expire_on_commit)
+        tx = Transaction(self, session, flush_every=flush_every)
+        self._local.transaction = tx
+        try:
+            with SESSION_SECONDS.time():
+                yield tx
+                if tx.error is not None:
+                    raise tx.error
+                tx.flush()
+                session.commit()
+        except Exception:
+            SESSION_ERRORS_TOTAL.inc()
+            session.rollback()
+            raise
         finally:
-            db.close()
+            self._local.transaction = None
+            session.close()
+
+    @contextmanager
+    def get_db(self) -> Generator[Session, None, None]:
+        tx = getattr(self._local, "transaction", None)
+        if tx is not None:
+            # transaction() の中ではそのセッションを使い、コミットは外側に任せる
+            tx.flush()
+            try:
+                yield tx.session
+            except Exception as e:
+                tx.error = e
+                raise
+            return
+        self.ensure_schema()
+        with SESSION_SECONDS.time(), profiling.stage("store"):
+            db = self.SessionLocal()
+            try:
+                yield db
+                db.commit()
+            except Exception as e:
+                SESSION_ERRORS_TOTAL.inc()
+                logger.error("Database session error: %s", e, exc_info=True)
+                db.rollback()
+                return None
+            finally:
+                db.close()
 
-    def _get_or_create(self, db: Session, model: Type[T], defaults: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Tuple[T, bool]:
+    def _get_or_create(self, db: Session, model: Type[T], defaults: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Tuple[T, str]:
+        """インスタンスを取得または作成し、``"created"``/``"updated"``/``"found"`` のいずれかを返します。
+
+        自然キーを持つモデルは ``INSERT ... ON CONFLICT DO NOTHING`` で作成するため、
+        複数のワーカーが同時に同じ行を作ろうとしても重複や IntegrityError になりません。
+        """
         instance = db.query(model).filter_by(
             **kwargs).with_for_update().first()
-        created = False
-        updated = False
-        if instance:
-            if defaults:
-                for key, value in defaults.items():
-                    if hasattr(instance, key) and getattr(instance, key) != value:
-                        setattr(instance, key, value)
-                        updated = True
-        else:
+        if instance is None:
             params = {**kwargs, **(defaults or {})}
-            instance = model(**params)
-            db.add(instance)
-            db.flush()
-            created = True
-        return instance, created or updated
+            inserted = self._insert_if_absent(db, model, params)
+            if inserted is None:
+                instance = model(**params)
+                db.add(instance)
+                db.flush()
+                return instance, "created"
+            if inserted:
+                return db.query(model).filter_by(**kwargs).one(), "created"
+            # 他のワーカーが先に作成したので、その行を更新対象にする
+            instance = db.query(model).filter_by(**kwargs).with_for_update().one()
+        action = "found"
+        if defaults:
+            for key, value in defaults.items():
+                if hasattr(instance, key) and getattr(instance, key) != value:
+                    setattr(instance, key, value)
+                    action = "updated"
+        return instance, action
+
+    def _insert_if_absent(self, db: Session, model: Type[T], params: Dict[str, Any]) -> Optional[bool]:
+        """自然キーが競合しない場合だけ行を挿入し、挿入したかどうかを返します。
+
+        自然キーがない、または ON CONFLICT を使えない DB の場合は何もせず None を返します
+        (呼び出し側が通常の INSERT を行います)。
+        """
+        keys = NATURAL_KEYS.get(model)
+        insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+        table = model.__table__
+        if not keys or insert is None or not all(k in params for k in keys) \
+                or any(k not in table.columns for k in params):
+            return None
+        result = db.execute(insert(table).values(**params).on_conflict_do_nothing(index_elements=list(keys)))
+        return result.rowcount == 1
 
     # --- Novel Operations ---
     def get_or_create_novel(self, url: str, defaults: Optional[Dict[str, Any]] = None) -> Tuple[Optional[Novel], bool]:
         try:
             with self.get_db() as db:
-                novel, modified = self._get_or_create(
+                novel, action = self._get_or_create(
                     db, Novel, defaults=defaults, url=url)
-                action = "created" if modified and not db.query(Novel).filter(
-                    Novel.id == novel.id).first() else ("updated" if modified else "found")
-                logger.info(
-                    f"Novel {action}: URL={url}, ID={novel.id if novel else 'N/A'}")
-                return novel, modified
+                # テンプレートを action ごとに分け、"found" などの繰り返しだけを間引けるようにする
+                logger.info("Novel " + action + ": URL=%s, ID=%s", url, novel.id)
+                return novel, action != "found"
         except Exception as e:
             logger.error(
-                f"Error in get_or_create_novel for URL {url}: {e}", exc_info=True)
+                "Error in get_or_create_novel for URL %s: %s", url, e, exc_info=True)
             return None, False
 
     def get_novel_by_id(self, novel_id: int) -> Optional[Novel]:
@@ -105,7 +428,7 @@ class ContextDB:
                 return db.query(Novel).filter(Novel.id == novel_id).first()
         except Exception as e:
             logger.error(
-                f"Error getting novel by ID {novel_id}: {e}", exc_info=True)
+                "Error getting novel by ID %s: %s", novel_id, e, exc_info=True)
             return None
 
     def update_novel_metadata(self, novel_id: int, metadata: Dict[str, Any]) -> Optional[Novel]:
@@ -122,34 +445,33 @@ class ContextDB:
                         novel.last_scraped_at = datetime.utcnow().replace(tzinfo=None)
                         db.flush()
                         logger.info(
-                            f"Novel metadata updated for ID: {novel_id}")
+                            "Novel metadata updated for ID: %s", novel_id)
                     return novel
                 logger.warning(
-                    f"Novel not found for metadata update: ID={novel_id}")
+                    "Novel not found for metadata update: ID=%s", novel_id)
                 return None
         except Exception as e:
             logger.error(
-                f"Error updating novel metadata for ID {novel_id}: {e}", exc_info=True)
+                "Error updating novel metadata for ID %s: %s", novel_id, e, exc_info=True)
             return None
 
     # --- Episode Operations ---
     def get_or_create_episode(self, novel_id: int, episode_url: str, defaults: Optional[Dict[str, Any]] = None) -> Tuple[Optional[Episode], bool]:
         if not self.get_novel_by_id(novel_id):
             logger.error(
-                f"Cannot get/create episode, Novel ID {novel_id} not found.")
+                "Cannot get/create episode, Novel ID %s not found.", novel_id)
             return None, False
         try:
             with self.get_db() as db:
-                episode, modified = self._get_or_create(
+                episode, action = self._get_or_create(
                     db, Episode, defaults=defaults, novel_id=novel_id, episode_url=episode_url)
-                action = "created" if modified and not db.query(Episode).filter(
-                    Episode.id == episode.id).first() else ("updated" if modified else "found")
                 logger.info(
-                    f"Episode {action}: URL={episode_url}, NovelID={novel_id}, ID={episode.id if episode else 'N/A'}")
-                return episode, modified
+                    "Episode " + action + ": URL=%s, NovelID=%s, ID=%s", episode_url, novel_id, episode.id)
+                return episode, action != "found"
         except Exception as e:
             logger.error(
-                f"Error in get_or_create_episode for URL {episode_url} (Novel ID {novel_id}): {e}", exc_info=True)
+                "Error in get_or_create_episode for URL %s (Novel ID %s): %s", episode_url, novel_id, e,
+                exc_info=True)
             return None, False
 
     def get_episode_by_id(self, episode_id: int) -> Optional[Episode]:
@@ -158,7 +480,7 @@ class ContextDB:
                 return db.query(Episode).filter(Episode.id == episode_id).first()
         except Exception as e:
             logger.error(
-                f"Error getting episode by ID {episode_id}: {e}", exc_info=True)
+                "Error getting episode by ID %s: %s", episode_id, e, exc_info=True)
             return None
 
     def get_episodes_for_novel(self, novel_id: int, start_num: Optional[int] = None, end_num: Optional[int] = None, only_fields: Optional[List[str]] = None) -> List[Episode]:
@@ -170,29 +492,151 @@ class ContextDB:
                 if end_num is not None:
                     query = query.filter(Episode.episode_number <= end_num)
                 if only_fields:
-                    query = query.options(load_only(*only_fields))
+                    # SQLAlchemy 2.x では文字列指定が不可のため属性に変換する
+                    query = query.options(
+                        load_only(*[getattr(Episode, f) for f in only_fields]))
                 return query.order_by(asc(Episode.episode_number)).all()
         except Exception as e:
             logger.error(
-                f"Error getting episodes for novel ID {novel_id}: {e}", exc_info=True)
+                "Error getting episodes for novel ID %s: %s", novel_id, e, exc_info=True)
             return []
 
     def update_episode_content(self, episode_id: int, content_cleaned: str, char_count: int) -> Optional[Episode]:
+        result = self.store_episode_content(episode_id, content_cleaned, char_count)
+        return result.episode if result else None
+
+    def store_episode_content(self, episode_id: int, content_cleaned: str, char_count: Optional[int] = None,
+                              revised_at: Optional[datetime] = None) -> Optional[ContentUpdate]:
+        """話の本文を段落ハッシュとともに保存します。
+
+        保存済みの本文と異なる場合は段落単位で差分を取り、改稿前の本文を復元するための逆差分を
+        ``EpisodeRevision`` に記録します。最後に要約してからの変更量の累計が ``REVISION_REANALYZE_RATIO``
+        以上なら話全体の LLM 処理 (要約・重要イベント抽出・解析) を未処理に戻し、それ未満なら変更された
+        段落に依存する伏線 (``context_snippet`` が新しい本文に見つからないもの) だけを再解析の対象にします。
+
+        Args:
+            episode_id (int): 話ID。
+            content_cleaned (str): 新しい本文。
+            char_count (Optional[int]): 文字数。省略時は本文の長さ。
+            revised_at (Optional[datetime]): 目次に表示された改稿日時。
+
+        Returns:
+            Optional[ContentUpdate]: 保存結果。話が見つからない場合や失敗時は None。
+        """
         try:
             with self.get_db() as db:
-                episode = db.query(Episode).filter(
-                    Episode.id == episode_id).first()
-                if episode:
-                    episode.content_cleaned = content_cleaned
-                    episode.char_count = char_count
+                episode = db.query(Episode).filter(Episode.id == episode_id).first()
+                if episode is None:
+                    return None
+                if revised_at is not None:
+                    episode.revised_at = revised_at
+                episode.last_fetched_at = func.now()
+                old_content = episode.content_cleaned
+                if old_content == content_cleaned:
                     db.flush()
-                    logger.info(
-                        f"Cleaned content and char count updated for Episode ID: {episode_id}")
-                    return episode
-                return None
+                    return ContentUpdate(episode, False, None, None)
+
+                new_paragraphs = paragraphs.hash_paragraphs(content_cleaned)
+                diff = revision = None
+                if old_content:
+                    old_texts = paragraphs.split_paragraphs(old_content)
+                    old_hashes = [h for h, in db.query(EpisodeParagraph.content_hash).filter(
+                        EpisodeParagraph.episode_id == episode_id).order_by(EpisodeParagraph.position)]
+                    if len(old_hashes) != len(old_texts):
+                        # 段落ハッシュ導入前に保存された本文
+                        old_hashes = [paragraphs.paragraph_hash(t) for t in old_texts]
+                    diff = paragraphs.diff_paragraphs(
+                        old_hashes, [p.content_hash for p in new_paragraphs],
+                        old_texts, paragraphs.split_paragraphs(content_cleaned))
+                    revision = (db.query(func.max(EpisodeRevision.revision)).filter(
+                        EpisodeRevision.episode_id == episode_id).scalar() or 0) + 1
+                    db.add(EpisodeRevision(
+                        episode_id=episode_id, revision=revision,
+                        delta=paragraphs.make_reverse_delta(diff, old_texts),
+                        changed_paragraphs=len(diff.changed_positions), changed_chars=diff.changed_chars,
+                        previous_char_count=episode.char_count, revised_at=revised_at))
+                    self._invalidate_revised(db, episode, diff, content_cleaned)
+
+                db.query(EpisodeParagraph).filter(EpisodeParagraph.episode_id == episode_id).delete(
+                    synchronize_session=False)
+                db.execute(EpisodeParagraph.__table__.insert(), [
+                    {"episode_id": episode_id, **p._asdict()} for p in new_paragraphs])
+                episode.content_cleaned = content_cleaned
+                episode.char_count = len(content_cleaned) if char_count is None else char_count
+                db.flush()
+                if diff is None:
+                    logger.info("Cleaned content and char count updated for Episode ID: %s", episode_id)
+                else:
+                    logger.info("Episode ID %s revised (revision %d): %d paragraphs, %.1f%% of text changed",
+                                episode_id, revision, len(diff.changed_positions), diff.changed_ratio * 100)
+                return ContentUpdate(episode, True, revision, diff)
         except Exception as e:
             logger.error(
-                f"Error updating episode content for ID {episode_id}: {e}", exc_info=True)
+                "Error updating episode content for ID %s: %s", episode_id, e, exc_info=True)
+            return None
+
+    @staticmethod
+    def _invalidate_revised(db: Session, episode: Episode, diff: paragraphs.ParagraphDiff, content: str) -> None:
+        # 小さな改稿の積み重ねでも要約が古くなるため、最後に要約してからの変更量を累計する
+        changed_ratio = (episode.unanalyzed_change_ratio or 0.0) + diff.changed_ratio
+        if changed_ratio >= app_config.REVISION_REANALYZE_RATIO:
+            for status in _EPISODE_ANALYSIS_STATUSES:
+                setattr(episode, status, ProcessingStatus.PENDING)
+            db.query(PlotEvent).filter(PlotEvent.episode_id == episode.id).update(
+                {PlotEvent.llm_analysis_status: ProcessingStatus.PENDING}, synchronize_session=False)
+            changed_ratio = 0.0
+        episode.unanalyzed_change_ratio = changed_ratio
+        # 伏線は引用した箇所が残っていれば、周辺の改稿の影響を受けないとみなす
+        stale = [f.id for f in db.query(Foreshadowing).options(
+            load_only(Foreshadowing.id, Foreshadowing.context_snippet)).filter(
+                Foreshadowing.raised_episode_id == episode.id)
+            if not f.context_snippet or f.context_snippet not in content]
+        if stale:
+            db.query(Foreshadowing).filter(Foreshadowing.id.in_(stale)).update(
+                {Foreshadowing.llm_analysis_status: ProcessingStatus.PENDING}, synchronize_session=False)
+
+    def get_latest_revisions(self, novel_id: int) -> Dict[int, int]:
+        """作品の改稿された話について、話ID -> 最新の版番号を返します。"""
+        try:
+            rows = self._read(
+                select(EpisodeRevision.episode_id, func.max(EpisodeRevision.revision))
+                .where(EpisodeRevision.episode_id.in_(select(Episode.id).where(Episode.novel_id == novel_id)))
+                .group_by(EpisodeRevision.episode_id))
+            return {episode_id: revision for episode_id, revision in rows}
+        except Exception as e:
+            logger.error("Error reading revisions for novel ID %s: %s", novel_id, e, exc_info=True)
+            return {}
+
+    def get_episode_version(self, episode_id: int, revision: int) -> Optional[str]:
+        """改稿履歴から、指定した版の本文を復元します。
+
+        Args:
+            episode_id (int): 話ID。
+            revision (int): 版番号。0 が最初に保存した本文、n が n 回目の改稿後の本文。
+
+        Returns:
+            Optional[str]: 本文。話や版が存在しない場合は None。
+        """
+        try:
+            with self.get_db() as db:
+                content = db.query(Episode.content_cleaned).filter(Episode.id == episode_id).scalar()
+                if content is None:
+                    return None
+                latest = db.query(func.max(EpisodeRevision.revision)).filter(
+                    EpisodeRevision.episode_id == episode_id).scalar() or 0
+                if not 0 <= revision <= latest:
+                    return None
+                deltas = db.query(EpisodeRevision.revision, EpisodeRevision.delta).filter(
+                    EpisodeRevision.episode_id == episode_id, EpisodeRevision.revision > revision
+                ).order_by(desc(EpisodeRevision.revision)).all()
+                if [number for number, _ in deltas] != list(range(latest, revision, -1)):
+                    raise ValueError(f"Revision history of episode {episode_id} is incomplete")
+                # 最新の本文から新しい順に逆差分を当てる
+                for _, delta in deltas:
+                    content = paragraphs.apply_reverse_delta(content, delta)
+                return content
+        except Exception as e:
+            logger.error("Error restoring episode ID %s revision %s: %s", episode_id, revision, e, exc_info=True)
             return None
 
     def update_episode_llm_results(self, episode_id: int, updates: Dict[str, Any]) -> Optional[Episode]:
@@ -213,14 +657,303 @@ class ContextDB:
                 if episode:
                     for key, value in update_data.items():
                         setattr(episode, key, value)
+                    if update_data.get("summary_generation_status") == ProcessingStatus.COMPLETED:
+                        # 現在の本文で要約し直したので、改稿の累計をやり直す
+                        episode.unanalyzed_change_ratio = 0.0
                     db.flush()
                     logger.info(
-                        f"LLM results updated for Episode ID: {episode_id}")
+                        "LLM results updated for Episode ID: %s", episode_id)
                     return episode
                 return None
         except Exception as e:
             logger.error(
-                f"Error updating episode LLM results for ID {episode_id}: {e}", exc_info=True)
+                "Error updating episode LLM results for ID %s: %s", episode_id, e, exc_info=True)
+            return None
+
+    def claim_pending_episodes(self, limit: int, novel_id: Optional[int] = None) -> List[Episode]:
+        """要約待ちの話を最大 ``limit`` 件取り出し、``PROCESSING`` にして返します。
+
+        PostgreSQL では ``FOR UPDATE SKIP LOCKED`` で他のワーカーがロック中の行を読み飛ばし、
+        ``UPDATE ... RETURNING`` で取り出しと状態変更を1文で行うため、複数ノードのワーカーが
+        同じ話を重複して処理しません。SQLite では書き込みがDB全体で直列化されるので同じ文で安全です。
+
+        Args:
+            limit (int): 取り出す最大件数。
+            novel_id (Optional[int]): 指定時、この作品の話だけを対象にします。
+
+        Returns:
+            List[Episode]: 取り出した話 (作品ID・話数順)。
+        """
+        candidates = select(Episode.id).where(
+            Episode.summary_generation_status == ProcessingStatus.PENDING,
+            Episode.content_cleaned.isnot(None),
+        )
+        if novel_id is not None:
+            candidates = candidates.where(Episode.novel_id == novel_id)
+        candidates = candidates.order_by(Episode.novel_id, Episode.episode_number).limit(limit) \
+            .with_for_update(skip_locked=True)
+        statement = update(Episode).where(
+            Episode.id.in_(candidates),
+            Episode.summary_generation_status == ProcessingStatus.PENDING,
+        ).values(summary_generation_status=ProcessingStatus.PROCESSING).returning(Episode)
+        try:
+            with self.get_db() as db:
+                episodes = db.scalars(statement.execution_options(synchronize_session=False)).all()
+                return sorted(episodes, key=lambda e: (e.novel_id, e.episode_number or 0))
+        except Exception as e:
+            logger.error("Error claiming pending episodes: %s", e, exc_info=True)
+            return []
+
+    def release_episode_claims(self, episode_ids: List[int]) -> int:
+        """取り出したまま処理しなかった話を ``PENDING`` に戻し、戻した件数を返します。"""
+        if not episode_ids:
+            return 0
+        try:
+            with self.get_db() as db:
+                result = db.execute(update(Episode).where(
+                    Episode.id.in_(episode_ids),
+                    Episode.summary_generation_status == ProcessingStatus.PROCESSING,
+                ).values(summary_generation_status=ProcessingStatus.PENDING)
+                    .execution_options(synchronize_session=False))
+                return result.rowcount
+        except Exception as e:
+            logger.error("Error releasing episode claims: %s", e, exc_info=True)
+            return 0
+
+    def requeue_failed_episodes(self, novel_id: int) -> int:
+        """作品の要約に失敗した話を ``PENDING`` に戻し、戻した件数を返します。"""
+        try:
+            with self.get_db() as db:
+                result = db.execute(update(Episode).where(
+                    Episode.summary_generation_status == ProcessingStatus.FAILED,
+                    Episode.novel_id == novel_id,
+                ).values(summary_generation_status=ProcessingStatus.PENDING)
+                    .execution_options(synchronize_session=False))
+                return result.rowcount
+        except Exception as e:
+            logger.error("Error requeueing failed episodes for Novel ID %s: %s", novel_id, e, exc_info=True)
+            return 0
+
+    # --- EpisodeChunk Operations (ベクトル検索用) ---
+    def replace_episode_chunks(self, episode_id: int, chunks: List[Dict[str, Any]],
+                               embedding_backend: Optional[str] = None) -> List[EpisodeChunk]:
+        """話のチャンクを置き換えます。古いチャンクの ID は索引に残りますが、検索時に読み飛ばされます。
+
+        Args:
+            episode_id (int): 話ID。
+            chunks (List[Dict[str, Any]]): ``text``, ``char_start``, ``char_end`` を持つ辞書のリスト。
+            embedding_backend (Optional[str]): 埋め込みに使うバックエンド名。
+
+        Returns:
+            List[EpisodeChunk]: 作成したチャンク (ID 採番済み)。失敗時は空リスト。
+        """
+        try:
+            with self.get_db() as db:
+                episode = db.query(Episode).options(load_only(Episode.id, Episode.novel_id)).filter(
+                    Episode.id == episode_id).first()
+                if episode is None:
+                    return []
+                db.query(EpisodeChunk).filter(EpisodeChunk.episode_id == episode_id).delete(
+                    synchronize_session=False)
+                created = [EpisodeChunk(novel_id=episode.novel_id, episode_id=episode_id, chunk_index=i,
+                                        embedding_backend=embedding_backend, **chunk)
+                           for i, chunk in enumerate(chunks)]
+                db.add_all(created)
+                db.flush()
+                logger.info("Stored %d chunks for Episode ID: %s", len(created), episode_id)
+                return created
+        except Exception as e:
+            logger.error(
+                "Error replacing chunks for episode ID %s: %s", episode_id, e, exc_info=True)
+        return []
+
+    def sync_episode_chunks(self, episode_id: int, chunks: List[Dict[str, Any]],
+                            embedding_backend: Optional[str] = None) -> List[EpisodeChunk]:
+        """話のチャンクを、本文が同じ既存のチャンクを残したまま置き換えます。
+
+        改稿後に再分割したチャンクのうち、同じ埋め込みバックエンドで保存済みのものと本文が一致するものは
+        ID (索引上のベクトル) を引き継いで位置だけを更新し、一致しないものだけを新規作成します。
+
+        Returns:
+            List[EpisodeChunk]: 新規作成したチャンク (埋め込みが必要なもの)。失敗時は空リスト。
+        """
+        try:
+            with self.get_db() as db:
+                episode = db.query(Episode).options(load_only(Episode.id, Episode.novel_id)).filter(
+                    Episode.id == episode_id).first()
+                if episode is None:
+                    return []
+                reusable: Dict[str, List[EpisodeChunk]] = {}
+                stale = []
+                for chunk in db.query(EpisodeChunk).filter(EpisodeChunk.episode_id == episode_id):
+                    if chunk.embedding_backend == embedding_backend:
+                        reusable.setdefault(chunk.text, []).append(chunk)
+                    else:
+                        stale.append(chunk)
+                created = []
+                for i, fields in enumerate(chunks):
+                    matches = reusable.get(fields["text"])
+                    if matches:
+                        chunk = matches.pop(0)
+                        chunk.chunk_index, chunk.char_start, chunk.char_end = i, fields.get(
+                            "char_start"), fields.get("char_end")
+                    else:
+                        created.append(EpisodeChunk(novel_id=episode.novel_id, episode_id=episode_id, chunk_index=i,
+                                                    embedding_backend=embedding_backend, **fields))
+                stale.extend(chunk for matches in reusable.values() for chunk in matches)
+                for chunk in stale:
+                    db.delete(chunk)
+                db.add_all(created)
+                db.flush()
+                logger.info("Synced chunks for Episode ID %s: %d reused, %d created, %d removed",
+                            episode_id, len(chunks) - len(created), len(created), len(stale))
+                return created
+        except Exception as e:
+            logger.error(
+                "Error syncing chunks for episode ID %s: %s", episode_id, e, exc_info=True)
+        return []
+
+    def get_chunks_by_ids(self, chunk_ids: List[int]) -> List[EpisodeChunk]:
+        """チャンクを ID で取得します。``episode`` には話数とタイトルだけを読み込みます。"""
+        if not chunk_ids:
+            return []
+        try:
+            with self.get_db() as db:
+                return db.query(EpisodeChunk).options(
+                    joinedload(EpisodeChunk.episode).load_only(Episode.episode_number, Episode.episode_title)
+                ).filter(EpisodeChunk.id.in_(chunk_ids)).all()
+        except Exception as e:
+            logger.error("Error getting chunks by IDs: %s", e, exc_info=True)
+            return []
+
+    def get_chunked_episode_ids(self, novel_id: int) -> List[int]:
+        """チャンク作成済みの話IDを返します。"""
+        try:
+            with self.get_db() as db:
+                rows = db.query(EpisodeChunk.episode_id).filter(
+                    EpisodeChunk.novel_id == novel_id).distinct().all()
+                return [row[0] for row in rows]
+        except Exception as e:
+            logger.error(
+                "Error getting chunked episodes for novel ID %s: %s", novel_id, e, exc_info=True)
+            return []
+
+    # --- CrawlTarget Operations (クロールフロンティア) ---
+    def add_crawl_target(self, novel_url: str,
+                         defaults: Optional[Dict[str, Any]] = None) -> Tuple[Optional[CrawlTarget], bool]:
+        """クロール対象を登録します。登録済みの場合は ``defaults`` で更新します。"""
+        try:
+            with self.get_db() as db:
+                params = {"host": urlparse(novel_url).netloc, **(defaults or {})}
+                target, action = self._get_or_create(db, CrawlTarget, defaults=params, novel_url=novel_url)
+                logger.info("CrawlTarget " + action + ": URL=%s, ID=%s", novel_url, target.id)
+                return target, action != "found"
+        except Exception as e:
+            logger.error("Error in add_crawl_target for URL %s: %s", novel_url, e, exc_info=True)
+            return None, False
+
+    def _crawl_score(self, now: datetime) -> Any:
+        """``scrapers.crawl_scheduler.crawl_score`` と同じ巡回スコアの SQL 式。未巡回の対象は NULL になります。"""
+        last = CrawlTarget.last_crawled_at
+        now_value = literal(now, DateTime())
+        if self.engine.dialect.name == "postgresql":
+            elapsed = extract("epoch", cast(now_value, last.type) - last)
+        else:
+            elapsed = (func.julianday(now_value) - func.julianday(last)) * 86400.0
+        priority = func.coalesce(func.nullif(CrawlTarget.priority, 0), 1.0)
+        interval = func.coalesce(func.nullif(CrawlTarget.update_interval_sec, 0), DEFAULT_UPDATE_INTERVAL_SEC)
+        return priority * elapsed / interval
+
+    def _due_crawl_targets(self, columns: Any, now: datetime, limit: Optional[int],
+                           hosts: Optional[List[str]]) -> Any:
+        """巡回時刻を過ぎた有効な対象を、巡回スコアの高い順 (未巡回の対象が先) に選ぶ文を返します。"""
+        query = select(columns).where(
+            CrawlTarget.enabled.is_(True),
+            or_(CrawlTarget.next_crawl_at.is_(None), CrawlTarget.next_crawl_at <= now),
+        )
+        if hosts is not None:
+            query = query.where(CrawlTarget.host.in_(hosts))
+        # スコアは時刻に依存するため索引では並べられないが、並べ替えるのは巡回時刻を過ぎた対象だけ
+        query = query.order_by(nulls_first(desc(self._crawl_score(now))), asc(CrawlTarget.id))
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    def get_due_crawl_targets(self, now: datetime, limit: Optional[int] = None,
+                              hosts: Optional[List[str]] = None) -> List[CrawlTarget]:
+        """巡回時刻を過ぎた (または未巡回の) 有効なクロール対象を、``claim_due_crawl_targets`` と
+        同じ順 (巡回スコアの高い順) に返します。取り出しはしません。"""
+        try:
+            with self.get_db() as db:
+                return db.scalars(self._due_crawl_targets(CrawlTarget, now, limit, hosts)).all()
+        except Exception as e:
+            logger.error("Error getting due crawl targets: %s", e, exc_info=True)
+            return []
+
+    def claim_due_crawl_targets(self, now: datetime, lease_sec: float, limit: Optional[int] = None,
+                                hosts: Optional[List[str]] = None) -> List[CrawlTarget]:
+        """巡回時刻を過ぎた有効なクロール対象を巡回スコアの高い順に最大 ``limit`` 件取り出し、
+        ``next_crawl_at`` を ``now + lease_sec`` に進めて返します。
+
+        スコアは ``priority`` x 前回の巡回からの経過時間 / 更新間隔で、未巡回の対象を最優先にします。
+        予算より巡回時刻を過ぎた対象が多くても、重みが大きく更新の多い作品から取り出されます。
+
+        ``claim_pending_episodes`` と同じく ``FOR UPDATE SKIP LOCKED`` と ``UPDATE ... RETURNING`` の
+        1文で取り出すため、複数ノードのスケジューラが同じ作品を重複して巡回しません。
+        巡回しなかった対象は ``release_crawl_claims`` で戻してください。戻されなかった対象も
+        ``lease_sec`` 後には再び巡回対象になります。
+
+        Args:
+            now (datetime): 現在時刻。
+            lease_sec (float): 取り出した対象を他のスケジューラから隠す秒数。
+            limit (Optional[int]): 取り出す最大件数。
+            hosts (Optional[List[str]]): 指定時、これらのホストの対象だけを取り出します。
+
+        Returns:
+            List[CrawlTarget]: 取り出した対象 (順不同。``next_crawl_at`` は貸出期限)。
+        """
+        candidates = self._due_crawl_targets(CrawlTarget.id, now, limit, hosts).with_for_update(skip_locked=True)
+        statement = update(CrawlTarget).where(
+            CrawlTarget.id.in_(candidates),
+            or_(CrawlTarget.next_crawl_at.is_(None), CrawlTarget.next_crawl_at <= now),
+        ).values(next_crawl_at=now + timedelta(seconds=lease_sec)).returning(CrawlTarget)
+        try:
+            with self.get_db() as db:
+                return db.scalars(statement.execution_options(synchronize_session=False)).all()
+        except Exception as e:
+            logger.error("Error claiming due crawl targets: %s", e, exc_info=True)
+            return []
+
+    def release_crawl_claims(self, target_ids: List[int], leased_until: datetime, next_crawl_at: datetime) -> int:
+        """取り出したまま巡回しなかった対象の ``next_crawl_at`` を戻し、戻した件数を返します。
+
+        貸出期限 ``leased_until`` のままの対象だけを戻すため、他の更新を上書きしません。
+        """
+        if not target_ids:
+            return 0
+        try:
+            with self.get_db() as db:
+                result = db.execute(update(CrawlTarget).where(
+                    CrawlTarget.id.in_(target_ids),
+                    CrawlTarget.next_crawl_at == leased_until,
+                ).values(next_crawl_at=next_crawl_at).execution_options(synchronize_session=False))
+                return result.rowcount
+        except Exception as e:
+            logger.error("Error releasing crawl target claims: %s", e, exc_info=True)
+            return 0
+
+    def update_crawl_target(self, target_id: int, updates: Dict[str, Any]) -> Optional[CrawlTarget]:
+        try:
+            with self.get_db() as db:
+                target = db.query(CrawlTarget).filter(CrawlTarget.id == target_id).first()
+                if target:
+                    for key, value in updates.items():
+                        if hasattr(target, key):
+                            setattr(target, key, value)
+                    db.flush()
+                return target
+        except Exception as e:
+            logger.error("Error updating crawl target ID %s: %s", target_id, e, exc_info=True)
             return None
 
     # --- Character Operations (基本的なもの) ---
@@ -229,16 +962,15 @@ class ContextDB:
             return None, False
         try:
             with self.get_db() as db:
-                character, modified = self._get_or_create(
+                character, action = self._get_or_create(
                     db, Character, defaults=defaults, novel_id=novel_id, name=name)
-                action = "created" if modified and not db.query(Character).filter(
-                    Character.id == character.id).first() else ("updated" if modified else "found")
                 logger.info(
-                    f"Character {action}: Name='{name}', NovelID={novel_id}, ID={character.id if character else 'N/A'}")
-                return character, modified
+                    "Character " + action + ": Name='%s', NovelID=%s, ID=%s", name, novel_id, character.id)
+                return character, action != "found"
         except Exception as e:
             logger.error(
-                f"Error in get_or_create_character for Name '{name}' (Novel ID {novel_id}): {e}", exc_info=True)
+                "Error in get_or_create_character for Name '%s' (Novel ID %s): %s", name, novel_id, e,
+                exc_info=True)
             return None, False
 
     def get_characters_for_novel(self, novel_id: int) -> List[Character]:
@@ -247,7 +979,132 @@ class ContextDB:
                 return db.query(Character).filter(Character.novel_id == novel_id).order_by(Character.name).all()
         except Exception as e:
             logger.error(
-                f"Error getting characters for novel ID {novel_id}: {e}", exc_info=True)
+                "Error getting characters for novel ID %s: %s", novel_id, e, exc_info=True)
+            return []
+
+    # --- 読み取り専用の軽量な行 (core.read_models) ---
+    def _read(self, statement) -> List[Any]:
+        """ORM を介さずに ``select()`` を実行して行を返します。transaction() の中ではそのセッションで読みます。"""
+        tx = getattr(self._local, "transaction", None)
+        if tx is not None:
+            tx.flush()
+            return tx.session.execute(statement).all()
+        self.ensure_schema()
+        with profiling.stage("store"), self.engine.connect() as conn:
+            return conn.execute(statement).all()
+
+    def read_novel(self, novel_id: int) -> Optional[NovelRow]:
+        try:
+            rows = hydrate(NovelRow, self._read(select_for(NovelRow).where(Novel.id == novel_id)))
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error("Error reading novel ID %s: %s", novel_id, e, exc_info=True)
+            return None
+
+    def read_novels(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[NovelRow]:
+        """作品を ID 順に返します。``after_id`` より後の作品から最大 ``limit`` 件 (キーセットページング)。"""
+        statement = select_for(NovelRow)
+        if after_id is not None:
+            statement = statement.where(Novel.id > after_id)
+        statement = statement.order_by(Novel.id)
+        if limit is not None:
+            statement = statement.limit(limit)
+        try:
+            return hydrate(NovelRow, self._read(statement))
+        except Exception as e:
+            logger.error("Error reading novels: %s", e, exc_info=True)
+            return []
+
+    def count_episodes(self, novel_id: int) -> int:
+        try:
+            return self._read(select(func.count()).select_from(Episode).where(Episode.novel_id == novel_id))[0][0]
+        except Exception as e:
+            logger.error("Error counting episodes for novel ID %s: %s", novel_id, e, exc_info=True)
+            return 0
+
+    def read_episodes(self, novel_id: int, start_num: Optional[int] = None,
+                      end_num: Optional[int] = None, limit: Optional[int] = None) -> List[EpisodeRow]:
+        """作品の話を本文なしで話数順に返します。"""
+        try:
+            return hydrate(EpisodeRow, self._read(
+                self._episode_range(select_for(EpisodeRow), novel_id, start_num, end_num, limit)))
+        except Exception as e:
+            logger.error("Error reading episodes for novel ID %s: %s", novel_id, e, exc_info=True)
+            return []
+
+    def read_episode_summaries(self, novel_id: int, start_num: Optional[int] = None,
+                               end_num: Optional[int] = None, limit: Optional[int] = None) -> List[EpisodeSummaryRow]:
+        """作品の話の要約を本文なしで話数順に返します。"""
+        try:
+            return hydrate(EpisodeSummaryRow, self._read(
+                self._episode_range(select_for(EpisodeSummaryRow), novel_id, start_num, end_num, limit)))
+        except Exception as e:
+            logger.error("Error reading episode summaries for novel ID %s: %s", novel_id, e, exc_info=True)
+            return []
+
+    def read_episode_texts(self, novel_id: int, start_num: Optional[int] = None,
+                           end_num: Optional[int] = None) -> List[EpisodeTextRow]:
+        """作品の話を本文・要約付きで話数順に返します。"""
+        try:
+            return hydrate(EpisodeTextRow, self._read(
+                self._episode_range(select_for(EpisodeTextRow), novel_id, start_num, end_num)))
+        except Exception as e:
+            logger.error("Error reading episode texts for novel ID %s: %s", novel_id, e, exc_info=True)
+            return []
+
+    def read_episode_text(self, episode_id: int) -> Optional[EpisodeTextRow]:
+        try:
+            rows = hydrate(EpisodeTextRow, self._read(select_for(EpisodeTextRow).where(Episode.id == episode_id)))
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error("Error reading episode text for ID %s: %s", episode_id, e, exc_info=True)
+            return None
+
+    @staticmethod
+    def _episode_range(statement, novel_id: int, start_num: Optional[int], end_num: Optional[int],
+                       limit: Optional[int] = None):
+        statement = statement.where(Episode.novel_id == novel_id)
+        if start_num is not None:
+            statement = statement.where(Episode.episode_number >= start_num)
+        if end_num is not None:
+            statement = statement.where(Episode.episode_number <= end_num)
+        statement = statement.order_by(asc(Episode.episode_number))
+        return statement.limit(limit) if limit is not None else statement
+
+    def read_characters(self, novel_id: int) -> List[CharacterRow]:
+        try:
+            return hydrate(CharacterRow, self._read(
+                select_for(CharacterRow).where(Character.novel_id == novel_id).order_by(Character.name)))
+        except Exception as e:
+            logger.error("Error reading characters for novel ID %s: %s", novel_id, e, exc_info=True)
+            return []
+
+    def read_character(self, character_id: int) -> Optional[CharacterRow]:
+        try:
+            rows = hydrate(CharacterRow, self._read(select_for(CharacterRow).where(Character.id == character_id)))
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error("Error reading character ID %s: %s", character_id, e, exc_info=True)
+            return None
+
+    def read_world_settings(self, novel_id: int) -> List[WorldSettingRow]:
+        try:
+            return hydrate(WorldSettingRow, self._read(
+                select_for(WorldSettingRow).where(WorldSetting.novel_id == novel_id).order_by(WorldSetting.id)))
+        except Exception as e:
+            logger.error("Error reading world settings for novel ID %s: %s", novel_id, e, exc_info=True)
+            return []
+
+    def read_chunks(self, chunk_ids: List[int]) -> List[ChunkRow]:
+        """チャンクを話数・タイトル付きで返します (順序は不定)。"""
+        if not chunk_ids:
+            return []
+        try:
+            return hydrate(ChunkRow, self._read(
+                select_for(ChunkRow).join_from(EpisodeChunk, Episode, EpisodeChunk.episode_id == Episode.id)
+                .where(EpisodeChunk.id.in_(chunk_ids))))
+        except Exception as e:
+            logger.error("Error reading chunks by IDs: %s", e, exc_info=True)
             return []
 
     # --- Location, Item, PlotEvent, WorldSetting, Foreshadowing のメソッド ---
@@ -0,0 +1,360 @@
+"""作品の本文を1つのファイルにまとめ、メモリマップで段落単位に読み出すコーパスパック。
+
+「第 n 話の k 段落目」を大量にランダムアクセスする読み手やバッチ解析のために、
+``content_cleaned`` を SQLite から毎回読み出して分割する代わりに、作品ごとに次のファイルへ追記します。
+
+- ``text.utf8``: 話の本文 (UTF-8)。話ごとに本文をそのまま連結します
+- ``paragraphs.i64``: 段落ごとの (開始バイト, 終了バイト)。段落は ``core.paragraphs`` と同じく行単位で、
+  ``EpisodeParagraph.position`` と同じ番号で引けます
+- ``episodes.i64``: 話ごとの (話ID, 話数, 版番号, 最初の段落, 段落数)
+- ``meta.json``: 各ファイルの件数。データの追記後に更新するため、途中で落ちても
+  ``meta.json`` の件数までは常に整合しています
+
+改稿された話は新しいレコードとして追記し、同じ話数の最後のレコードを有効とみなします。
+古い本文は ``compact()`` で取り除きます。読み出しは ``mmap`` 上の ``memoryview`` を返すため、
+デコードするまでコピーは発生しません。
+
+追記と ``compact()`` はパックの隣のロックファイル (``novel_<id>.lock``) の ``flock`` を取り、
+``meta.json`` を読み直してから行うため、同じパックを複数のプロセス・インスタンスから書き込めます。
+``compact()`` はディレクトリごと置き換え、``meta.json`` の ``pack_id`` を変えます。他のハンドルは
+``pack_id`` の変化を見て、レコードを読み込み直します。
+"""
+import json
+import mmap
+import os
+import shutil
+import threading
+import uuid
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from core.file_lock import FileLock
+from core.logger_setup import setup_logger
+from core.paragraphs import PARAGRAPH_SEPARATOR, split_paragraphs
+
+logger = setup_logger()
+
+FORMAT_VERSION = 1
+DEFAULT_PACK_DIR = "data/corpus"
+# 有効でない (改稿前の) 本文がこの割合を超えたら、同期時に詰め直す
+DEFAULT_COMPACT_RATIO = 0.5
+_TEXT_FILE = "text.utf8"
+_PARAGRAPHS_FILE = "paragraphs.i64"
+_EPISODES_FILE = "episodes.i64"
+_EPISODE_FIELDS = 5
+# 同期時に DB から本文をまとめて読み出す話数
+SYNC_READ_WINDOW = 200
+
+
+class PackedEpisode(NamedTuple):
+    episode_id: int
+    episode_number: int
+    revision: int
+    first_paragraph: int
+    paragraph_count: int
+
+
+def pack_path(root: str, novel_id: int) -> str:
+    """作品のコーパスパックのディレクトリを返します。"""
+    return os.path.join(root, f"novel_{novel_id}")
+
+
+def _lock_path(directory: str) -> str:
+    return f"{os.path.normpath(directory)}.lock"
+
+
+class CorpusPack:
+    """1作品分のコーパスパック。
+
+    Args:
+        directory (str): パックのファイルを置くディレクトリ (なければ作成します)。
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.pack_id: Optional[str] = None
+        self.text_bytes = 0
+        self.paragraph_count = 0
+        self.episode_count = 0
+        self._episodes: Dict[int, PackedEpisode] = {}
+        self._mmap: Optional[mmap.mmap] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._lock = threading.RLock()
+        # compact() はディレクトリを置き換えるため、ロックはディレクトリの外のファイルで取る
+        self._file_lock = FileLock(_lock_path(directory))
+        with self._file_lock:
+            self._refresh()
+            self._truncate_partial_writes()
+
+    def __enter__(self) -> "CorpusPack":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _refresh(self) -> None:
+        """他のハンドルの追記・compact を取り込みます (ファイルロックを保持した状態で呼ぶこと)。"""
+        meta_path = self._path("meta.json")
+        if not os.path.exists(meta_path):
+            # 新しいパック (または rebuild で削除されたパック)
+            os.makedirs(self.directory, exist_ok=True)
+            self._reset(uuid.uuid4().hex)
+            self._write_meta()
+            return
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported corpus pack format at {self.directory}: {meta.get('format')}")
+        if meta.get("pack_id") != self.pack_id:
+            self._reset(meta.get("pack_id"))
+        if meta["episodes"] > self.episode_count:
+            # 前回読んだ後に追記されたレコードだけを読む
+            records = np.fromfile(self._path(_EPISODES_FILE), dtype=np.int64,
+                                  count=(meta["episodes"] - self.episode_count) * _EPISODE_FIELDS,
+                                  offset=self.episode_count * _EPISODE_FIELDS * 8).reshape(-1, _EPISODE_FIELDS)
+            for record in records.tolist():
+                episode = PackedEpisode(*record)
+                self._episodes[episode.episode_number] = episode
+        self.text_bytes = meta["text_bytes"]
+        self.paragraph_count = meta["paragraphs"]
+        self.episode_count = meta["episodes"]
+
+    def _reset(self, pack_id: Optional[str]) -> None:
+        self.pack_id = pack_id
+        self.text_bytes = self.paragraph_count = self.episode_count = 0
+        self._episodes = {}
+        self.close()
+
+    def _truncate_partial_writes(self) -> None:
+        # meta.json の件数より後ろは書き込み途中で中断したデータなので切り詰める (ファイルロックを保持して呼ぶこと)
+        for filename, expected in ((_TEXT_FILE, self.text_bytes),
+                                   (_PARAGRAPHS_FILE, self.paragraph_count * 2 * 8),
+                                   (_EPISODES_FILE, self.episode_count * _EPISODE_FIELDS * 8)):
+            path = self._path(filename)
+            if os.path.exists(path) and os.path.getsize(path) > expected:
+                os.truncate(path, expected)
+
+    def _write_meta(self) -> None:
+        meta = {"format": FORMAT_VERSION, "pack_id": self.pack_id, "text_bytes": self.text_bytes,
+                "paragraphs": self.paragraph_count, "episodes": self.episode_count}
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path("meta.json"))
+
+    def append_episode(self, episode_id: int, episode_number: int, text: str, revision: int = 0) -> PackedEpisode:
+        """話の本文を追記します。同じ話数が既にあれば、以後は追記した本文を返します。
+
+        Args:
+            episode_id (int): 話ID。
+            episode_number (int): 話数。読み出しのキーになります。
+            text (str): 本文。
+            revision (int): 本文の版番号 (``EpisodeRevision.revision``、初回は 0)。
+
+        Returns:
+            PackedEpisode: 追記したレコード。
+        """
+        return self.append_episodes([(episode_id, episode_number, text, revision)])[0]
+
+    def append_episodes(self, episodes: Iterable[Tuple[int, int, str, int]]) -> List[PackedEpisode]:
+        """(話ID, 話数, 本文, 版番号) をまとめて追記し、``meta.json`` を1回だけ更新します。"""
+        separator = PARAGRAPH_SEPARATOR.encode("utf-8")
+        texts, offsets, records = [], [], []
+        episodes = list(episodes)  # DB からの読み出しなどはロックの外で済ませる
+        with self._lock, self._file_lock:
+            # 他のハンドルが追記・compact した後ろに書くよう、meta.json を読み直してから位置を決める
+            self._refresh()
+            self._truncate_partial_writes()
+            text_bytes, paragraph_count = self.text_bytes, self.paragraph_count
+            for episode_id, episode_number, text, revision in episodes:
+                encoded = [paragraph.encode("utf-8") for paragraph in split_paragraphs(text)]
+                lengths = np.fromiter((len(p) for p in encoded), dtype=np.int64, count=len(encoded))
+                starts = text_bytes + np.concatenate(([0], np.cumsum(lengths[:-1] + len(separator))))
+                offsets.append(np.stack([starts, starts + lengths], axis=1).astype(np.int64))
+                texts.append(separator.join(encoded))
+                records.append(PackedEpisode(episode_id, episode_number, revision, paragraph_count, len(encoded)))
+                text_bytes = int(offsets[-1][-1, 1])
+                paragraph_count += len(encoded)
+            if not records:
+                return []
+            with open(self._path(_TEXT_FILE), "ab") as f:
+                f.write(b"".join(texts))
+            with open(self._path(_PARAGRAPHS_FILE), "ab") as f:
+                f.write(np.concatenate(offsets).tobytes())
+            with open(self._path(_EPISODES_FILE), "ab") as f:
+                f.write(np.asarray(records, dtype=np.int64).tobytes())
+            self.text_bytes, self.paragraph_count = text_bytes, paragraph_count
+            self.episode_count += len(records)
+            self._episodes.update((record.episode_number, record) for record in records)
+            self._write_meta()
+        return records
+
+    def _maps(self):
+        # 追記でファイルが伸びていればマップし直す (古いマップは返却済みの memoryview が解放されるまで残る)。
+        # マップし直すときは、ファイルとレコードが食い違わないよう他のハンドルの追記・compact も取り込む
+        if self._mmap is None or len(self._mmap) != self.text_bytes \
+                or self._offsets is None or len(self._offsets) != self.paragraph_count:
+            with self._file_lock:
+                self._refresh()
+                self._map_files()
+        return self._mmap, self._offsets
+
+    def _map_files(self) -> None:
+        if self._mmap is None or len(self._mmap) != self.text_bytes:
+            self._mmap = None
+            if self.text_bytes:
+                with open(self._path(_TEXT_FILE), "rb") as f:
+                    self._mmap = mmap.mmap(f.fileno(), self.text_bytes, access=mmap.ACCESS_READ)
+        if self._offsets is None or len(self._offsets) != self.paragraph_count:
+            self._offsets = np.memmap(self._path(_PARAGRAPHS_FILE), dtype=np.int64, mode="r",
+                                      shape=(self.paragraph_count, 2)) if self.paragraph_count else None
+
+    def episode(self, episode_number: int) -> Optional[PackedEpisode]:
+        return self._episodes.get(episode_number)
+
+    def episode_numbers(self) -> List[int]:
+        return sorted(self._episodes)
+
+    def paragraph(self, episode_number: int, position: int) -> memoryview:
+        """第 ``episode_number`` 話の ``position`` 段落目 (0 始まり) の UTF-8 バイト列を返します。
+
+        Raises:
+            KeyError: 話がパックにない場合。
+            IndexError: 段落の位置が範囲外の場合。
+        """
+        with self._lock:
+            # マップし直すとレコードも更新されるため、話はマップの後に引く
+            text, offsets = self._maps()
+            episode = self._require(episode_number)
+            if not 0 <= position < episode.paragraph_count:
+                raise IndexError(
+                    f"Episode {episode_number} has {episode.paragraph_count} paragraphs, not {position + 1}")
+            start, end = offsets[episode.first_paragraph + position]
+        return memoryview(text)[start:end] if text is not None else memoryview(b"")
+
+    def paragraphs(self, episode_number: int) -> List[memoryview]:
+        """話の全段落を UTF-8 バイト列のリストで返します。"""
+        with self._lock:
+            text, offsets = self._maps()
+            episode = self._require(episode_number)
+            if text is None:
+                return [memoryview(b"")] * episode.paragraph_count
+            view = memoryview(text)
+            rows = offsets[episode.first_paragraph:episode.first_paragraph + episode.paragraph_count].tolist()
+        return [view[start:end] for start, end in rows]
+
+    def episode_bytes(self, episode_number: int) -> memoryview:
+        """話の本文全体の UTF-8 バイト列を返します。"""
+        with self._lock:
+            text, offsets = self._maps()
+            episode = self._require(episode_number)
+            if text is None:
+                return memoryview(b"")
+            start = offsets[episode.first_paragraph, 0]
+            end = offsets[episode.first_paragraph + episode.paragraph_count - 1, 1]
+        return memoryview(text)[start:end]
+
+    def paragraph_text(self, episode_number: int, position: int) -> str:
+        return str(self.paragraph(episode_number, position), "utf-8")
+
+    def episode_text(self, episode_number: int) -> str:
+        return str(self.episode_bytes(episode_number), "utf-8")
+
+    def _require(self, episode_number: int) -> PackedEpisode:
+        episode = self._episodes.get(episode_number)
+        if episode is None:
+            raise KeyError(f"Episode {episode_number} is not in the corpus pack at {self.directory}")
+        return episode
+
+    @property
+    def garbage_ratio(self) -> float:
+        """改稿などで参照されなくなった本文の割合。"""
+        if not self.text_bytes:
+            return 0.0
+        with self._lock:
+            _, offsets = self._maps()
+            live = sum(int(offsets[e.first_paragraph + e.paragraph_count - 1, 1] - offsets[e.first_paragraph, 0])
+                       for e in self._episodes.values())
+            return 1.0 - live / self.text_bytes
+
+    def compact(self) -> None:
+        """有効なレコードだけを話数順に書き直します。
+
+        他のハンドルの追記と排他し、書き直し中の追記が失われないようにします。
+        """
+        with self._lock, self._file_lock:
+            self._refresh()
+            tmp_dir = f"{os.path.normpath(self.directory)}.compact"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            with CorpusPack(tmp_dir) as compacted:
+                compacted.append_episodes(
+                    (self._episodes[n].episode_id, n, self.episode_text(n), self._episodes[n].revision)
+                    for n in self.episode_numbers())
+            self.close()
+            old_dir = f"{os.path.normpath(self.directory)}.old"
+            os.replace(self.directory, old_dir)
+            os.replace(tmp_dir, self.directory)
+            shutil.rmtree(old_dir, ignore_errors=True)
+            try:
+                os.remove(_lock_path(tmp_dir))
+            except OSError:
+                pass
+            # 書き直したパックは新しい pack_id を持つため、全レコードを読み込み直す
+            self._refresh()
+            logger.info("Compacted corpus pack at %s: %d episodes, %d bytes",
+                        self.directory, len(self._episodes), self.text_bytes)
+
+    def close(self) -> None:
+        # 返却した memoryview が残っていても閉じられるよう、明示的な close はせず参照だけを外す
+        self._mmap = None
+        self._offsets = None
+
+
+def sync_novel_pack(db, novel_id: int, root: str = DEFAULT_PACK_DIR,
+                    compact_ratio: float = DEFAULT_COMPACT_RATIO, rebuild: bool = False) -> int:
+    """作品のコーパスパックに、未追記の話と改稿された話を追記します。
+
+    本文を保存済みの話のうち、パックにない話と、パックの版番号より新しい改稿がある話だけを
+    DB から読み出します。
+
+    Args:
+        db (ContextDB): 読み出し元のDB。
+        novel_id (int): 作品ID。
+        root (str): パックを置くディレクトリ。作品ごとに ``novel_<id>/`` を作成します。
+        compact_ratio (float): 追記後、古い本文の割合がこの値を超えたら ``compact()`` します。
+        rebuild (bool): True の場合、既存のパックを削除して作り直します。
+
+    Returns:
+        int: 追記した話数。
+    """
+    directory = pack_path(root, novel_id)
+    if rebuild:
+        with FileLock(_lock_path(directory)):
+            shutil.rmtree(directory, ignore_errors=True)
+    revisions = db.get_latest_revisions(novel_id)
+    appended = 0
+    with CorpusPack(directory) as pack:
+        stale = {}
+        for row in db.read_episodes(novel_id):
+            if not row.char_count or row.episode_number is None:
+                continue
+            revision = revisions.get(row.id, 0)
+            packed = pack.episode(row.episode_number)
+            if packed is None or packed.episode_id != row.id or packed.revision != revision:
+                stale[row.id] = (row.episode_number, revision)
+        # 対象の話を話数の範囲ごとにまとめて読み、範囲ごとに追記する
+        numbers = sorted(number for number, _ in stale.values())
+        for i in range(0, len(numbers), SYNC_READ_WINDOW):
+            window = numbers[i:i + SYNC_READ_WINDOW]
+            appended += len(pack.append_episodes(
+                (row.id, row.episode_number, row.content_cleaned, stale[row.id][1])
+                for row in db.read_episode_texts(novel_id, start_num=window[0], end_num=window[-1])
+                if row.id in stale and row.content_cleaned))
+        if appended and pack.garbage_ratio > compact_ratio:
+            pack.compact()
+    logger.info("Corpus pack for NovelID=%s: %d episodes appended", novel_id, appended)
+    return appended
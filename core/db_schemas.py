@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, ForeignKey, DateTime, Enum as SQLAlchemyEnum, Table, Boolean, Float
+from sqlalchemy import create_engine, Column, Integer, String, Text, ForeignKey, DateTime, Enum as SQLAlchemyEnum, Table, Boolean, Float, Index
 from sqlalchemy.orm import relationship, declarative_base, sessionmaker
 from sqlalchemy.sql import func
 import enum
@@ -6,6 +6,13 @@ from datetime import datetime
 
 Base = declarative_base()
 
+# スキーマ定義を変更したら上げ、core.migrations に同じ番号のマイグレーションを追加する。
+# ContextDB はこの値とDB内の記録が一致すればマイグレーションの確認を省略する
+SCHEMA_VERSION = 7
+
+# 投稿日時の履歴が足りないクロール対象の更新間隔 (秒)。巡回スコアの計算に使う
+DEFAULT_UPDATE_INTERVAL_SEC = 24 * 3600.0
+
 # Enum定義
 
 
@@ -79,9 +86,15 @@ class Novel(Base):
 
 class Episode(Base):
     __tablename__ = "episodes"
+    __table_args__ = (
+        # 話数範囲の取得 (novel_id 単独の検索もこの索引の先頭列で賄う)
+        Index("ix_episodes_novel_number", "novel_id", "episode_number"),
+        # 要約待ちの取り出し。作品を絞らない取り出しにも使えるよう状態を先頭にする
+        Index("ix_episodes_summary_queue", "summary_generation_status", "novel_id", "episode_number"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     novel_id = Column(Integer, ForeignKey(
-        "novels.id", ondelete="CASCADE"), nullable=False, index=True)
+        "novels.id", ondelete="CASCADE"), nullable=False)
     episode_title = Column(String)
     episode_url = Column(String, unique=True, index=True)
     episode_number = Column(Integer, index=True)
@@ -90,6 +103,9 @@ class Episode(Base):
     char_count = Column(Integer, index=True)
     publication_date = Column(DateTime(timezone=True), index=True)
     last_fetched_at = Column(DateTime(timezone=True), default=func.now())
+    revised_at = Column(DateTime(timezone=True))  # 保存している本文の改稿日時 (目次の「改」)
+    # 最後に要約してから改稿で変わった本文の割合の累計。REVISION_REANALYZE_RATIO に達したら再要約する
+    unanalyzed_change_ratio = Column(Float, default=0.0)
     summary_short = Column(Text)
     summary_long = Column(Text)
     key_events_extraction_status = Column(SQLAlchemyEnum(
@@ -101,13 +117,25 @@ class Episode(Base):
     novel = relationship("Novel", back_populates="episodes")
     plot_events = relationship(
         "PlotEvent", back_populates="episode", cascade="all, delete-orphan")
+    chunks = relationship(
+        "EpisodeChunk", back_populates="episode", cascade="all, delete-orphan",
+        order_by="EpisodeChunk.chunk_index")
+    paragraphs = relationship(
+        "EpisodeParagraph", back_populates="episode", cascade="all, delete-orphan",
+        order_by="EpisodeParagraph.position")
+    revisions = relationship(
+        "EpisodeRevision", back_populates="episode", cascade="all, delete-orphan",
+        order_by="EpisodeRevision.revision")
 
 
 class Character(Base):
     __tablename__ = "characters"
+    __table_args__ = (
+        Index("uq_characters_novel_name", "novel_id", "name", unique=True),
+    )
     id = Column(Integer, primary_key=True, index=True)
     novel_id = Column(Integer, ForeignKey(
-        "novels.id", ondelete="CASCADE"), nullable=False, index=True)
+        "novels.id", ondelete="CASCADE"), nullable=False)
     name = Column(String, nullable=False, index=True)
     reading = Column(String)
     aliases = Column(Text)
@@ -127,9 +155,12 @@ class Character(Base):
 
 class Location(Base):
     __tablename__ = "locations"
+    __table_args__ = (
+        Index("uq_locations_novel_name", "novel_id", "name", unique=True),
+    )
     id = Column(Integer, primary_key=True, index=True)
     novel_id = Column(Integer, ForeignKey(
-        "novels.id", ondelete="CASCADE"), nullable=False, index=True)
+        "novels.id", ondelete="CASCADE"), nullable=False)
     name = Column(String, nullable=False, index=True)
     description_by_author = Column(Text)
     description_by_llm = Column(Text)
@@ -145,9 +176,12 @@ class Location(Base):
 
 class Item(Base):
     __tablename__ = "items"
+    __table_args__ = (
+        Index("uq_items_novel_name", "novel_id", "name", unique=True),
+    )
     id = Column(Integer, primary_key=True, index=True)
     novel_id = Column(Integer, ForeignKey(
-        "novels.id", ondelete="CASCADE"), nullable=False, index=True)
+        "novels.id", ondelete="CASCADE"), nullable=False)
     name = Column(String, nullable=False, index=True)
     description_by_author = Column(Text)
     description_by_llm = Column(Text)
@@ -212,9 +246,12 @@ class WorldSetting(Base):
 
 class Foreshadowing(Base):
     __tablename__ = "foreshadowings"
+    __table_args__ = (
+        Index("ix_foreshadowings_novel_status", "novel_id", "status"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     novel_id = Column(Integer, ForeignKey(
-        "novels.id", ondelete="CASCADE"), nullable=False, index=True)
+        "novels.id", ondelete="CASCADE"), nullable=False)
     raised_episode_id = Column(Integer, ForeignKey(
         "episodes.id", ondelete="CASCADE"), nullable=False, index=True)
     description_by_llm = Column(Text, nullable=False, default="")
@@ -233,3 +270,91 @@ class Foreshadowing(Base):
     raised_episode = relationship("Episode", foreign_keys=[raised_episode_id])
     resolved_episode = relationship(
         "Episode", foreign_keys=[resolved_episode_id])
+
+
+class EpisodeChunk(Base):
+    """ベクトル検索用に本文を分割したチャンク。ベクトル本体は core.vector_index のファイルに保存する。"""
+    __tablename__ = "episode_chunks"
+    __table_args__ = (
+        Index("ix_episode_chunks_novel_episode", "novel_id", "episode_id"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    novel_id = Column(Integer, ForeignKey(
+        "novels.id", ondelete="CASCADE"), nullable=False)
+    episode_id = Column(Integer, ForeignKey(
+        "episodes.id", ondelete="CASCADE"), nullable=False, index=True)
+    chunk_index = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+    char_start = Column(Integer)
+    char_end = Column(Integer)
+    embedding_backend = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    episode = relationship("Episode", back_populates="chunks")
+
+
+class EpisodeParagraph(Base):
+    """本文の段落 (行) ごとのハッシュ。本文自体は Episode.content_cleaned にあり、ここには位置だけを持つ。"""
+    __tablename__ = "episode_paragraphs"
+    __table_args__ = (
+        Index("uq_episode_paragraphs_episode_position", "episode_id", "position", unique=True),
+    )
+    id = Column(Integer, primary_key=True)
+    episode_id = Column(Integer, ForeignKey(
+        "episodes.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)
+    content_hash = Column(String(32), nullable=False)
+    char_start = Column(Integer, nullable=False)
+    char_length = Column(Integer, nullable=False)
+    episode = relationship("Episode", back_populates="paragraphs")
+
+
+class EpisodeRevision(Base):
+    """本文の改稿履歴。delta は改稿後の本文から改稿前の本文を復元する段落単位の差分 (core.paragraphs)。"""
+    __tablename__ = "episode_revisions"
+    __table_args__ = (
+        Index("uq_episode_revisions_episode_revision", "episode_id", "revision", unique=True),
+    )
+    id = Column(Integer, primary_key=True)
+    episode_id = Column(Integer, ForeignKey(
+        "episodes.id", ondelete="CASCADE"), nullable=False)
+    revision = Column(Integer, nullable=False)  # 1 から始まる改稿の通し番号
+    delta = Column(Text, nullable=False)
+    changed_paragraphs = Column(Integer, nullable=False, default=0)
+    changed_chars = Column(Integer, nullable=False, default=0)
+    previous_char_count = Column(Integer)
+    revised_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    episode = relationship("Episode", back_populates="revisions")
+
+
+class CrawlTarget(Base):
+    """クロール対象の作品 (クロールフロンティア)。更新間隔の推定値から次回の巡回時刻を決める。"""
+    __tablename__ = "crawl_targets"
+    __table_args__ = (
+        # ホストを絞った巡回対象の取り出し (host 単独の検索もこの索引の先頭列で賄う)
+        Index("ix_crawl_targets_host_next", "host", "next_crawl_at"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    novel_url = Column(String, unique=True, nullable=False, index=True)
+    novel_id = Column(Integer, ForeignKey(
+        "novels.id", ondelete="SET NULL"), index=True)
+    platform = Column(String)
+    host = Column(String, nullable=False)
+    priority = Column(Float, nullable=False, default=1.0)  # 手動の重み (大きいほど優先)
+    update_interval_sec = Column(Float)  # 投稿日時の履歴から推定した更新間隔
+    last_published_at = Column(DateTime(timezone=True))
+    last_crawled_at = Column(DateTime(timezone=True))
+    last_changed_at = Column(DateTime(timezone=True))
+    next_crawl_at = Column(DateTime(timezone=True), index=True)
+    consecutive_failures = Column(Integer, nullable=False, default=0)
+    enabled = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    novel = relationship("Novel")
+
+
+class SchemaVersion(Base):
+    """DBに適用済みのスキーマバージョンを記録するテーブル (常に1行)。"""
+    __tablename__ = "schema_version"
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,132 @@
+"""テキスト埋め込み (embedding) のバックエンド。
+
+すべてのバックエンドは L2 正規化済みの float32 配列 (件数 x 次元) を返すため、
+内積がそのままコサイン類似度になります。``hashing`` は外部APIを使わない決定的な
+バックエンドで、テストやオフライン環境で使います。
+"""
+import hashlib
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from core.logger_setup import setup_logger
+
+logger = setup_logger()
+
+DEFAULT_HASHING_DIM = 256
+DEFAULT_NGRAM_SIZES = (1, 2, 3)
+MAX_CACHED_NGRAMS = 1000000
+GEMINI_EMBEDDING_MODEL = "models/text-embedding-004"
+GEMINI_EMBEDDING_DIM = 768
+GEMINI_BATCH_SIZE = 100
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """各行を L2 正規化します (ゼロベクトルはそのまま)。"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+class EmbeddingBackend:
+    """埋め込みバックエンドの基底クラス。"""
+    name = "base"
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def embed(self, texts: Sequence[str], is_query: bool = False) -> np.ndarray:
+        """テキストを埋め込みます。
+
+        Args:
+            texts (Sequence[str]): 埋め込むテキスト。
+            is_query (bool): 検索クエリの場合は True (文書と別の埋め込み方をするバックエンド向け)。
+
+        Returns:
+            np.ndarray: 形状 (len(texts), dim) の L2 正規化済み float32 配列。
+        """
+        raise NotImplementedError("embed method must be implemented by the backend.")
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """文字 n-gram を特徴ハッシュで固定次元に写す、決定的なオフライン用バックエンド。
+
+    日本語は単語区切りがないため、形態素解析の代わりに文字 n-gram を使います。
+    ハッシュには ``hash()`` ではなく blake2b を使い、プロセスをまたいで同じベクトルになります。
+    """
+    name = "hashing"
+
+    def __init__(self, dim: int = DEFAULT_HASHING_DIM, ngram_sizes: Sequence[int] = DEFAULT_NGRAM_SIZES):
+        super().__init__(dim)
+        self.ngram_sizes = tuple(ngram_sizes)
+        self._cache: Dict[str, Tuple[int, float]] = {}
+
+    def _bucket(self, gram: str) -> Tuple[int, float]:
+        # 下位ビットをバケット、最上位ビットを符号に使う (符号付きハッシュで衝突の偏りを打ち消す)
+        bucket = self._cache.get(gram)
+        if bucket is None:
+            digest = int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "little")
+            bucket = (digest % self.dim, 1.0 if digest >> 63 else -1.0)
+            if len(self._cache) < MAX_CACHED_NGRAMS:
+                self._cache[gram] = bucket
+        return bucket
+
+    def embed(self, texts: Sequence[str], is_query: bool = False) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            text = "".join(text.split())
+            buckets = [self._bucket(text[i:i + n]) for n in self.ngram_sizes for i in range(len(text) - n + 1)]
+            if buckets:
+                indices, signs = zip(*buckets)
+                vectors[row] = np.bincount(indices, weights=signs, minlength=self.dim)
+        return normalize_rows(vectors)
+
+
+class GeminiEmbeddingBackend(EmbeddingBackend):
+    """Gemini の埋め込みAPIを使うバックエンド。SDK は初回の埋め込み時に読み込みます。"""
+    name = "gemini"
+
+    def __init__(self, api_key=None, model: str = GEMINI_EMBEDDING_MODEL, dim: int = GEMINI_EMBEDDING_DIM):
+        super().__init__(dim)
+        self.api_key = api_key
+        self.model = model
+        self._genai = None
+
+    def _client(self):
+        if self._genai is None:
+            from core.config import config
+            from core.llm_client import _load_genai
+
+            genai = _load_genai()
+            genai.configure(api_key=self.api_key or config.GEMINI_API_KEY)
+            self._genai = genai
+        return self._genai
+
+    def embed(self, texts: Sequence[str], is_query: bool = False) -> np.ndarray:
+        genai = self._client()
+        task_type = "retrieval_query" if is_query else "retrieval_document"
+        rows: List[List[float]] = []
+        for start in range(0, len(texts), GEMINI_BATCH_SIZE):
+            batch = list(texts[start:start + GEMINI_BATCH_SIZE])
+            result = genai.embed_content(model=self.model, content=batch, task_type=task_type)
+            rows.extend(result["embedding"])
+        if not rows:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return normalize_rows(np.asarray(rows, dtype=np.float32))
+
+
+BACKENDS: Dict[str, Callable[..., EmbeddingBackend]] = {
+    HashingEmbeddingBackend.name: HashingEmbeddingBackend,
+    GeminiEmbeddingBackend.name: GeminiEmbeddingBackend,
+}
+
+
+def create_backend(name: str, **kwargs) -> EmbeddingBackend:
+    """名前から埋め込みバックエンドを作成します。
+
+    Raises:
+        ValueError: 未知のバックエンド名の場合。
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {name}. Choose from {', '.join(BACKENDS)}.")
+    return BACKENDS[name](**kwargs)
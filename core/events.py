@@ -0,0 +1,118 @@
+"""パイプラインのイベントをまとめて購読者へ配送するイベントバス。
+
+``publish`` はイベントをバッファに積むだけで戻り、イベント種別ごとに ``batch_size`` 件
+たまるか ``flush`` (または定期フラッシュ) が呼ばれた時点で、購読者へバッチとして渡します。
+購読者 (通常は ``PluginManager.deliver``) は受け取ったバッチを非同期に処理する前提です。
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from core.logger_setup import setup_logger
+
+logger = setup_logger()
+
+EPISODE_STORED = "episode_stored"
+NOVEL_SYNCED = "novel_synced"
+SUMMARY_READY = "summary_ready"
+EVENT_NAMES = (EPISODE_STORED, NOVEL_SYNCED, SUMMARY_READY)
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_FLUSH_INTERVAL_SEC = 2.0
+
+
+class Event(NamedTuple):
+    """バスを流れる1件のイベント。"""
+    name: str
+    payload: Dict[str, Any]
+    created_at: float
+
+
+EventHandler = Callable[[str, Tuple[Event, ...]], Any]
+
+
+class EventBus:
+    """イベント種別ごとにバッチ化して購読者へ配送するバス。"""
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval_sec: float = DEFAULT_FLUSH_INTERVAL_SEC):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_sec = flush_interval_sec
+        self._subscribers: Dict[str, List[EventHandler]] = {}
+        self._pending: Dict[str, List[Event]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    def subscribe(self, event_name: str, handler: EventHandler) -> None:
+        """イベント種別にハンドラを登録します。ハンドラは ``(event_name, events)`` で呼ばれます。"""
+        with self._lock:
+            self._subscribers.setdefault(event_name, []).append(handler)
+
+    def has_subscribers(self, event_name: str) -> bool:
+        """イベント種別に購読者がいるかを返します。"""
+        return bool(self._subscribers.get(event_name))
+
+    def publish(self, event_name: str, **payload: Any) -> None:
+        """イベントを発行します。購読者がいなければ何もしません。
+
+        Args:
+            event_name (str): イベント種別 (``episode_stored`` 等)。
+            **payload: イベントの内容。プロセスプールで配送する場合に備え、
+                ID などの pickle 可能な値にしてください。
+        """
+        if not self.has_subscribers(event_name):
+            return
+        batch = None
+        with self._lock:
+            pending = self._pending.setdefault(event_name, [])
+            pending.append(Event(event_name, payload, time.time()))
+            if len(pending) >= self.batch_size:
+                batch = tuple(pending)
+                pending.clear()
+        if batch:
+            self._dispatch(event_name, batch)
+
+    def flush(self) -> None:
+        """バッファ中の全イベントを配送します。"""
+        with self._lock:
+            batches = [(name, tuple(events)) for name, events in self._pending.items() if events]
+            for events in self._pending.values():
+                events.clear()
+        for event_name, batch in batches:
+            self._dispatch(event_name, batch)
+
+    def _dispatch(self, event_name: str, batch: Tuple[Event, ...]) -> None:
+        for handler in list(self._subscribers.get(event_name, [])):
+            try:
+                handler(event_name, batch)
+            except Exception as e:
+                logger.error("Event handler failed for %s (%d events): %s", event_name, len(batch), e,
+                             exc_info=True)
+
+    def start(self) -> "EventBus":
+        """一定間隔でフラッシュするバックグラウンドスレッドを開始します。"""
+        if self._flusher is None:
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name="event-bus-flush", daemon=True)
+            self._flusher.start()
+        return self
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval_sec):
+            self.flush()
+
+    def stop(self) -> None:
+        """定期フラッシュを停止し、残りのイベントを配送します。"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def __enter__(self) -> "EventBus":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.stop()
+        return False
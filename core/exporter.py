@@ -0,0 +1,229 @@
+"""コンテキストDBを列指向 (Parquet) で一括エクスポートするモジュール。
+
+分析や学習ジョブが ORM で1行ずつ読む代わりに、SQLAlchemy Core の ``select`` の結果を
+バッチ単位で Arrow の RecordBatch に変換し、作品ID (``novel_id``) で Hive 形式に
+パーティション分割した Parquet に書き出します。
+
+- 増分エクスポート: テーブルごとのウォーターマーク列 (``episodes.last_fetched_at``、
+  ``novels.updated_at``、それ以外は ``id``) の前回値を ``_watermarks.json`` に記録し、
+  次回はそれより新しい行だけを書き出します。時刻の列は SQLite では秒単位のため、DB の現在時刻の
+  秒の始まりより前の行だけを書き出し、まだ行が増えうる現在の秒は次回に回します
+- 稼働中の SQLite ファイルには触れないよう、既定では backup API で作ったスナップショットから読みます
+
+pyarrow は任意の依存で、エクスポート実行時に読み込みます。
+"""
+import enum
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import Boolean, DateTime, Enum as SQLAlchemyEnum, Float, Integer, create_engine, func, or_, select
+
+from core.context_db import ContextDB
+from core.db_schemas import Character, Episode, Foreshadowing, Novel, PlotEvent
+from core.logger_setup import setup_logger
+
+logger = setup_logger()
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_COMPRESSION = "zstd"
+WATERMARK_FILE = "_watermarks.json"
+PARTITION_COLUMN = "novel_id"
+
+# テーブル名 -> (モデル, ウォーターマーク列)
+EXPORT_TABLES: Dict[str, Any] = {
+    "novels": (Novel, "updated_at"),
+    "episodes": (Episode, "last_fetched_at"),
+    "characters": (Character, "id"),
+    "plot_events": (PlotEvent, "id"),
+    "foreshadowings": (Foreshadowing, "id"),
+}
+
+
+def _load_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+    except ImportError as e:
+        raise ImportError("Parquet export requires pyarrow. Install it with: pip install pyarrow") from e
+    return pyarrow
+
+
+def _arrow_type(pa, column) -> Any:
+    column_type = column.type
+    if isinstance(column_type, SQLAlchemyEnum):
+        return pa.string()
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def _to_arrow_value(value: Any) -> Any:
+    # Enum 列は値 (文字列) で書き出す
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+class ParquetExporter:
+    """コンテキストDBのテーブルを Parquet データセットに書き出します。
+
+    Args:
+        db (ContextDB): エクスポート元のDB。
+        output_dir (str): 出力先。テーブルごとに ``<output_dir>/<table>/`` を作成します。
+        batch_size (int): 1回に読み出して変換する行数。
+        compression (str): Parquet の圧縮方式 (``zstd``, ``snappy`` 等)。
+        snapshot (bool): SQLite の場合、稼働中のファイルではなくスナップショットから読みます。
+    """
+
+    def __init__(self, db: ContextDB, output_dir: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                 compression: str = DEFAULT_COMPRESSION, snapshot: bool = True):
+        self.db = db
+        self.output_dir = output_dir
+        self.batch_size = batch_size
+        self.compression = compression
+        self.snapshot = snapshot
+
+    def _watermark_path(self) -> str:
+        return os.path.join(self.output_dir, WATERMARK_FILE)
+
+    def load_watermarks(self) -> Dict[str, Any]:
+        """テーブルごとの前回のウォーターマークを返します。"""
+        path = self._watermark_path()
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_watermarks(self, watermarks: Dict[str, Any]) -> None:
+        tmp_path = f"{self._watermark_path()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(watermarks, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self._watermark_path())
+
+    def export(self, tables: Optional[Sequence[str]] = None,
+               columns: Optional[Dict[str, List[str]]] = None, full: bool = False) -> Dict[str, int]:
+        """テーブルをエクスポートし、テーブルごとの書き出し行数を返します。
+
+        Args:
+            tables (Optional[Sequence[str]]): 対象テーブル名。省略時は ``EXPORT_TABLES`` のすべて。
+            columns (Optional[Dict[str, List[str]]]): テーブルごとに書き出す列。省略したテーブルは全列。
+                パーティション列 ``novel_id`` は常に含めます。
+            full (bool): True の場合、ウォーターマークを無視して全行を書き出します。
+
+        Returns:
+            Dict[str, int]: テーブル名 -> 書き出した行数。
+        """
+        tables = list(tables or EXPORT_TABLES)
+        unknown = [t for t in tables if t not in EXPORT_TABLES]
+        if unknown:
+            raise ValueError(f"Unknown tables: {', '.join(unknown)}. Choose from {', '.join(EXPORT_TABLES)}.")
+        pa = _load_pyarrow()
+        self.db.ensure_schema()
+        os.makedirs(self.output_dir, exist_ok=True)
+        watermarks = self.load_watermarks()
+        run_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        snapshot_dir = None
+        engine = self.db.engine
+        if self.snapshot and engine.url.get_backend_name() == "sqlite" and engine.url.database:
+            snapshot_dir = tempfile.mkdtemp(prefix="novel_export_")
+            engine = create_engine(f"sqlite:///{self._make_snapshot(engine.url.database, snapshot_dir)}")
+        try:
+            counts = {}
+            for table_name in tables:
+                previous = None if full else watermarks.get(table_name)
+                count, new_watermark = self._export_table(
+                    pa, engine, table_name, (columns or {}).get(table_name), previous, run_id)
+                counts[table_name] = count
+                if new_watermark is not None:
+                    watermarks[table_name] = {"column": EXPORT_TABLES[table_name][1], **new_watermark}
+                    self._save_watermarks(watermarks)
+                logger.info("Exported %d rows from %s", count, table_name)
+            return counts
+        finally:
+            if snapshot_dir:
+                engine.dispose()
+                shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+    @staticmethod
+    def _make_snapshot(database_path: str, snapshot_dir: str) -> str:
+        snapshot_path = os.path.join(snapshot_dir, "snapshot.db")
+        source = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+        target = sqlite3.connect(snapshot_path)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        return snapshot_path
+
+    def _export_table(self, pa, engine, table_name: str, selected: Optional[List[str]],
+                      previous: Optional[Dict[str, Any]], run_id: str):
+        model, watermark_name = EXPORT_TABLES[table_name]
+        table = model.__table__
+        names = selected or [c.name for c in table.columns]
+        missing = [n for n in names if n not in table.columns]
+        if missing:
+            raise ValueError(f"Unknown columns for {table_name}: {', '.join(missing)}")
+        partitioned = PARTITION_COLUMN in table.columns
+        if partitioned and PARTITION_COLUMN not in names:
+            names = [PARTITION_COLUMN] + names
+        columns = [table.columns[n] for n in names]
+        schema = pa.schema([pa.field(c.name, _arrow_type(pa, c)) for c in columns])
+        watermark_column = table.columns[watermark_name]
+        is_timestamp = isinstance(watermark_column.type, DateTime)
+
+        with engine.connect() as conn:
+            if is_timestamp:
+                # 現在の秒に書き込まれる行は、同じ値のまま後からコミットされうるため次回に回す。
+                # 上限 (この値を含まない) を記録し、次回はこの値以上の行から書き出す
+                upper = self._current_second(conn)
+                condition = watermark_column < upper
+                new_watermark = {"value": upper.isoformat(), "bound": "exclusive"}
+            else:
+                upper = conn.execute(select(func.max(watermark_column))).scalar()
+                if upper is None:
+                    return 0, None
+                # 上限は開始時点の最大値に固定し、エクスポート中に追加された行は次回に回す
+                condition = watermark_column <= upper
+                new_watermark = {"value": upper}
+            if previous is not None:
+                lower = datetime.fromisoformat(previous["value"]) if is_timestamp else previous["value"]
+                # 上限を含めて記録した古いウォーターマークは、その値の行を書き出し済み
+                exclusive = previous.get("bound") == "exclusive"
+                condition = condition & (watermark_column >= lower if exclusive else watermark_column > lower)
+            else:
+                condition = or_(condition, watermark_column.is_(None))
+            query = select(*columns).where(condition).order_by(watermark_column)
+            result = conn.execution_options(stream_results=True, yield_per=self.batch_size).execute(query)
+            counter = {"rows": 0}
+            reader = pa.RecordBatchReader.from_batches(
+                schema, self._batches(pa, schema, result, counter))
+            pa.dataset.write_dataset(
+                reader, os.path.join(self.output_dir, table_name), format="parquet",
+                partitioning=[PARTITION_COLUMN] if partitioned else None, partitioning_flavor="hive",
+                basename_template=f"part-{run_id}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+                file_options=pa.dataset.ParquetFileFormat().make_write_options(compression=self.compression))
+        return counter["rows"], new_watermark
+
+    @staticmethod
+    def _current_second(conn) -> datetime:
+        """ウォーターマーク列と同じ DB の時計で、現在の秒の始まりを返します。"""
+        return conn.execute(select(func.now())).scalar().replace(microsecond=0)
+
+    def _batches(self, pa, schema, result, counter: Dict[str, int]) -> Iterator[Any]:
+        for rows in result.partitions(self.batch_size):
+            counter["rows"] += len(rows)
+            arrays = [pa.array([_to_arrow_value(v) for v in values], type=field.type)
+                      for values, field in zip(zip(*rows), schema)]
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
@@ -0,0 +1,51 @@
+"""複数のプロセス・インスタンスから同じファイル群に書き込むための排他ロック。"""
+import os
+import threading
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows ではプロセス内の排他だけになる
+    fcntl = None
+
+
+class FileLock:
+    """``fcntl.flock`` によるプロセス間の排他ロック。スレッド間も排他し、同じスレッドからは入れ子で取れます。
+
+    Args:
+        path (str): ロックするファイルまたはディレクトリ。ファイルがなければ親ディレクトリごと作成します。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+
+    def __enter__(self) -> "FileLock":
+        self._lock.acquire()
+        try:
+            if self._depth == 0 and fcntl is not None:
+                if os.path.isdir(self.path):
+                    fd = os.open(self.path, os.O_RDONLY)
+                else:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                except BaseException:
+                    os.close(fd)
+                    raise
+                self._fd = fd
+        except BaseException:
+            self._lock.release()
+            raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            os.close(self._fd)  # close で flock も解放される
+            self._fd = None
+        self._lock.release()
@@ -1,45 +1,218 @@
 # core/llm_client.py (修正案)
-import google.generativeai as genai
+import hashlib
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, NamedTuple, Optional
+
+from core import metrics, profiling
 from core.config import config
 from core.logger_setup import setup_logger
 
 logger = setup_logger()
 
+GENERATE_SECONDS = metrics.histogram(
+    "llm_generate_seconds", "Latency of LLMClient.generate_text calls.",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+GENERATE_TOTAL = metrics.counter(
+    "llm_generate_total", "LLMClient.generate_text calls by outcome.", label_names=("outcome",))
+TOKENS_TOTAL = metrics.counter(
+    "llm_tokens_total", "Tokens reported by the LLM API (prompt, cached, output).", label_names=("kind",))
+CONTEXT_CACHE_TOTAL = metrics.counter(
+    "llm_context_cache_total", "register_context calls by outcome (hit, created, inline).",
+    label_names=("outcome",))
+# 期限切れ直前のキャッシュを参照しないよう、残りがこの秒数を切ったら作り直す
+CONTEXT_EXPIRY_MARGIN_SEC = 60
+
+
+class CachedContext(NamedTuple):
+    """``register_context`` で登録した、複数の呼び出しで共有するプロンプトの前置き。
+
+    Attributes:
+        key: 登録名 (作品ごとの ``novel:<id>`` 等)。
+        fingerprint: ``text`` のハッシュ。内容が変わったときだけ登録し直すために使います。
+        text: 前置きの本文。
+        handle: バックエンド側のキャッシュ (Gemini の ``CachedContent`` 等)。None の場合、
+            ``generate_text`` はプロンプトの先頭に ``text`` をそのまま付けて送ります。
+        expires_at: ``handle`` の有効期限 (``time.monotonic()`` 基準)。
+    """
+    key: str
+    fingerprint: str
+    text: str
+    handle: Any = None
+    expires_at: Optional[float] = None
+
+
+def context_fingerprint(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def with_context(prompt_text: str, context: Optional[CachedContext]) -> str:
+    """キャッシュを使わない場合に送るプロンプト (前置き + 本文) を返します。"""
+    return f"{context.text}\n\n{prompt_text}" if context is not None else prompt_text
+
+
+def _load_genai():
+    # google.generativeai は import だけで1秒近くかかるため、実際に呼び出すまで読み込まない
+    import google.generativeai as genai
+    return genai
+
+
+def _load_caching():
+    # コンテキストキャッシュ (google-generativeai 0.7 以降)
+    from google.generativeai import caching
+    return caching
+
+
 class LLMClient:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, model_name=None):
         self.api_key = api_key or config.GEMINI_API_KEY
-        self.model = None
+        self.model_name = model_name or config.LLM_MODEL
+        self._model = None
+        self._model_initialized = False
+        self._contexts: Dict[str, CachedContext] = {}
+        self._cached_models: Dict[str, Any] = {}
+        self._context_lock = threading.Lock()
         if not self.api_key:
             logger.warning("GEMINI_API_KEY is not set. LLMClient will not function properly.")
-        else:
-            try:
-                genai.configure(api_key=self.api_key)
-                # TODO: モデル名は設定ファイル等で指定できるようにすることを推奨
-                self.model = genai.GenerativeModel('gemini-pro')
-                logger.info("LLMClient initialized with gemini-pro model.")
-            except Exception as e:
-                logger.error(f"Failed to configure Gemini API: {e}")
 
+    @property
+    def model(self):
+        """Gemini のモデルを初回参照時に初期化して返します。初期化できない場合は None。"""
+        if not self._model_initialized:
+            self._model_initialized = True
+            self._model = self._create_model()
+        return self._model
 
-    def generate_text(self, prompt_text, **generation_kwargs):
+    def _create_model(self):
+        if not self.api_key:
+            return None
+        try:
+            genai = _load_genai()
+            genai.configure(api_key=self.api_key)
+            model = genai.GenerativeModel(self.model_name)
+            logger.info(f"LLMClient initialized with {self.model_name} model.")
+            return model
+        except Exception as e:
+            logger.error(f"Failed to configure Gemini API: {e}")
+            return None
+
+    def register_context(self, key: str, text: str, ttl_sec: Optional[float] = None) -> CachedContext:
+        """複数の呼び出しで共有する前置きを登録し、``generate_text(context=...)`` に渡すハンドルを返します。
+
+        同じ ``key`` で内容 (ハッシュ) が変わっておらず、キャッシュが有効期限内であれば API を呼ばずに
+        登録済みのものを返します。内容が変わった場合は古いキャッシュを削除して作り直します。
+        前置きが ``LLM_CONTEXT_CACHE_MIN_CHARS`` より短い場合や、モデルがキャッシュに対応していない
+        場合は、毎回プロンプトに含めて送るハンドルを返します。
+
+        Args:
+            key (str): 登録名。
+            text (str): 前置きの本文 (あらすじ・登場人物・世界設定など)。
+            ttl_sec (Optional[float]): キャッシュの保持期間。省略時は ``LLM_CONTEXT_CACHE_TTL_SEC``。
+
+        Returns:
+            CachedContext: 登録したハンドル。
+        """
+        fingerprint = context_fingerprint(text)
+        ttl_sec = ttl_sec or config.LLM_CONTEXT_CACHE_TTL_SEC
+        with self._context_lock:
+            current = self._contexts.get(key)
+            if current is not None and current.fingerprint == fingerprint and (
+                    current.expires_at is None or current.expires_at - time.monotonic() > CONTEXT_EXPIRY_MARGIN_SEC):
+                CONTEXT_CACHE_TOTAL.inc(outcome="hit")
+                return current
+            if current is not None and current.handle is not None:
+                self._delete_cached_content(current)
+            handle = self._create_cached_content(key, fingerprint, text, ttl_sec)
+            context = CachedContext(key, fingerprint, text, handle,
+                                    time.monotonic() + ttl_sec if handle is not None else None)
+            self._contexts[key] = context
+        CONTEXT_CACHE_TOTAL.inc(outcome="created" if handle is not None else "inline")
+        return context
+
+    def _create_cached_content(self, key: str, fingerprint: str, text: str, ttl_sec: float) -> Any:
+        if not config.LLM_CONTEXT_CACHE_ENABLED or not self.model or len(text) < config.LLM_CONTEXT_CACHE_MIN_CHARS:
+            return None
+        try:
+            with profiling.stage("llm"):
+                cached = _load_caching().CachedContent.create(
+                    model=self.model_name, display_name=f"{key}:{fingerprint}", contents=[text],
+                    ttl=timedelta(seconds=ttl_sec))
+            logger.info(f"Registered cached context {key} ({len(text)} chars) as {cached.name}")
+            return cached
+        except Exception as e:
+            # キャッシュに対応しないモデルやトークン数が下限未満の場合は、前置きをプロンプトに含めて送る
+            logger.warning(f"Context caching unavailable for {key}, sending it inline: {e}")
+            return None
+
+    def _delete_cached_content(self, context: CachedContext) -> None:
+        self._cached_models.pop(context.fingerprint, None)
+        try:
+            context.handle.delete()
+        except Exception as e:
+            logger.warning(f"Failed to delete cached context {context.key}: {e}")
+
+    def _model_for(self, context: Optional[CachedContext]):
+        if context is None or context.handle is None:
+            return self.model
+        model = self._cached_models.get(context.fingerprint)
+        if model is None:
+            model = _load_genai().GenerativeModel.from_cached_content(cached_content=context.handle)
+            self._cached_models[context.fingerprint] = model
+        return model
+
+    @metrics.timed(GENERATE_SECONDS)
+    def generate_text(self, prompt_text, context: Optional[CachedContext] = None, **generation_kwargs):
+        """テキストを生成します。
+
+        Args:
+            prompt_text (str): プロンプト。
+            context (Optional[CachedContext]): ``register_context`` で登録した前置き。キャッシュ済みなら
+                前置きはキャッシュから参照され、そうでなければプロンプトの先頭に付けて送ります。
+            **generation_kwargs: temperature, top_p, top_k, max_output_tokens など。
+        """
         if not self.model:
             logger.error("LLM model not initialized. Cannot generate text.")
             return ""
         try:
-            # generation_kwargs は temperature, top_p, top_k, max_output_tokens など
-            response = self.model.generate_content(prompt_text, generation_config=genai.types.GenerationConfig(**generation_kwargs))
+            if context is not None and context.expires_at is not None and (
+                    context.expires_at - time.monotonic() <= CONTEXT_EXPIRY_MARGIN_SEC):
+                # 長い処理の途中でキャッシュの期限が来たら登録し直す
+                context = self.register_context(context.key, context.text)
+            model = self._model_for(context)
+            if context is not None and context.handle is None:
+                prompt_text = with_context(prompt_text, context)
+            with profiling.stage("llm"):
+                response = model.generate_content(
+                    prompt_text, generation_config=_load_genai().types.GenerationConfig(**generation_kwargs))
+            self._record_usage(response)
             # エラーハンドリングやブロックされた場合の処理を追加することを推奨
             if response.prompt_feedback and response.prompt_feedback.block_reason:
+                GENERATE_TOTAL.inc(outcome="blocked")
                 logger.warning(f"Prompt was blocked: {response.prompt_feedback.block_reason}")
                 return f"Error: Prompt blocked ({response.prompt_feedback.block_reason})"
             if not response.candidates:
-                 logger.warning("No candidates returned from LLM.")
-                 return "Error: No response from LLM."
+                GENERATE_TOTAL.inc(outcome="empty")
+                logger.warning("No candidates returned from LLM.")
+                return "Error: No response from LLM."
+            GENERATE_TOTAL.inc(outcome="ok")
             return response.text
         except Exception as e:
+            GENERATE_TOTAL.inc(outcome="error")
             logger.error(f"Failed to generate text using Gemini API: {e}")
             return f"Error: Failed to generate text ({e})"
 
+    @staticmethod
+    def _record_usage(response) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        # prompt_token_count はキャッシュから読んだ分を含むため、キャッシュ分を引いて記録する
+        cached = getattr(usage, "cached_content_token_count", 0) or 0
+        TOKENS_TOTAL.inc((getattr(usage, "prompt_token_count", 0) or 0) - cached, kind="prompt")
+        TOKENS_TOTAL.inc(cached, kind="cached")
+        TOKENS_TOTAL.inc(getattr(usage, "candidates_token_count", 0) or 0, kind="output")
+
     def get_model_info(self):
         if not self.model:
             logger.error("LLM model not initialized.")
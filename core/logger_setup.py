@@ -1,11 +1,20 @@
+import atexit
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
+from typing import Optional, Tuple
 
 LOG_FILE_PATH = "data/app.log" # ログファイルパス (dataフォルダは.gitignore対象)
 MAX_BYTES = 1024 * 1024 * 5  # 5MB
 BACKUP_COUNT = 5
+DEFAULT_QUEUE_SIZE = 10000
+BLOCKING_PUT_TIMEOUT_SEC = 1.0  # WARNING 以上はキューが満杯でもこの時間までは待って記録する
+DEFAULT_RATE_LIMIT_KEYS = 4096  # レート制限で時間枠を覚えておくメッセージテンプレートの数
 
 # setup_logger 関数内、file_handler の設定前に追加
 log_dir = os.path.dirname(LOG_FILE_PATH)
@@ -17,6 +26,9 @@ if not os.path.exists(log_dir):
         print(f"Warning: Failed to create log directory {log_dir}: {e}")
         print("Warning: File logging may be disabled.")
 
+_listener: Optional[QueueListener] = None
+
+
 def setup_logger(log_level=logging.INFO):
     logger = logging.getLogger(__name__.split('.')[0]) # プロジェクトルートのロガー名
     if logger.hasHandlers(): # 既にハンドラが設定されていれば何もしない (重複防止)
@@ -52,5 +64,160 @@ def setup_logger(log_level=logging.INFO):
     logger.info("Logger setup complete.")
     return logger
 
+
+class DeferredQueueHandler(QueueHandler):
+    """書式化をリスナースレッドに任せる QueueHandler。
+
+    標準の ``QueueHandler.prepare`` は呼び出し元スレッドでフォーマッタを通すため、
+    ここではメッセージ引数の埋め込みだけを行い、日時などの書式化はリスナー側の
+    ハンドラで行います。キューが満杯の場合、INFO 以下は破棄して件数を数え、
+    WARNING 以上は一定時間待ってから投入します。破棄した件数は ``dropped`` と
+    ``log_records_dropped_total`` メトリクスに数え、``shutdown_logging`` でも報告します。
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 引数が後で変更されても記録内容が変わらないよう、ここで文字列化だけしておく
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record, timeout=BLOCKING_PUT_TIMEOUT_SEC)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+            _count_dropped_record()
+
+
+def _count_dropped_record() -> None:
+    # core.metrics はこのモジュールを import するため、初めて破棄したときに読み込む
+    from core import metrics
+    metrics.counter("log_records_dropped_total",
+                    "Log records dropped because the async logging queue was full.").inc()
+
+
+class RateLimitFilter(logging.Filter):
+    """同じメッセージテンプレートの記録を一定時間あたりの件数に制限するフィルタ。
+
+    キーは (モジュール名, 書式化前のメッセージ) なので、遅延書式化 (``%s``) で書かれた
+    "Episode found: ..." のような繰り返しメッセージをまとめて間引けます。
+    WARNING 以上は制限しません。抑制した件数は、次の時間枠で最初に通過した記録に付記されます。
+    時間枠を覚えておくキーは最近使った ``max_keys`` 件までで、それより古いものは忘れます。
+    """
+
+    def __init__(self, max_per_window: int, window_sec: float = 60.0, max_keys: int = DEFAULT_RATE_LIMIT_KEYS):
+        super().__init__()
+        self.max_per_window = max_per_window
+        self.window_sec = window_sec
+        self.max_keys = max_keys
+        # key -> (時間枠の開始時刻, 通過件数, 抑制件数)
+        self._windows: "OrderedDict[Tuple[str, str], Tuple[float, int, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.module, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            started_at, passed, suppressed = self._windows.get(key, (now, 0, 0))
+            if key in self._windows:
+                self._windows.move_to_end(key)
+            else:
+                self._evict()
+            if now - started_at >= self.window_sec:
+                if suppressed:
+                    record.msg = (f"{record.msg} (suppressed {suppressed} similar messages "
+                                  f"in the last {int(self.window_sec)}s)")
+                self._windows[key] = (now, 1, 0)
+                return True
+            if passed < self.max_per_window:
+                self._windows[key] = (started_at, passed + 1, suppressed)
+                return True
+            self._windows[key] = (started_at, passed, suppressed + 1)
+            return False
+
+    def _evict(self) -> None:
+        while len(self._windows) >= self.max_keys:
+            self._windows.popitem(last=False)
+
+
+def attach_queue_handler(logger: logging.Logger, queue_size: int = DEFAULT_QUEUE_SIZE) -> QueueListener:
+    """ロガーの既存ハンドラを QueueListener 側に移し、ロガーには QueueHandler だけを残します。
+
+    Args:
+        logger (logging.Logger): 対象のロガー。
+        queue_size (int): キューの最大件数。0 以下で無制限。
+
+    Returns:
+        QueueListener: 起動済みのリスナー。停止時に ``stop()`` を呼ぶと残りを書き出します。
+    """
+    handlers = [h for h in logger.handlers if not isinstance(h, QueueHandler)]
+    for handler in handlers:
+        logger.removeHandler(handler)
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=max(0, queue_size))
+    logger.addHandler(DeferredQueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def configure_logging(level: str = "INFO", async_mode: bool = False,
+                      queue_size: int = DEFAULT_QUEUE_SIZE, rate_limit: int = 0,
+                      rate_limit_window_sec: float = 60.0) -> logging.Logger:
+    """``core.config`` の設定に従ってプロジェクトロガーを構成します。
+
+    Args:
+        level (str): ログレベル名。
+        async_mode (bool): True の場合、ファイル/標準出力への書き込みを別スレッドで行います。
+        queue_size (int): 非同期モードのキューの最大件数。
+        rate_limit (int): メッセージテンプレートごとの時間枠あたり最大件数。0 で無効。
+        rate_limit_window_sec (float): レート制限の時間枠 (秒)。
+
+    Returns:
+        logging.Logger: 構成したロガー。
+    """
+    global _listener
+    logger = setup_logger()
+    logger.setLevel(level.upper())
+    for existing in [f for f in logger.filters if isinstance(f, RateLimitFilter)]:
+        logger.removeFilter(existing)
+    if rate_limit > 0:
+        logger.addFilter(RateLimitFilter(rate_limit, rate_limit_window_sec))
+    if async_mode and _listener is None:
+        _listener = attach_queue_handler(logger, queue_size)
+        atexit.register(shutdown_logging)
+    return logger
+
+
+def shutdown_logging() -> None:
+    """非同期モードのリスナーを停止し、キューに残った記録を書き出します。"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _report_dropped(_listener)
+        _listener = None
+
+
+def _report_dropped(listener: QueueListener) -> None:
+    logger = logging.getLogger(__name__.split('.')[0])
+    dropped = sum(h.dropped for h in logger.handlers if isinstance(h, DeferredQueueHandler))
+    if not dropped:
+        return
+    # リスナーは停止済みなので、記録を直接出力先のハンドラに渡す
+    record = logger.makeRecord(logger.name, logging.WARNING, __file__, 0,
+                               "Async logging dropped %d records because the queue was full", (dropped,), None)
+    for handler in listener.handlers:
+        handler.handle(record)
+
 # グローバルロガーインスタンス (必要に応じてアプリケーション全体で共有)
 # logger = setup_logger()
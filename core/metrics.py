@@ -0,0 +1,423 @@
+"""軽量なメトリクス計測レイヤー (カウンタ・ヒストグラム・タイマー)。
+
+ホットパスに組み込むことを前提に、無効時はフラグ確認1回だけで処理を返します。
+有効時は Prometheus テキスト形式のローカルエンドポイント、または定期的な JSON ダンプで出力します。
+
+使用例:
+    REQUEST_SECONDS = metrics.histogram("scraper_request_seconds", "HTTP request latency.",
+                                        label_names=("platform",))
+    with REQUEST_SECONDS.time(platform="narou"):
+        ...
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from core.logger_setup import setup_logger
+
+logger = setup_logger()
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RESERVOIR_SIZE = 1024  # パーセンタイル算出用に保持する直近サンプル数
+PERCENTILES = (50, 90, 99)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_exporter_stops: List[Callable[[], None]] = []  # setup_metrics で起動したエクスポーターの停止処理
+
+
+def _label_key(label_names: Sequence[str], labels: Dict[str, Any]) -> LabelKey:
+    return tuple((name, str(labels.get(name, ""))) for name in label_names)
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{_escape_label_value(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _escape_label_value(value: str) -> str:
+    # Prometheus のテキスト形式ではラベル値の \ " 改行をエスケープする
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _NullTimer:
+    """計測無効時に返す何もしないコンテキストマネージャ。"""
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, histogram: "Histogram", labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Counter:
+    """単調増加するカウンタ。"""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str,
+                 label_names: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """カウンタを加算します。無効時は何もしません。"""
+        if not self.registry.enabled:
+            return
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        """現在値を返します。"""
+        return self._values.get(_label_key(self.label_names, labels), 0.0)
+
+    def reset(self) -> None:
+        """値をすべて破棄します。"""
+        with self._lock:
+            self._values.clear()
+
+    def render_prometheus(self) -> List[str]:
+        """Prometheus テキスト形式の行を返します。"""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON 出力用のスナップショットを返します。"""
+        with self._lock:
+            return {"type": "counter",
+                    "values": [{"labels": dict(k), "value": v} for k, v in sorted(self._values.items())]}
+
+
+class _HistogramSeries:
+    __slots__ = ("bucket_counts", "count", "total", "reservoir")
+
+    def __init__(self, bucket_total: int):
+        self.bucket_counts = [0] * bucket_total
+        self.count = 0
+        self.total = 0.0
+        self.reservoir: Deque[float] = deque(maxlen=RESERVOIR_SIZE)
+
+
+class Histogram:
+    """値の分布を記録するヒストグラム。直近サンプルからパーセンタイルも算出します。"""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str,
+                 label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, _HistogramSeries] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """値を1件記録します。無効時は何もしません。"""
+        if not self.registry.enabled:
+            return
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series.bucket_counts[i] += 1
+                    break
+            series.count += 1
+            series.total += value
+            series.reservoir.append(value)
+
+    def time(self, **labels: Any) -> Any:
+        """ブロックの実行時間を秒で記録するコンテキストマネージャを返します。"""
+        if not self.registry.enabled:
+            return _NULL_TIMER
+        return _Timer(self, labels)
+
+    def count(self, **labels: Any) -> int:
+        """記録件数を返します。"""
+        series = self._series.get(_label_key(self.label_names, labels))
+        return series.count if series else 0
+
+    def percentiles(self, **labels: Any) -> Dict[str, float]:
+        """直近サンプルから p50/p90/p99 を返します。"""
+        series = self._series.get(_label_key(self.label_names, labels))
+        if not series:
+            return {}
+        with self._lock:
+            return self._percentiles(series)
+
+    @staticmethod
+    def _percentiles(series: _HistogramSeries) -> Dict[str, float]:
+        samples = sorted(series.reservoir)
+        if not samples:
+            return {}
+        return {f"p{p}": samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+                for p in PERCENTILES}
+
+    def reset(self) -> None:
+        """値をすべて破棄します。"""
+        with self._lock:
+            self._series.clear()
+
+    def render_prometheus(self) -> List[str]:
+        """Prometheus テキスト形式の行を返します。"""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, series.bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, ('le', repr(bound)))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {series.count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series.total}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series.count}")
+        return lines
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON 出力用のスナップショットを返します。"""
+        with self._lock:
+            values = [{
+                "labels": dict(key),
+                "count": series.count,
+                "sum": series.total,
+                **self._percentiles(series),
+            } for key, series in sorted(self._series.items())]
+        return {"type": "histogram", "values": values}
+
+
+class MetricsRegistry:
+    """メトリクスの登録と出力を管理するレジストリ。"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name: str, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = factory()
+            return self._metrics[name]
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        """カウンタを取得します (同名が登録済みならそれを返します)。"""
+        return self._register(name, lambda: Counter(self, name, help_text, label_names))
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """ヒストグラムを取得します (同名が登録済みならそれを返します)。"""
+        return self._register(name, lambda: Histogram(self, name, help_text, label_names, buckets))
+
+    def reset(self) -> None:
+        """全メトリクスの値を破棄します (登録は維持)。"""
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+    def render_prometheus(self) -> str:
+        """全メトリクスを Prometheus テキスト形式で返します。"""
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render_prometheus())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """全メトリクスを JSON 化可能な辞書で返します。"""
+        return {
+            "timestamp": time.time(),
+            "metrics": {name: self._metrics[name].snapshot() for name in sorted(self._metrics)},
+        }
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+    """既定レジストリにカウンタを登録します。"""
+    return REGISTRY.counter(name, help_text, label_names)
+
+
+def histogram(name: str, help_text: str, label_names: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    """既定レジストリにヒストグラムを登録します。"""
+    return REGISTRY.histogram(name, help_text, label_names, buckets)
+
+
+def timed(metric: Histogram, **labels: Any) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """関数の実行時間をヒストグラムに記録するデコレータ。
+
+    Args:
+        metric (Histogram): 記録先のヒストグラム。
+        **labels: 記録時に付与するラベル。
+
+    Returns:
+        Callable: デコレータ。無効時は元の関数をそのまま呼ぶだけのラッパーになります。
+    """
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not metric.registry.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metric.observe(time.perf_counter() - start, **labels)
+        return wrapper
+    return decorator
+
+
+# --- Exporters ---
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = REGISTRY
+
+    def do_GET(self) -> None:  # noqa: N802 (http.server の命名規約)
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("metrics endpoint: " + format, *args)
+
+
+def start_prometheus_server(host: str = "127.0.0.1", port: int = 9464,
+                            registry: MetricsRegistry = REGISTRY) -> ThreadingHTTPServer:
+    """``/metrics`` を返すローカル HTTP サーバーをデーモンスレッドで起動します。
+
+    Args:
+        host (str): 待ち受けアドレス。既定ではローカルのみ。
+        port (int): 待ち受けポート。0 を指定すると空きポートを使います。
+        registry (MetricsRegistry): 出力するレジストリ。
+
+    Returns:
+        ThreadingHTTPServer: 起動したサーバー。``shutdown()`` で停止できます。
+    """
+    handler = type("MetricsRequestHandler", (_MetricsRequestHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    logger.info("Metrics endpoint listening on http://%s:%s/metrics", host, server.server_address[1])
+    return server
+
+
+def _stop_server(server: ThreadingHTTPServer) -> None:
+    server.shutdown()
+    server.server_close()
+
+
+def write_json_snapshot(path: str, registry: MetricsRegistry = REGISTRY) -> None:
+    """スナップショットを JSON ファイルに書き出します (一時ファイル経由で置き換え)。"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(registry.snapshot(), f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class JsonDumper:
+    """一定間隔でスナップショットを JSON ファイルに書き出すバックグラウンドスレッド。"""
+
+    def __init__(self, path: str, interval_sec: float, registry: MetricsRegistry = REGISTRY):
+        self.path = path
+        self.interval_sec = interval_sec
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-json", daemon=True)
+
+    def start(self) -> "JsonDumper":
+        """ダンプを開始し、プロセス終了時にも最終値を書き出すよう登録します。"""
+        self._thread.start()
+        atexit.register(self.stop)
+        logger.info("Metrics JSON dump enabled: %s (every %ss)", self.path, self.interval_sec)
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            self._dump()
+
+    def _dump(self) -> None:
+        try:
+            write_json_snapshot(self.path, self.registry)
+        except OSError as e:
+            logger.warning("Failed to write metrics snapshot to %s: %s", self.path, e)
+
+    def stop(self) -> None:
+        """ダンプを停止し、最後のスナップショットを書き出します。"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._dump()
+
+
+def setup_metrics(enabled: bool, exporters: Sequence[str] = (), host: str = "127.0.0.1",
+                  port: int = 9464, json_path: str = "data/metrics.json",
+                  json_interval_sec: float = 60.0) -> None:
+    """メトリクスを有効化し、指定されたエクスポーターを起動します。
+
+    Args:
+        enabled (bool): 計測を有効にするか。False の場合は何も起動しません。
+        exporters (Sequence[str]): ``"prometheus"`` と ``"json"`` の組み合わせ。
+        host (str): Prometheus エンドポイントの待ち受けアドレス。
+        port (int): Prometheus エンドポイントのポート。
+        json_path (str): JSON ダンプの出力先。
+        json_interval_sec (float): JSON ダンプの間隔 (秒)。
+    """
+    REGISTRY.enabled = enabled
+    if not enabled:
+        return
+    if "prometheus" in exporters:
+        try:
+            _exporter_stops.append(functools.partial(_stop_server, start_prometheus_server(host, port)))
+        except OSError as e:
+            logger.error("Failed to start metrics endpoint on %s:%s: %s", host, port, e)
+    if "json" in exporters:
+        _exporter_stops.append(JsonDumper(json_path, json_interval_sec).start().stop)
+
+
+def shutdown_metrics() -> None:
+    """``setup_metrics`` で起動したエクスポーターを停止します。JSON ダンプは最後のスナップショットを書き出します。"""
+    while _exporter_stops:
+        _exporter_stops.pop()()
@@ -0,0 +1,171 @@
+"""バージョン付きのスキーマ移行。
+
+``create_all`` は既存テーブルへの索引や制約の追加を行わないため、スキーマを変更するときは
+``SCHEMA_VERSION`` を上げ、同じ番号の ``Migration`` をここに追加します。各マイグレーションは
+途中で失敗しても再実行できるよう冪等に書きます (``checkfirst`` / ``IF EXISTS``)。
+
+- 新規DB: ``create_all`` で最新のスキーマを作成し、最新バージョンを記録します
+- バージョン記録のない既存DB: バージョン 1 (最初の記録時のスキーマ) とみなして移行します
+"""
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+
+from core.db_schemas import (
+    Base, Character, CrawlTarget, Episode, EpisodeChunk, EpisodeParagraph, EpisodeRevision, Foreshadowing, Item,
+    Location, SchemaVersion, SCHEMA_VERSION
+)
+from core.logger_setup import setup_logger
+
+logger = setup_logger()
+
+BASELINE_VERSION = 1
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+class MigrationError(RuntimeError):
+    """既存データが新しい制約を満たさないなど、自動では移行できない場合に送出します。"""
+
+
+def _create_tables(*models) -> Callable[[Connection], None]:
+    def upgrade(conn: Connection) -> None:
+        for model in models:
+            model.__table__.create(conn, checkfirst=True)
+    return upgrade
+
+
+def _add_columns(model, *names: str) -> Callable[[Connection], None]:
+    def upgrade(conn: Connection) -> None:
+        table = model.__table__
+        existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+        for name in names:
+            if name not in existing:
+                column_type = table.columns[name].type.compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"))
+    return upgrade
+
+
+def _replace_indexes(model, *dropped: str) -> Callable[[Connection], None]:
+    """``dropped`` の索引を削除し、``model`` の複合索引を作成します。"""
+    def upgrade(conn: Connection) -> None:
+        # まだないテーブルは、移行後の create_all で索引ごと作成される
+        if model.__tablename__ not in inspect(conn).get_table_names():
+            return
+        for name in dropped:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        for index in model.__table__.indexes:
+            if len(index.columns) > 1:
+                index.create(conn, checkfirst=True)
+    return upgrade
+
+
+def _steps(*steps: Callable[[Connection], None]) -> Callable[[Connection], None]:
+    def upgrade(conn: Connection) -> None:
+        for step in steps:
+            step(conn)
+    return upgrade
+
+
+def _check_unique(conn: Connection, model, columns: List[str]) -> None:
+    table = model.__table__
+    key = ", ".join(columns)
+    duplicates = conn.execute(text(
+        f"SELECT {key}, COUNT(*) FROM {table.name} GROUP BY {key} HAVING COUNT(*) > 1 LIMIT 5"
+    )).fetchall()
+    if duplicates:
+        examples = "; ".join(", ".join(str(v) for v in row[:-1]) for row in duplicates)
+        raise MigrationError(
+            f"Cannot add a unique index on {table.name}({key}): duplicate rows exist (e.g. {examples}). "
+            f"Merge or rename them and run again.")
+
+
+def _composite_indexes(conn: Connection) -> None:
+    # まだないテーブルは、移行後の create_all で索引ごと作成される
+    tables = set(inspect(conn).get_table_names())
+    for model in (Character, Location, Item):
+        if model.__tablename__ in tables:
+            _check_unique(conn, model, ["novel_id", "name"])
+    # 複合索引の先頭列と重複する単一列索引は不要になるので削除する
+    for name in ("ix_episodes_novel_id", "ix_characters_novel_id", "ix_locations_novel_id",
+                 "ix_items_novel_id", "ix_foreshadowings_novel_id", "ix_episode_chunks_novel_id"):
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    for model in (Episode, EpisodeChunk, Character, Location, Item, Foreshadowing):
+        if model.__tablename__ not in tables:
+            continue
+        for index in model.__table__.indexes:
+            if len(index.columns) > 1:
+                index.create(conn, checkfirst=True)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(2, "episode_chunks table for passage retrieval", _create_tables(EpisodeChunk)),
+    Migration(3, "crawl_targets table for the crawl frontier", _create_tables(CrawlTarget)),
+    Migration(4, "composite indexes and (novel_id, name) unique indexes", _composite_indexes),
+    Migration(5, "paragraph hashes, revision deltas and episodes.revised_at",
+              _steps(_create_tables(EpisodeParagraph, EpisodeRevision), _add_columns(Episode, "revised_at"))),
+    Migration(6, "episodes.unanalyzed_change_ratio for cumulative revisions",
+              _add_columns(Episode, "unanalyzed_change_ratio")),
+    Migration(7, "crawl_targets (host, next_crawl_at) index for claiming due targets",
+              _replace_indexes(CrawlTarget, "ix_crawl_targets_host")),
+]
+assert MIGRATIONS[-1].version == SCHEMA_VERSION, "Add a migration when bumping SCHEMA_VERSION"
+
+
+def current_version(conn: Connection) -> Optional[int]:
+    """DB に記録されたスキーマバージョンを返します。記録がなければ None。"""
+    if not inspect(conn).has_table(SchemaVersion.__tablename__):
+        return None
+    try:
+        return conn.execute(
+            SchemaVersion.__table__.select().with_only_columns(SchemaVersion.version)).scalar()
+    except SQLAlchemyError:
+        return None
+
+
+def _stamp(conn: Connection, version: int) -> None:
+    SchemaVersion.__table__.create(conn, checkfirst=True)
+    conn.execute(SchemaVersion.__table__.delete())
+    conn.execute(SchemaVersion.__table__.insert().values(id=1, version=version))
+
+
+def pending_migrations(conn: Connection) -> List[Migration]:
+    """未適用のマイグレーションを返します。新規DB (テーブルなし) の場合は空です。"""
+    version = current_version(conn)
+    if version is None:
+        if not inspect(conn).has_table(Episode.__tablename__):
+            return []
+        version = BASELINE_VERSION
+    return [m for m in MIGRATIONS if m.version > version]
+
+
+def upgrade(conn: Connection) -> List[int]:
+    """スキーマを ``SCHEMA_VERSION`` まで移行し、適用したバージョンを返します。
+
+    呼び出し側のトランザクション内で実行します。途中で失敗した場合はロールバックされ、
+    記録されたバージョンも変わりません。
+    """
+    version = current_version(conn)
+    if version is None and not inspect(conn).has_table(Episode.__tablename__):
+        Base.metadata.create_all(conn)
+        _stamp(conn, SCHEMA_VERSION)
+        logger.info("Created schema version %s", SCHEMA_VERSION)
+        return []
+    if version is not None and version > SCHEMA_VERSION:
+        raise MigrationError(
+            f"Database schema version {version} is newer than this code ({SCHEMA_VERSION}).")
+    applied = []
+    for migration in pending_migrations(conn):
+        logger.info("Applying migration %s: %s", migration.version, migration.description)
+        migration.upgrade(conn)
+        _stamp(conn, migration.version)
+        applied.append(migration.version)
+    # 移行で個別に扱わないテーブル (関連テーブル等) の作成漏れを移行の後に補う。既存テーブルには触れない
+    Base.metadata.create_all(conn)
+    return applied
@@ -0,0 +1,65 @@
+"""話ごとの LLM 呼び出しで共有する、作品単位の前置き (あらすじ・登場人物・世界設定) を組み立てるモジュール。
+
+前置きは ``LLMClient.register_context`` に登録し、各話のプロンプトからはハンドルで参照します。
+行の内容が変わらない限り前置きの本文 (とハッシュ) も変わらないため、登録済みのキャッシュがそのまま使われます。
+"""
+from typing import Any, List, Optional
+
+from core.context_db import ContextDB
+from core.logger_setup import setup_logger
+
+logger = setup_logger()
+
+
+def novel_context_key(novel_id: int) -> str:
+    return f"novel:{novel_id}"
+
+
+def _character_line(character: Any) -> str:
+    line = f"- {character.name}"
+    if character.reading:
+        line += f"（{character.reading}）"
+    if character.role_in_story_llm:
+        line += f": {character.role_in_story_llm}"
+    if character.aliases:
+        line += f" 別名: {character.aliases}"
+    return line
+
+
+def _world_setting_line(setting: Any) -> str:
+    category = f"[{setting.category}] " if setting.category else ""
+    return f"- {category}{setting.setting_key}: {setting.setting_value or ''}"
+
+
+def build_novel_context(db: ContextDB, novel_id: int) -> Optional[str]:
+    """作品の前置きの本文を返します。作品が見つからない場合は None。"""
+    novel = db.read_novel(novel_id)
+    if novel is None:
+        return None
+    lines: List[str] = [f"# 作品: {novel.title}"]
+    if novel.author:
+        lines.append(f"作者: {novel.author}")
+    if novel.synopsis:
+        lines += ["", "## あらすじ", novel.synopsis]
+    characters = db.read_characters(novel_id)
+    if characters:
+        lines += ["", "## 登場人物"] + [_character_line(character) for character in characters]
+    settings = db.read_world_settings(novel_id)
+    if settings:
+        lines += ["", "## 世界設定"] + [_world_setting_line(setting) for setting in settings]
+    return "\n".join(lines)
+
+
+def register_novel_context(db: ContextDB, llm: Any, novel_id: int) -> Optional[Any]:
+    """作品の前置きを ``llm.register_context`` に登録し、``generate_text(context=...)`` に渡すハンドルを返します。
+
+    ``register_context`` を持たないクライアントや作品が見つからない場合は None を返し、
+    呼び出し側は前置きなしでプロンプトを送ります。
+    """
+    register = getattr(llm, "register_context", None)
+    if register is None:
+        return None
+    text = build_novel_context(db, novel_id)
+    if text is None:
+        return None
+    return register(novel_context_key(novel_id), text)
@@ -0,0 +1,102 @@
+"""話の本文を段落 (行) 単位でハッシュ化し、改稿前後の差分を取るモジュール。
+
+なろうの改稿は数行の修正であることが多いため、本文全体ではなく段落単位で比較し、
+変更のあった段落だけを後続の処理 (要約・チャンクの埋め込み等) の再実行対象にします。
+
+改稿履歴は「新しい本文から古い本文を復元する」逆方向の差分 (reverse delta) として保存します。
+最新の本文は ``Episode.content_cleaned`` にそのまま残るため、普段の読み出しは差分の適用を必要とせず、
+古い版が必要なときだけ新しい順に差分を当てて復元します。
+"""
+import difflib
+import hashlib
+import json
+from typing import Any, List, NamedTuple, Sequence, Tuple
+
+PARAGRAPH_SEPARATOR = "\n"
+HASH_BYTES = 8
+DELTA_FORMAT_VERSION = 1
+
+
+class Paragraph(NamedTuple):
+    position: int
+    content_hash: str
+    char_start: int
+    char_length: int
+
+
+class ParagraphDiff(NamedTuple):
+    """改稿前後の段落の差分。
+
+    Attributes:
+        opcodes: ``difflib.SequenceMatcher.get_opcodes`` のうち ``equal`` 以外のもの。
+        changed_positions: 新しい本文で変更・追加された段落の位置。
+        changed_chars: 変更・追加・削除された段落の文字数の合計 (新旧の多い方)。
+        total_chars: 新旧の本文のうち長い方の文字数。
+    """
+    opcodes: List[Tuple[str, int, int, int, int]]
+    changed_positions: List[int]
+    changed_chars: int
+    total_chars: int
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.opcodes)
+
+    @property
+    def changed_ratio(self) -> float:
+        return self.changed_chars / self.total_chars if self.total_chars else 0.0
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """本文を段落 (改行区切り) に分割します。``PARAGRAPH_SEPARATOR.join`` で元に戻ります。"""
+    return text.split(PARAGRAPH_SEPARATOR)
+
+
+def paragraph_hash(paragraph: str) -> str:
+    return hashlib.blake2b(paragraph.encode("utf-8"), digest_size=HASH_BYTES).hexdigest()
+
+
+def hash_paragraphs(text: str) -> List[Paragraph]:
+    """段落ごとのハッシュと本文中の位置を返します。"""
+    paragraphs = []
+    offset = 0
+    for position, paragraph in enumerate(split_paragraphs(text)):
+        paragraphs.append(Paragraph(position, paragraph_hash(paragraph), offset, len(paragraph)))
+        offset += len(paragraph) + len(PARAGRAPH_SEPARATOR)
+    return paragraphs
+
+
+def diff_paragraphs(old_hashes: Sequence[str], new_hashes: Sequence[str],
+                    old_paragraphs: Sequence[str], new_paragraphs: Sequence[str]) -> ParagraphDiff:
+    """段落ハッシュの列を比較し、変更のあった範囲を返します。"""
+    matcher = difflib.SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+    opcodes = [op for op in matcher.get_opcodes() if op[0] != "equal"]
+    changed_positions = []
+    changed_chars = 0
+    for _, i1, i2, j1, j2 in opcodes:
+        changed_positions.extend(range(j1, j2))
+        changed_chars += max(sum(len(p) for p in old_paragraphs[i1:i2]),
+                             sum(len(p) for p in new_paragraphs[j1:j2]))
+    total_chars = max(sum(len(p) for p in old_paragraphs), sum(len(p) for p in new_paragraphs))
+    return ParagraphDiff(opcodes, changed_positions, changed_chars, total_chars)
+
+
+def make_reverse_delta(diff: ParagraphDiff, old_paragraphs: Sequence[str]) -> str:
+    """新しい本文から古い本文を復元するための差分を JSON 文字列で返します。
+
+    各要素は ``[j1, j2, 古い段落のリスト]`` で、新しい段落 ``[j1:j2]`` を古い段落に置き換えます。
+    """
+    ops = [[j1, j2, list(old_paragraphs[i1:i2])] for _, i1, i2, j1, j2 in diff.opcodes]
+    return json.dumps({"v": DELTA_FORMAT_VERSION, "ops": ops}, ensure_ascii=False)
+
+
+def apply_reverse_delta(new_text: str, delta: str) -> str:
+    """``make_reverse_delta`` の差分を新しい本文に当て、古い本文を返します。"""
+    data: Any = json.loads(delta)
+    if data.get("v") != DELTA_FORMAT_VERSION:
+        raise ValueError(f"Unsupported delta format: {data.get('v')}")
+    paragraphs = split_paragraphs(new_text)
+    # 後ろの範囲から置き換えれば、前の範囲の位置はずれない
+    for j1, j2, old in reversed(data["ops"]):
+        paragraphs[j1:j2] = old
+    return PARAGRAPH_SEPARATOR.join(paragraphs)
@@ -0,0 +1,187 @@
+"""取り込み (スクレイピング→保存) と解析 (LLM要約) のパイプライン。"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from core import events, profiling
+from core.context_db import ContextDB
+from core.db_schemas import ProcessingStatus
+from core.logger_setup import setup_logger
+from core.novel_context import register_novel_context
+from scrapers.base_scraper import BaseScraper
+
+logger = setup_logger()
+
+NOVEL_METADATA_KEYS = ("title", "author", "platform", "tags", "synopsis")
+PUBLICATION_DATE_FORMAT = "%Y/%m/%d %H:%M"
+SUMMARY_PROMPT_TEMPLATE = "次の話を200字程度で要約してください。\n# {title}\n{content}"
+SUMMARY_GENERATION_KWARGS = {"temperature": 0.2}
+
+
+def parse_publication_date(date_str: Optional[str]) -> Optional[datetime]:
+    """目次の投稿日時文字列 (例: ``2023/04/01 18:00``) を datetime に変換します。"""
+    if not date_str:
+        return None
+    try:
+        return datetime.strptime(date_str, PUBLICATION_DATE_FORMAT)
+    except ValueError:
+        logger.warning("Unrecognized publication date format: %s", date_str)
+        return None
+
+
+def needs_fetch(episode: Any, revised_at: Optional[datetime]) -> bool:
+    """本文が未取得か、目次の改稿日時が保存済みの本文より新しい場合に True を返します。"""
+    if not episode.char_count:
+        return True
+    return revised_at is not None and (episode.revised_at is None or revised_at > episode.revised_at)
+
+
+def _store_episode_list(db: ContextDB, novel_url: str, metadata: Dict[str, Any],
+                        raw_episodes: List[Dict[str, Any]]) -> Tuple[Any, List[Any]]:
+    """作品と目次の全話を1トランザクションで登録し、(作品, 話のリスト) を返します。"""
+    defaults = {k: metadata[k] for k in NOVEL_METADATA_KEYS if k in metadata}
+    with db.transaction() as tx:
+        novel, _ = tx.upsert_novel(novel_url, **defaults)
+        episodes = []
+        for raw in raw_episodes:
+            episode, _ = tx.upsert_episode(
+                novel.id, raw["url"], episode_title=raw["title"], episode_number=raw["number"],
+                publication_date=parse_publication_date(raw.get("publication_date_str")))
+            episodes.append(episode)
+    return novel, episodes
+
+
+def ingest_novel(db: ContextDB, scraper: BaseScraper, novel_url: str,
+                 max_episodes: Optional[int] = None, refetch: bool = False,
+                 event_bus: Optional[events.EventBus] = None) -> Optional[int]:
+    """作品のメタデータと各話本文を取得して保存します。
+
+    Args:
+        db (ContextDB): 保存先のデータベース。
+        scraper (BaseScraper): 作品のプラットフォームに対応するスクレイパー。
+        novel_url (str): 作品トップページのURL。
+        max_episodes (Optional[int]): 本文を取得する最大話数。None なら全話。
+        refetch (bool): True の場合、本文取得済みの話も再取得します。False でも、目次で改稿された
+            (改稿日時が保存済みの本文より新しい) 話は再取得します。
+        event_bus (Optional[EventBus]): 指定時、本文が変わるたびに ``episode_stored`` を、
+            完了時に ``novel_synced`` を発行します。
+
+    Returns:
+        Optional[int]: 作品ID。メタデータ取得に失敗した場合は None。
+    """
+    with profiling.stage("parse"):
+        metadata = scraper.fetch_novel_metadata(novel_url)
+    if not metadata:
+        logger.error("Failed to fetch metadata, ingest aborted: %s", novel_url)
+        return None
+    raw_episodes = metadata.get("raw_episode_data", [])
+    try:
+        # 目次は1トランザクションで登録し、本文の取得は話ごとにコミットする
+        novel, episodes = _store_episode_list(db, novel_url, metadata, raw_episodes)
+    except Exception as e:
+        logger.error("Failed to store novel and episode list, ingest aborted: %s: %s", novel_url, e, exc_info=True)
+        return None
+
+    fetched = 0
+    for raw, episode in zip(raw_episodes, episodes):
+        if max_episodes is not None and fetched >= max_episodes:
+            break
+        revised_at = parse_publication_date(raw.get("update_time_str"))
+        if not refetch and not needs_fetch(episode, revised_at):
+            continue
+        with profiling.stage("parse"):
+            content = scraper.fetch_episode_content(raw["url"])
+        fetched += 1
+        if content is None:
+            continue
+        result = db.store_episode_content(episode.id, content, len(content), revised_at=revised_at)
+        if result and result.changed and event_bus is not None:
+            event_bus.publish(events.EPISODE_STORED, novel_id=novel.id, episode_id=episode.id,
+                              episode_number=episode.episode_number)
+    logger.info("Ingest finished: NovelID=%s, episodes fetched=%d", novel.id, fetched)
+    if event_bus is not None:
+        event_bus.publish(events.NOVEL_SYNCED, novel_id=novel.id, episodes_fetched=fetched)
+    return novel.id
+
+
+def analyze_novel(db: ContextDB, llm: Any, novel_id: int, limit: Optional[int] = None,
+                  event_bus: Optional[events.EventBus] = None) -> int:
+    """作品の未要約の話について LLM で要約を生成して保存します。
+
+    要約に失敗した話を ``PENDING`` に戻してから、``summarize_pending`` と同じく
+    ``claim_pending_episodes`` で取り出した話だけを要約するため、同時に動く ``summarize``
+    ワーカーと同じ話を二重に要約しません。
+
+    クライアントが ``register_context`` を持つ場合、作品の前置き (あらすじ・登場人物・世界設定) を
+    登録し、各話の呼び出しではそれを参照します。
+
+    Args:
+        db (ContextDB): 対象のデータベース。
+        llm (Any): ``generate_text(prompt, **kwargs)`` を持つクライアント (``LLMClient`` 等)。
+        novel_id (int): 作品ID。
+        limit (Optional[int]): 処理する最大話数。None なら全話。
+        event_bus (Optional[EventBus]): 指定時、要約の保存に成功した話ごとに ``summary_ready`` を発行します。
+
+    Returns:
+        int: 要約を試みた話数 (失敗を含む)。
+    """
+    db.requeue_failed_episodes(novel_id)
+    processed = summarize_pending(db, llm, novel_id=novel_id, limit=limit, event_bus=event_bus)
+    logger.info("Analysis finished: NovelID=%s, episodes summarized=%d", novel_id, processed)
+    return processed
+
+
+def _summarize_episode(db: ContextDB, llm: Any, episode: Any, novel_id: int,
+                       event_bus: Optional[events.EventBus], context: Any = None) -> None:
+    prompt = SUMMARY_PROMPT_TEMPLATE.format(
+        title=episode.episode_title or "", content=episode.content_cleaned)
+    kwargs = dict(SUMMARY_GENERATION_KWARGS, context=context) if context is not None else SUMMARY_GENERATION_KWARGS
+    with profiling.stage("llm"):
+        summary = llm.generate_text(prompt, **kwargs)
+    status = ProcessingStatus.FAILED if summary.startswith("Error:") else ProcessingStatus.COMPLETED
+    saved = db.update_episode_llm_results(episode.id, {
+        "summary_short": summary if status == ProcessingStatus.COMPLETED else None,
+        "summary_generation_status": status,
+    })
+    if saved and status == ProcessingStatus.COMPLETED and event_bus is not None:
+        event_bus.publish(events.SUMMARY_READY, novel_id=novel_id, episode_id=episode.id)
+
+
+def summarize_pending(db: ContextDB, llm: Any, novel_id: Optional[int] = None, batch_size: int = 10,
+                      limit: Optional[int] = None, event_bus: Optional[events.EventBus] = None) -> int:
+    """要約待ちの話をバッチ単位で取り出して要約します (複数ノードで同時に実行できます)。
+
+    ``ContextDB.claim_pending_episodes`` で取り出した話は他のワーカーからは見えなくなるため、
+    同じDBに対して何台起動しても1話を二重に要約しません。
+
+    Args:
+        db (ContextDB): 対象のデータベース。
+        llm (Any): ``generate_text(prompt, **kwargs)`` を持つクライアント。
+        novel_id (Optional[int]): 指定時、この作品の話だけを処理します。
+        batch_size (int): 1回に取り出す話数。
+        limit (Optional[int]): 処理する最大話数。None なら待ちがなくなるまで。
+        event_bus (Optional[EventBus]): 指定時、要約の保存に成功した話ごとに ``summary_ready`` を発行します。
+
+    Returns:
+        int: 要約を試みた話数 (失敗を含む)。
+    """
+    processed = 0
+    while limit is None or processed < limit:
+        size = batch_size if limit is None else min(batch_size, limit - processed)
+        claimed = db.claim_pending_episodes(size, novel_id=novel_id)
+        if not claimed:
+            break
+        done = 0
+        # 作品の前置きはバッチごとに登録し直す (内容が変わっていなければ登録済みのものが返る)
+        contexts: Dict[int, Any] = {}
+        try:
+            for episode in claimed:
+                if episode.novel_id not in contexts:
+                    contexts[episode.novel_id] = register_novel_context(db, llm, episode.novel_id)
+                _summarize_episode(db, llm, episode, episode.novel_id, event_bus, contexts[episode.novel_id])
+                done += 1
+        finally:
+            # 中断した場合も、未処理の話は他のワーカーが拾えるように戻す
+            db.release_episode_claims([e.id for e in claimed[done:]])
+            processed += done
+    logger.info("Pending summaries finished: episodes summarized=%d", processed)
+    return processed
@@ -1,46 +1,453 @@
-import importlib
+import ast
+import importlib.util
+import json
 import os
 import sys
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from core import events, metrics
 from core.logger_setup import setup_logger
 from core.base_plugin import BasePlugin
 
 logger = setup_logger()
 
+EXECUTOR_TYPES = ("thread", "process")
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_TIMEOUT_SEC = 60.0
+IDLE_POLL_INTERVAL_SEC = 0.05
+DEFAULT_MANIFEST_PATH = "data/plugin_manifest.json"
+MANIFEST_VERSION = 1
+
+# AST 上で core.events の定数名 (EPISODE_STORED 等) を使って購読イベントを書けるようにする
+_EVENT_CONSTANTS = {name: getattr(events, name) for name in ("EPISODE_STORED", "NOVEL_SYNCED", "SUMMARY_READY")}
+
+PLUGIN_LOAD_SECONDS = metrics.histogram(
+    "plugin_load_seconds", "Time to import and instantiate a plugin on first use.", label_names=("plugin",))
+
+
+class PluginSpec(NamedTuple):
+    """マニフェストに記録するプラグインの情報。import せずに購読イベントを判断するために使います。"""
+    name: str
+    path: str
+    class_name: Optional[str]
+    subscribed_events: Tuple[str, ...]
+    timeout_sec: Optional[float]
+
+
+class _DynamicAttribute(Exception):
+    """クラス属性がリテラルでなく、AST からは値を決められないことを示す。"""
+
+
+def _literal(node: ast.AST) -> Any:
+    if isinstance(node, ast.Name) and node.id in _EVENT_CONSTANTS:
+        return _EVENT_CONSTANTS[node.id]
+    if isinstance(node, ast.Attribute) and node.attr in _EVENT_CONSTANTS:
+        return _EVENT_CONSTANTS[node.attr]
+    if isinstance(node, (ast.Tuple, ast.List)):
+        return tuple(_literal(e) for e in node.elts)
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise _DynamicAttribute()
+
+
+def _is_base_plugin(node: ast.expr) -> bool:
+    return ((isinstance(node, ast.Name) and node.id == "BasePlugin")
+            or (isinstance(node, ast.Attribute) and node.attr == "BasePlugin"))
+
+
+def scan_plugin_source(source: str) -> Optional[Tuple[str, Tuple[str, ...], Optional[float]]]:
+    """プラグインのソースを import せずに解析し、エントリポイントのクラスを探します。
+
+    ``BasePlugin`` を直接継承した最初のクラスを対象にし、``subscribed_events`` と
+    ``timeout_sec`` がリテラル (または core.events の定数) であれば値を読み取ります。
+
+    Returns:
+        Optional[Tuple[str, Tuple[str, ...], Optional[float]]]: (クラス名, 購読イベント, タイムアウト)。
+        該当クラスがない場合や属性が動的な場合は None (import して調べる必要がある)。
+    """
+    for node in ast.parse(source).body:
+        if not isinstance(node, ast.ClassDef) or not any(_is_base_plugin(b) for b in node.bases):
+            continue
+        attrs: Dict[str, Any] = {}
+        for item in node.body:
+            if isinstance(item, ast.Assign):
+                targets, value = item.targets, item.value
+            elif isinstance(item, ast.AnnAssign) and item.value is not None:
+                targets, value = [item.target], item.value
+            else:
+                continue
+            for target in targets:
+                if isinstance(target, ast.Name) and target.id in ("subscribed_events", "timeout_sec"):
+                    try:
+                        attrs[target.id] = _literal(value)
+                    except _DynamicAttribute:
+                        return None
+        return node.name, tuple(attrs.get("subscribed_events", ())), attrs.get("timeout_sec")
+    return None
+
+
+def _import_plugin_module(name: str, path: str):
+    # sys.path を変更せず、ファイルパスから直接 import する
+    module = sys.modules.get(name)
+    if module is not None and os.path.abspath(getattr(module, "__file__", "") or "") == os.path.abspath(path):
+        return module
+    module_spec = importlib.util.spec_from_file_location(name, path)
+    if module_spec is None or module_spec.loader is None:
+        raise ImportError(f"Cannot load plugin from {path}")
+    module = importlib.util.module_from_spec(module_spec)
+    sys.modules[name] = module
+    try:
+        module_spec.loader.exec_module(module)
+    except BaseException:
+        sys.modules.pop(name, None)
+        raise
+    return module
+
+
+def _inspect_plugin_module(name: str, path: str) -> Optional[Tuple[str, Tuple[str, ...], Optional[float]]]:
+    # AST で判断できないプラグイン (間接継承や動的な属性) は一度だけ import して調べ、結果をマニフェストに残す
+    module = _import_plugin_module(name, path)
+    for attr in dir(module):
+        plugin_class = getattr(module, attr)
+        if isinstance(plugin_class, type) and issubclass(plugin_class, BasePlugin) and plugin_class is not BasePlugin:
+            return attr, tuple(plugin_class.subscribed_events), plugin_class.timeout_sec
+    return None
+
+
+def instantiate_plugin(spec: PluginSpec) -> BasePlugin:
+    """マニフェストの情報からプラグインを import してインスタンス化します。"""
+    module = _import_plugin_module(spec.name, spec.path)
+    return getattr(module, spec.class_name)()
+
+
+# プロセスプールのワーカー内で読み込んだプラグイン (ワーカーごとに初回のみ import する)
+_worker_plugins: Dict[str, BasePlugin] = {}
+
+
+def _invoke_plugin_spec(spec: PluginSpec, method_name: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+    # プロセスプールでも pickle できるよう、モジュールレベルの関数として呼び出す
+    plugin = _worker_plugins.get(spec.name)
+    if plugin is None:
+        plugin = _worker_plugins[spec.name] = instantiate_plugin(spec)
+    return getattr(plugin, method_name)(*args, **kwargs)
+
+
+class _PluginState:
+    """プラグインごとの配送状態。1つのプラグインは同時に1バッチだけ実行します。"""
+
+    def __init__(self):
+        self.lock = threading.RLock()  # 完了済み Future のコールバックは submit 中に同期実行されるため
+        self.future: Optional[Future] = None
+        self.started_at = 0.0
+        self.backlog: Dict[str, List[Any]] = {}
+        self.timed_out = False  # 実行中のバッチが時間切れになり、結果を破棄する予定か
+        self.timeouts = 0
+        self.failures = 0
+        self.batches = 0
+
+
 class PluginManager:
-    def __init__(self, plugin_directory="plugins"):
+    def __init__(self, plugin_directory="plugins", executor_type: str = "thread",
+                 max_workers: int = DEFAULT_MAX_WORKERS, default_timeout_sec: float = DEFAULT_TIMEOUT_SEC,
+                 manifest_path: Optional[str] = DEFAULT_MANIFEST_PATH):
+        if executor_type not in EXECUTOR_TYPES:
+            raise ValueError(f"Unknown executor type: {executor_type}. Choose from {', '.join(EXECUTOR_TYPES)}.")
         self.plugin_directory = plugin_directory
-        self.plugins = {}
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.default_timeout_sec = default_timeout_sec
+        self.manifest_path = manifest_path
+        self.manifest: Dict[str, PluginSpec] = {}
+        self.plugins: Dict[str, BasePlugin] = {}  # 読み込み済みのプラグインのみ
+        self._load_seconds: Dict[str, float] = {}
+        self._failed: Set[str] = set()
+        self._load_lock = threading.RLock()
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+        self._states: Dict[str, _PluginState] = {}
         self.load_plugins()
 
     def load_plugins(self):
+        """プラグインディレクトリを走査してマニフェストを更新します。プラグインの import は初回利用時まで遅延します。
+
+        マニフェストはファイルの更新時刻とサイズで無効化されるため、変更のないプラグインは
+        解析もしません。
+        """
         if not os.path.isdir(self.plugin_directory):
             logger.warning(f"Plugin directory {self.plugin_directory} does not exist.")
             return
 
-        sys.path.insert(0, self.plugin_directory)
-        for filename in os.listdir(self.plugin_directory):
-            if filename.endswith(".py") and filename != "__init__.py":
-                plugin_name = filename[:-3]
-                try:
-                    module = importlib.import_module(plugin_name)
-                    for attr in dir(module):
-                        plugin_class = getattr(module, attr)
-                        if isinstance(plugin_class, type) and issubclass(plugin_class, BasePlugin) and plugin_class is not BasePlugin:
-                            self.plugins[plugin_name] = plugin_class()
-                            logger.info(f"Loaded plugin: {plugin_name}")
-                except Exception as e:
-                    logger.error(f"Failed to load plugin {plugin_name}: {e}")
+        plugin_directory = os.path.abspath(self.plugin_directory)
+        cached = self._read_manifest(self._manifest_directory(plugin_directory))
+        entries = {}
+        changed = False
+        for filename in sorted(os.listdir(plugin_directory)):
+            if not filename.endswith(".py") or filename == "__init__.py":
+                continue
+            plugin_name = filename[:-3]
+            path = os.path.join(plugin_directory, filename)
+            stat = os.stat(path)
+            entry = cached.get(plugin_name)
+            if not entry or entry.get("mtime_ns") != stat.st_mtime_ns or entry.get("size") != stat.st_size:
+                entry = self._scan_plugin(plugin_name, path, stat)
+                changed = True
+            entries[plugin_name] = entry
+            if entry.get("class_name"):
+                self.manifest[plugin_name] = PluginSpec(
+                    plugin_name, path, entry["class_name"], tuple(entry["subscribed_events"]), entry["timeout_sec"])
+        if changed or set(entries) != set(cached):
+            self._write_manifest(self._manifest_directory(plugin_directory), entries)
+        logger.info("Discovered %d plugins in %s", len(self.manifest), self.plugin_directory)
+
+    def _scan_plugin(self, plugin_name: str, path: str, stat: os.stat_result) -> Dict[str, Any]:
+        found = None
+        try:
+            with open(path, encoding="utf-8") as f:
+                found = scan_plugin_source(f.read())
+            if found is None:
+                found = _inspect_plugin_module(plugin_name, path)
+        except Exception as e:
+            logger.error(f"Failed to scan plugin {plugin_name}: {e}")
+        class_name, subscribed, timeout = found or (None, (), None)
+        return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "class_name": class_name,
+                "subscribed_events": list(subscribed), "timeout_sec": timeout}
+
+    def _manifest_directory(self, plugin_directory: str) -> str:
+        # 絶対パスを書くとチェックアウトの場所に依存するため、マニフェストからの相対パスで記録する
+        if not self.manifest_path:
+            return plugin_directory
+        try:
+            relative = os.path.relpath(plugin_directory, os.path.dirname(os.path.abspath(self.manifest_path)))
+        except ValueError:  # Windows で別ドライブの場合
+            return plugin_directory
+        return relative.replace(os.sep, "/")
+
+    def _read_manifest(self, plugin_directory: str) -> Dict[str, Dict[str, Any]]:
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable plugin manifest {self.manifest_path}: {e}")
+            return {}
+        if data.get("version") != MANIFEST_VERSION or data.get("plugin_directory") != plugin_directory:
+            return {}
+        return data.get("plugins", {})
+
+    def _write_manifest(self, plugin_directory: str, entries: Dict[str, Dict[str, Any]]) -> None:
+        if not self.manifest_path:
+            return
+        data = {"version": MANIFEST_VERSION, "plugin_directory": plugin_directory, "plugins": entries}
+        tmp_path = f"{self.manifest_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            logger.warning(f"Failed to write plugin manifest {self.manifest_path}: {e}")
 
     def get_plugin(self, plugin_name):
-        return self.plugins.get(plugin_name)
+        """プラグインを返します。初回呼び出し時に import とインスタンス化を行います。"""
+        plugin = self.plugins.get(plugin_name)
+        if plugin is not None:
+            return plugin
+        spec = self.manifest.get(plugin_name)
+        if spec is None:
+            return None
+        with self._load_lock:
+            if plugin_name in self.plugins or plugin_name in self._failed:
+                return self.plugins.get(plugin_name)
+            start = time.perf_counter()
+            try:
+                plugin = instantiate_plugin(spec)
+            except Exception as e:
+                self._failed.add(plugin_name)
+                logger.error(f"Failed to load plugin {plugin_name}: {e}")
+                return None
+            elapsed = time.perf_counter() - start
+            self._load_seconds[plugin_name] = elapsed
+            PLUGIN_LOAD_SECONDS.observe(elapsed, plugin=plugin_name)
+            self.plugins[plugin_name] = plugin
+            logger.info("Loaded plugin: %s (%.1fms)", plugin_name, elapsed * 1000)
+            return plugin
+
+    def load_times(self) -> Dict[str, float]:
+        """読み込み済みプラグインごとの import とインスタンス化にかかった時間 (秒) を返します。"""
+        return dict(self._load_seconds)
+
+    def subscribed_events(self) -> Set[str]:
+        """いずれかのプラグインが購読しているイベント種別を返します (プラグインは import しません)。"""
+        return {e for spec in self.manifest.values() for e in spec.subscribed_events}
+
+    def _get_executor(self) -> Executor:
+        with self._executor_lock:
+            if self._executor is None:
+                if self.executor_type == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix="plugin")
+            return self._executor
+
+    def _call_plugin(self, plugin_name: str, method_name: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        # スレッドプール用。初回の import もワーカー側で行い、呼び出し元を待たせない
+        plugin = self.get_plugin(plugin_name)
+        if plugin is None:
+            raise RuntimeError(f"Plugin {plugin_name} could not be loaded")
+        return getattr(plugin, method_name)(*args, **kwargs)
+
+    def _submit_call(self, plugin_name: str, method_name: str, args: Tuple[Any, ...],
+                     kwargs: Dict[str, Any]) -> Future:
+        executor = self._get_executor()
+        if self.executor_type == "process":
+            return executor.submit(_invoke_plugin_spec, self.manifest[plugin_name], method_name, args, kwargs)
+        return executor.submit(self._call_plugin, plugin_name, method_name, args, kwargs)
+
+    def _timeout_for(self, plugin_name: str) -> float:
+        timeout = self.manifest[plugin_name].timeout_sec
+        return self.default_timeout_sec if timeout is None else timeout
 
     def execute_plugin(self, plugin_name, *args, **kwargs):
+        """プラグインを実行して戻り値を返します。
+
+        ``timeout_sec`` を持つプラグインはプールで実行し、時間内に終わらなければ None を返します。
+        見つからない場合や例外が発生した場合も None を返します。
+        """
         plugin = self.get_plugin(plugin_name)
         if plugin:
             try:
-                plugin.execute(*args, **kwargs)
+                if plugin.timeout_sec is None:
+                    result = plugin.execute(*args, **kwargs)
+                else:
+                    future = self._submit_call(plugin_name, "execute", args, kwargs)
+                    result = future.result(timeout=plugin.timeout_sec)
                 logger.info(f"Executed plugin: {plugin_name}")
+                return result
+            except FutureTimeoutError:
+                logger.error(f"Plugin {plugin_name} timed out after {plugin.timeout_sec}s")
             except Exception as e:
                 logger.error(f"Failed to execute plugin {plugin_name}: {e}")
         else:
             logger.warning(f"Plugin {plugin_name} not found.")
+        return None
+
+    # --- イベント配送 ---
+    def subscribers(self, event_name: str) -> List[str]:
+        """イベント種別を購読しているプラグイン名を返します。"""
+        return [name for name, spec in self.manifest.items() if event_name in spec.subscribed_events]
+
+    def attach(self, event_bus) -> None:
+        """プラグインが購読するイベント種別を EventBus に登録します。"""
+        for event_name in sorted(self.subscribed_events()):
+            event_bus.subscribe(event_name, self.deliver)
+
+    def deliver(self, event_name: str, events) -> None:
+        """イベントのバッチを購読プラグインへ非同期に配送します (呼び出し側はブロックしません)。
+
+        同じバッチを全購読プラグインで共有します。実行中のプラグインには次のバッチを
+        積んでおき、完了後にまとめて1回で渡します。
+        """
+        self._check_timeouts()
+        for plugin_name in self.subscribers(event_name):
+            state = self._states.setdefault(plugin_name, _PluginState())
+            with state.lock:
+                if state.future is not None:
+                    state.backlog.setdefault(event_name, []).extend(events)
+                    continue
+                self._submit_batch(plugin_name, state, event_name, tuple(events))
+
+    def _submit_batch(self, plugin_name: str, state: _PluginState, event_name: str, events) -> None:
+        # state.lock を保持した状態で呼ぶこと
+        state.started_at = time.monotonic()
+        state.timed_out = False
+        state.batches += 1
+        future = self._submit_call(plugin_name, "handle_events", (event_name, events), {})
+        state.future = future
+        future.add_done_callback(lambda f, name=plugin_name: self._on_batch_done(name, f))
+
+    def _on_batch_done(self, plugin_name: str, future: Future) -> None:
+        state = self._states[plugin_name]
+        if not future.cancelled() and future.exception() is not None:
+            state.failures += 1
+            logger.error("Plugin %s failed while handling events: %s", plugin_name, future.exception())
+        with state.lock:
+            if state.future is not future:
+                return
+            if state.timed_out:
+                logger.warning("Plugin %s finished a timed-out batch after %.1fs; resuming delivery",
+                               plugin_name, time.monotonic() - state.started_at)
+            state.future = None
+            if state.backlog:
+                event_name = next(iter(state.backlog))
+                events = tuple(state.backlog.pop(event_name))
+                self._submit_batch(plugin_name, state, event_name, events)
+
+    def _check_timeouts(self) -> None:
+        now = time.monotonic()
+        for plugin_name, state in list(self._states.items()):
+            timeout = self._timeout_for(plugin_name)
+            with state.lock:
+                if state.future is None or state.timed_out or now - state.started_at <= timeout:
+                    continue
+                # 実行中のスレッド・プロセスは止められないため、終わるまでプラグインは実行中のままにし、
+                # 次のバッチは積んでおく (同じプラグインを並行に実行せず、ワーカーも1つしか占有しない)
+                state.timed_out = True
+                state.timeouts += 1
+                logger.error("Plugin %s timed out after %ss; holding its next batches until it returns",
+                             plugin_name, timeout)
+
+    def wait_idle(self, timeout_sec: Optional[float] = None) -> bool:
+        """配送済みのバッチがすべて完了するまで待ちます。
+
+        時間切れになったバッチも、実際に終わるまでは完了とみなしません。止まったプラグインが
+        あると戻らないため、終了処理では ``timeout_sec`` を指定してください。
+
+        Returns:
+            bool: 全プラグインが待機状態になれば True、``timeout_sec`` を過ぎたら False。
+        """
+        deadline = None if timeout_sec is None else time.monotonic() + timeout_sec
+        while True:
+            self._check_timeouts()
+            if all(state.future is None and not state.backlog for state in self._states.values()):
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(IDLE_POLL_INTERVAL_SEC)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """プラグインごとの配送バッチ数・失敗数・タイムアウト数を返します。"""
+        return {name: {"batches": s.batches, "failures": s.failures, "timeouts": s.timeouts}
+                for name, s in self._states.items()}
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """実行プールを停止します。
+
+        Args:
+            wait (bool): 実行中のバッチが終わるまで待つか。
+            cancel_futures (bool): 開始前のバッチを破棄します。プロセスプールでは実行中のワーカーも
+                終了させます (止まったプラグインを残して終了する場合に使います)。
+        """
+        if cancel_futures:
+            # 止まったバッチが後から終わっても、積んであるバッチを新しいプールで再開しないようにする
+            for state in list(self._states.values()):
+                with state.lock:
+                    state.backlog.clear()
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        if cancel_futures and isinstance(executor, ProcessPoolExecutor):
+            # 止まったワーカーは終了時の join を塞ぐため、ここで終了させる
+            for process in list((getattr(executor, "_processes", None) or {}).values()):
+                process.terminate()
+        if sys.version_info >= (3, 9):
+            executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+        else:
+            executor.shutdown(wait=wait)
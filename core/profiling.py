@@ -0,0 +1,210 @@
+"""パイプラインのステージ別プロファイリング。
+
+``stage("scrape")`` などでホットパスに目印を付けておき、``PipelineProfiler`` の実行中だけ
+ステージごとの経過時間とサンプルを集計します。プロファイラが動いていないときの
+``stage()`` はフラグ確認1回で戻ります。
+
+出力:
+    - ``profile.pstats``: cProfile の生データ (snakeviz 等で閲覧可能)
+    - ``profile.collapsed``: ステージを根とした折りたたみスタック (flamegraph.pl / speedscope 互換)
+    - ``profile_summary.txt``: ステージ別時間と上位N関数のサマリ
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter as CounterDict
+from typing import Any, Dict, List, Optional
+
+from core.logger_setup import setup_logger
+
+logger = setup_logger()
+
+STAGES = ("scrape", "parse", "store", "llm")
+UNTAGGED_STAGE = "other"
+DEFAULT_SAMPLE_INTERVAL_SEC = 0.005
+DEFAULT_TOP_N = 30
+PROFILE_MODES = ("both", "cprofile", "sampling")
+
+_active_profiler: Optional["PipelineProfiler"] = None
+# スレッドID -> [ステージ名, 開始時刻, 子ステージの経過時間] のスタック
+_stage_stacks: Dict[int, List[List[Any]]] = {}
+
+
+class _NullStage:
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    def __init__(self, profiler: "PipelineProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> "_Stage":
+        stack = _stage_stacks.setdefault(threading.get_ident(), [])
+        stack.append([self.name, time.perf_counter(), 0.0])
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        stack = _stage_stacks.get(threading.get_ident())
+        if not stack:
+            return False
+        name, start, child_time = stack.pop()
+        elapsed = time.perf_counter() - start
+        # 入れ子のステージは内側に計上し、外側には自身の時間だけを残す
+        self.profiler._add_stage_time(name, elapsed - child_time)
+        if stack:
+            stack[-1][2] += elapsed
+        return False
+
+
+def stage(name: str) -> Any:
+    """処理区間にステージ名を付けるコンテキストマネージャを返します。
+
+    Args:
+        name (str): ステージ名 (``scrape``, ``parse``, ``store``, ``llm`` 等)。
+            入れ子の場合は内側のステージが優先されます。
+
+    Returns:
+        Any: コンテキストマネージャ。プロファイラ停止中は何もしません。
+    """
+    profiler = _active_profiler
+    if profiler is None:
+        return _NULL_STAGE
+    return _Stage(profiler, name)
+
+
+def current_stage(thread_id: int) -> str:
+    """指定スレッドで現在実行中のステージ名を返します。"""
+    stack = _stage_stacks.get(thread_id)
+    return stack[-1][0] if stack else UNTAGGED_STAGE
+
+
+class PipelineProfiler:
+    """cProfile とサンプリングを組み合わせ、ステージ別にプロファイルを取るクラス。
+
+    使用例:
+        with PipelineProfiler("data/profiles/ingest") as profiler:
+            ingest_novel(...)
+        print(profiler.summary_text)
+    """
+
+    def __init__(self, output_dir: str, mode: str = "both",
+                 sample_interval_sec: float = DEFAULT_SAMPLE_INTERVAL_SEC, top_n: int = DEFAULT_TOP_N):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}. Choose from {', '.join(PROFILE_MODES)}.")
+        self.output_dir = output_dir
+        self.mode = mode
+        self.sample_interval_sec = sample_interval_sec
+        self.top_n = top_n
+        self.stage_seconds: Dict[str, float] = {}
+        self.stage_samples: CounterDict = CounterDict()
+        self.stacks: CounterDict = CounterDict()
+        self.summary_text = ""
+        self._profile: Optional[cProfile.Profile] = None
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._target_thread_id = threading.get_ident()
+        self._lock = threading.Lock()
+        self._started_at = 0.0
+        self.wall_seconds = 0.0
+
+    def __enter__(self) -> "PipelineProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.stop()
+        return False
+
+    def _add_stage_time(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+
+    def start(self) -> None:
+        """プロファイリングを開始します。同時に有効にできるプロファイラは1つです。"""
+        global _active_profiler
+        if _active_profiler is not None:
+            raise RuntimeError("Another PipelineProfiler is already running.")
+        _active_profiler = self
+        self._target_thread_id = threading.get_ident()
+        self._started_at = time.perf_counter()
+        if self.mode in ("both", "sampling"):
+            self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+            self._sampler.start()
+        if self.mode in ("both", "cprofile"):
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self) -> None:
+        """プロファイリングを停止し、結果ファイルを書き出します。"""
+        global _active_profiler
+        if self._profile is not None:
+            self._profile.disable()
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.wall_seconds = time.perf_counter() - self._started_at
+        _active_profiler = None
+        self._write_outputs()
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.sample_interval_sec):
+            frame = sys._current_frames().get(self._target_thread_id)
+            if frame is None:
+                continue
+            stage_name = current_stage(self._target_thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            frames.append(f"stage:{stage_name}")
+            self.stacks[";".join(reversed(frames))] += 1
+            self.stage_samples[stage_name] += 1
+
+    def _write_outputs(self) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        lines = [f"Wall time: {self.wall_seconds:.3f}s (mode={self.mode})", "", "Time by stage:"]
+        total_tagged = sum(self.stage_seconds.values())
+        lines.append(f"  {'stage':<10} {'seconds':>10} {'share':>7} {'samples':>8}")
+        for name in list(STAGES) + sorted(set(self.stage_seconds) - set(STAGES)):
+            seconds = self.stage_seconds.get(name, 0.0)
+            share = seconds / self.wall_seconds * 100 if self.wall_seconds else 0.0
+            lines.append(f"  {name:<10} {seconds:>10.3f} {share:>6.1f}% {self.stage_samples.get(name, 0):>8}")
+        untagged = max(0.0, self.wall_seconds - total_tagged)
+        lines.append(f"  {UNTAGGED_STAGE:<10} {untagged:>10.3f} "
+                     f"{(untagged / self.wall_seconds * 100 if self.wall_seconds else 0.0):>6.1f}% "
+                     f"{self.stage_samples.get(UNTAGGED_STAGE, 0):>8}")
+
+        if self.stacks:
+            collapsed_path = os.path.join(self.output_dir, "profile.collapsed")
+            with open(collapsed_path, "w", encoding="utf-8") as f:
+                for stack, count in sorted(self.stacks.items()):
+                    f.write(f"{stack} {count}\n")
+            lines.extend(["", f"Flamegraph input (collapsed stacks): {collapsed_path}"])
+
+        if self._profile is not None:
+            pstats_path = os.path.join(self.output_dir, "profile.pstats")
+            self._profile.dump_stats(pstats_path)
+            buffer = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=buffer)
+            stats.sort_stats("cumulative").print_stats(self.top_n)
+            stats.sort_stats("tottime").print_stats(self.top_n)
+            lines.extend(["", f"cProfile data: {pstats_path}", buffer.getvalue()])
+
+        self.summary_text = "\n".join(lines)
+        summary_path = os.path.join(self.output_dir, "profile_summary.txt")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write(self.summary_text)
+        logger.info("Profile written to %s", self.output_dir)
@@ -0,0 +1,432 @@
+"""リーダー向けの読み取り専用 HTTP API。
+
+asyncio のストリームで HTTP/1.1 (keep-alive) を話す小さなサーバーで、``ContextDB`` の軽量な行
+(``core.read_models``) を JSON にして返します。
+
+- 応答は描画した時点で本文のハッシュから ETag を求め、gzip 版とともに ``ResponseCache`` (LRU) に保持します。
+  作品の応答には ``updated_at`` が含まれるため、作品が更新されれば ETag も変わります。
+  同じ URL への要求は ``cache_ttl_sec`` の間 DB を読まずに返し、``If-None-Match`` が一致すれば 304 を返します。
+- 同じ URL の描画が同時に来た場合は1回だけ描画し、結果を共有します。
+- 一覧は話数 (作品一覧は ID) によるキーセットページングで、応答の ``next`` (``?after=<最後の番号>&limit=<件数>``)
+  で次のページを読みます。
+- DB の読み取り・JSON の描画・圧縮はスレッドプールで行い、イベントループを止めません。
+
+エンドポイント (GET / HEAD のみ):
+    /novels
+    /novels/{novel_id}
+    /novels/{novel_id}/episodes
+    /novels/{novel_id}/episodes/{episode_number}
+    /novels/{novel_id}/summaries
+    /novels/{novel_id}/characters
+    /novels/{novel_id}/characters/{character_id}
+    /novels/{novel_id}/world-settings
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from core import metrics
+from core.context_db import ContextDB
+from core.logger_setup import setup_logger
+
+logger = setup_logger()
+
+REQUESTS_TOTAL = metrics.counter(
+    "read_api_requests_total", "Read API responses by route and status.", label_names=("route", "status"))
+REQUEST_SECONDS = metrics.histogram(
+    "read_api_request_seconds", "Latency of read API requests.", label_names=("route",))
+CACHE_TOTAL = metrics.counter(
+    "read_api_cache_total", "Read API response cache lookups (hit, miss, shared).", label_names=("outcome",))
+
+DEFAULT_WORKERS = 4
+DEFAULT_CACHE_ENTRIES = 2048
+DEFAULT_CACHE_TTL_SEC = 30.0
+DEFAULT_GZIP_MIN_BYTES = 1024
+DEFAULT_PAGE_SIZE = 50
+DEFAULT_MAX_PAGE_SIZE = 200
+MAX_HEADER_BYTES = 16 * 1024
+GZIP_LEVEL = 6
+
+_STATUS_TEXT = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+                405: "Method Not Allowed", 431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+_ROUTES = (
+    ("novels", re.compile(r"/novels")),
+    ("novel", re.compile(r"/novels/(\d+)")),
+    ("episodes", re.compile(r"/novels/(\d+)/episodes")),
+    ("episode", re.compile(r"/novels/(\d+)/episodes/(\d+)")),
+    ("summaries", re.compile(r"/novels/(\d+)/summaries")),
+    ("characters", re.compile(r"/novels/(\d+)/characters")),
+    ("character", re.compile(r"/novels/(\d+)/characters/(\d+)")),
+    ("world_settings", re.compile(r"/novels/(\d+)/world-settings")),
+)
+
+
+class ApiError(Exception):
+    """要求を処理できないことを表す例外。``status`` がそのまま応答のステータスになります。"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class RenderedView(NamedTuple):
+    """描画済みの応答。本文・gzip 版・ETag は描画時に一度だけ求めます。"""
+    status: int
+    body: bytes
+    gzip_body: Optional[bytes]
+    etag: str
+    rendered_at: float
+
+
+class Response(NamedTuple):
+    status: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+
+
+class ResponseCache:
+    """描画済みの応答を URL ごとに保持する LRU キャッシュ。
+
+    ``ttl_sec`` を過ぎたものは返さず、呼び出し側で描画し直します。イベントループのスレッドからだけ
+    触るため、ロックは取りません。
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES, ttl_sec: float = DEFAULT_CACHE_TTL_SEC):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self._entries: "OrderedDict[str, RenderedView]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[RenderedView]:
+        view = self._entries.get(key)
+        if view is None:
+            return None
+        if time.monotonic() - view.rendered_at >= self.ttl_sec:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return view
+
+    def put(self, key: str, view: RenderedView) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = view
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _int_param(query: Dict[str, List[str]], name: str) -> Optional[int]:
+    values = query.get(name)
+    if not values:
+        return None
+    try:
+        return int(values[-1])
+    except ValueError:
+        raise ApiError(400, f"Query parameter '{name}' must be an integer")
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match は弱い比較 (W/ を外して比べる)
+    tag = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or (candidate[2:] if candidate.startswith("W/") else candidate) == tag:
+            return True
+    return False
+
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for token in (accept_encoding or "").split(","):
+        name, _, params = token.partition(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def _error_view(status: int, message: str) -> RenderedView:
+    body = json.dumps({"error": message}).encode("utf-8")
+    return RenderedView(status, body, None, f'W/"{hashlib.sha1(body).hexdigest()[:20]}"', time.monotonic())
+
+
+def _parse_head(head: bytes) -> Optional[Tuple[str, str, str, Dict[str, str]]]:
+    try:
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, version = lines[0].split(" ")
+    except ValueError:
+        return None
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(":")
+        if not sep:
+            return None
+        headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+class ReadAPI:
+    """``ContextDB`` の内容をリーダー向けに返す読み取り専用の HTTP API。
+
+    Args:
+        db (ContextDB): 読み取り元のデータベース。
+        workers (int): DB の読み取りと描画を行うスレッド数。
+        cache_entries (int): 応答キャッシュに保持する URL 数。0 でキャッシュしません。
+        cache_ttl_sec (float): キャッシュした応答を DB を読まずに返す秒数。
+        gzip_min_bytes (int): これ以上の大きさの応答だけ gzip 版を用意します。
+        page_size (int): ``limit`` を省略した一覧の件数。
+        max_page_size (int): ``limit`` の上限。
+    """
+
+    def __init__(self, db: ContextDB, workers: int = DEFAULT_WORKERS,
+                 cache_entries: int = DEFAULT_CACHE_ENTRIES, cache_ttl_sec: float = DEFAULT_CACHE_TTL_SEC,
+                 gzip_min_bytes: int = DEFAULT_GZIP_MIN_BYTES, page_size: int = DEFAULT_PAGE_SIZE,
+                 max_page_size: int = DEFAULT_MAX_PAGE_SIZE):
+        self.db = db
+        self.cache = ResponseCache(cache_entries, cache_ttl_sec)
+        self.gzip_min_bytes = gzip_min_bytes
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="read-api")
+        self._inflight: Dict[str, "asyncio.Future[RenderedView]"] = {}
+        self._handlers = {
+            "novels": self._novels, "novel": self._novel, "episodes": self._episodes, "episode": self._episode,
+            "summaries": self._summaries, "characters": self._characters, "character": self._character,
+            "world_settings": self._world_settings,
+        }
+
+    # --- 描画 (スレッドプールで実行する) ---
+    def render(self, route: Optional[str], args: Tuple[int, ...], query: Dict[str, List[str]]) -> RenderedView:
+        """URL の内容を DB から読んで JSON に描画します。"""
+        try:
+            if route is None:
+                raise ApiError(404, "Not found")
+            payload = self._handlers[route](*args, query=query)
+            status = 200
+        except ApiError as e:
+            payload, status = {"error": str(e)}, e.status
+        except Exception as e:
+            logger.error("Read API failed to render %s%s: %s", route, args, e, exc_info=True)
+            payload, status = {"error": "Internal server error"}, 500
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+        gzip_body = gzip.compress(body, GZIP_LEVEL) if len(body) >= self.gzip_min_bytes else None
+        etag = f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+        return RenderedView(status, body, gzip_body, etag, time.monotonic())
+
+    def _page(self, query: Dict[str, List[str]]) -> Tuple[Optional[int], int]:
+        after = _int_param(query, "after")
+        limit = _int_param(query, "limit")
+        return after, min(max(limit if limit is not None else self.page_size, 1), self.max_page_size)
+
+    @staticmethod
+    def _paginated(path: str, rows: List[Any], limit: int, cursor_field: str) -> Dict[str, Any]:
+        # 1件多く読み、次のページがあるかを判定する
+        items = rows[:limit]
+        next_url = None
+        if len(rows) > limit:
+            next_url = f"{path}?{urlencode({'after': getattr(items[-1], cursor_field), 'limit': limit})}"
+        return {"items": [row._asdict() for row in items], "next": next_url}
+
+    def _require_novel(self, novel_id: int) -> Any:
+        novel = self.db.read_novel(novel_id)
+        if novel is None:
+            raise ApiError(404, f"Novel {novel_id} not found")
+        return novel
+
+    def _novels(self, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        after, limit = self._page(query)
+        return self._paginated("/novels", self.db.read_novels(after_id=after, limit=limit + 1), limit, "id")
+
+    def _novel(self, novel_id: int, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        novel = self._require_novel(novel_id)._asdict()
+        novel["episode_count"] = self.db.count_episodes(novel_id)
+        return novel
+
+    def _episodes(self, novel_id: int, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        after, limit = self._page(query)
+        rows = self.db.read_episodes(novel_id, start_num=after + 1 if after is not None else None, limit=limit + 1)
+        if not rows and after is None:
+            self._require_novel(novel_id)
+        return self._paginated(f"/novels/{novel_id}/episodes", rows, limit, "episode_number")
+
+    def _episode(self, novel_id: int, episode_number: int, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        rows = self.db.read_episode_texts(novel_id, start_num=episode_number, end_num=episode_number)
+        if not rows:
+            raise ApiError(404, f"Episode {episode_number} of novel {novel_id} not found")
+        return rows[0]._asdict()
+
+    def _summaries(self, novel_id: int, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        after, limit = self._page(query)
+        rows = self.db.read_episode_summaries(
+            novel_id, start_num=after + 1 if after is not None else None, limit=limit + 1)
+        if not rows and after is None:
+            self._require_novel(novel_id)
+        return self._paginated(f"/novels/{novel_id}/summaries", rows, limit, "episode_number")
+
+    def _characters(self, novel_id: int, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        rows = self.db.read_characters(novel_id)
+        if not rows:
+            self._require_novel(novel_id)
+        return {"items": [row._asdict() for row in rows]}
+
+    def _character(self, novel_id: int, character_id: int, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        character = self.db.read_character(character_id)
+        if character is None or character.novel_id != novel_id:
+            raise ApiError(404, f"Character {character_id} of novel {novel_id} not found")
+        return character._asdict()
+
+    def _world_settings(self, novel_id: int, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        rows = self.db.read_world_settings(novel_id)
+        if not rows:
+            self._require_novel(novel_id)
+        return {"items": [row._asdict() for row in rows]}
+
+    # --- HTTP ---
+    @staticmethod
+    def _match(path: str) -> Tuple[Optional[str], Tuple[int, ...]]:
+        path = path.rstrip("/") or "/"
+        for route, pattern in _ROUTES:
+            match = pattern.fullmatch(path)
+            if match:
+                return route, tuple(int(v) for v in match.groups())
+        return None, ()
+
+    async def respond(self, method: str, target: str, headers: Dict[str, str]) -> Response:
+        """1件の要求に対する応答を返します。
+
+        Args:
+            method (str): HTTP メソッド。
+            target (str): パスとクエリ文字列。
+            headers (Dict[str, str]): 小文字のヘッダー名から値への辞書。
+        """
+        started = time.perf_counter()
+        parts = urlsplit(target)
+        route, args = self._match(parts.path)
+        if method not in ("GET", "HEAD"):
+            view = _error_view(405, "Only GET and HEAD are supported")
+        else:
+            query = parse_qs(parts.query)
+            key = f"{route}{args}?{urlencode(sorted(query.items()), doseq=True)}"
+            view = await self._view(key, route, args, query)
+        response = self._to_response(view, headers, head=method == "HEAD")
+        route_label = route or "unknown"
+        REQUESTS_TOTAL.inc(route=route_label, status=str(response.status))
+        REQUEST_SECONDS.observe(time.perf_counter() - started, route=route_label)
+        return response
+
+    async def _view(self, key: str, route: Optional[str], args: Tuple[int, ...],
+                    query: Dict[str, List[str]]) -> RenderedView:
+        view = self.cache.get(key)
+        if view is not None:
+            CACHE_TOTAL.inc(outcome="hit")
+            return view
+        pending = self._inflight.get(key)
+        if pending is not None:
+            CACHE_TOTAL.inc(outcome="shared")
+            return await asyncio.shield(pending)
+        CACHE_TOTAL.inc(outcome="miss")
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self.render, route, args, query)
+        self._inflight[key] = future
+        try:
+            view = await asyncio.shield(future)
+        finally:
+            del self._inflight[key]
+        if view.status == 200:
+            self.cache.put(key, view)
+        return view
+
+    @staticmethod
+    def _to_response(view: RenderedView, headers: Dict[str, str], head: bool = False) -> Response:
+        response_headers = [("ETag", view.etag), ("Cache-Control", "no-cache"), ("Vary", "Accept-Encoding")]
+        if view.status == 200 and _etag_matches(headers.get("if-none-match"), view.etag):
+            return Response(304, response_headers, b"")
+        body = view.body
+        if view.gzip_body is not None and _accepts_gzip(headers.get("accept-encoding")):
+            body = view.gzip_body
+            response_headers.append(("Content-Encoding", "gzip"))
+        response_headers += [("Content-Type", "application/json; charset=utf-8"), ("Content-Length", str(len(body)))]
+        return Response(view.status, response_headers, b"" if head else body)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break  # クライアントが接続を閉じた
+                except asyncio.LimitOverrunError:
+                    self._write(writer, self._to_response(
+                        _error_view(431, "Request headers too large"), {}), keep_alive=False)
+                    break
+                request = _parse_head(head)
+                if request is None:
+                    self._write(writer, self._to_response(_error_view(400, "Malformed request"), {}),
+                                keep_alive=False)
+                    break
+                method, target, version, headers = request
+                # 本文付きの要求は読まずに 405 を返し、接続を閉じる
+                has_body = "content-length" in headers or "transfer-encoding" in headers
+                connection = headers.get("connection", "").lower()
+                keep_alive = not has_body and (
+                    connection == "keep-alive" if version == "HTTP/1.0" else connection != "close")
+                response = await self.respond(method, target, headers)
+                self._write(writer, response, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _write(writer: asyncio.StreamWriter, response: Response, keep_alive: bool) -> None:
+        lines = [f"HTTP/1.1 {response.status} {_STATUS_TEXT.get(response.status, '')}"]
+        lines += [f"{name}: {value}" for name, value in response.headers]
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + response.body)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        """待ち受けを開始したサーバーを返します (``port=0`` で空いているポートを使います)。"""
+        server = await asyncio.start_server(self._handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        address = server.sockets[0].getsockname()
+        logger.info("Read API listening on http://%s:%s/novels", address[0], address[1])
+        return server
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 8080) -> None:
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
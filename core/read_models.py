@@ -0,0 +1,118 @@
+"""読み取り専用の軽量な行モデル。
+
+プロンプト生成・エクスポート・プラグインなど読むだけの処理では、ORM インスタンス
+(identity map への登録、属性の計装、リレーション) は不要です。ここで定義する NamedTuple は
+``select()`` で必要な列だけを読み、結果の行をそのまま詰めたもので、セッションに依存しません。
+
+各モデルのフィールド名は元テーブルの列名と同じで、``READ_MODEL_COLUMNS`` に読み出す列を
+フィールドの順に定義します。
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Type
+
+from sqlalchemy import select
+from sqlalchemy.sql import Select
+
+from core.db_schemas import Character, Episode, EpisodeChunk, Novel, ProcessingStatus, WorldSetting
+
+
+class NovelRow(NamedTuple):
+    id: int
+    title: str
+    author: Optional[str]
+    url: str
+    platform: Optional[str]
+    synopsis: Optional[str]
+    updated_at: Optional[datetime]
+
+
+class EpisodeRow(NamedTuple):
+    """本文を含まない話の一覧用の行。"""
+    id: int
+    novel_id: int
+    episode_number: Optional[int]
+    episode_title: Optional[str]
+    episode_url: Optional[str]
+    publication_date: Optional[datetime]
+    char_count: Optional[int]
+    summary_generation_status: Optional[ProcessingStatus]
+
+
+class EpisodeTextRow(NamedTuple):
+    """要約やチャンク分割など、本文を読む処理用の行。"""
+    id: int
+    novel_id: int
+    episode_number: Optional[int]
+    episode_title: Optional[str]
+    content_cleaned: Optional[str]
+    summary_short: Optional[str]
+    summary_generation_status: Optional[ProcessingStatus]
+
+
+class EpisodeSummaryRow(NamedTuple):
+    """本文を含まない、要約一覧用の行。"""
+    id: int
+    novel_id: int
+    episode_number: Optional[int]
+    episode_title: Optional[str]
+    summary_short: Optional[str]
+    summary_generation_status: Optional[ProcessingStatus]
+
+
+class CharacterRow(NamedTuple):
+    id: int
+    novel_id: int
+    name: str
+    reading: Optional[str]
+    aliases: Optional[str]
+    role_in_story_llm: Optional[str]
+    importance_score_llm: Optional[float]
+    status: Optional[str]
+
+
+class WorldSettingRow(NamedTuple):
+    id: int
+    novel_id: int
+    setting_key: str
+    setting_value: Optional[str]
+    category: Optional[str]
+
+
+class ChunkRow(NamedTuple):
+    """検索結果の表示に必要な、話数とタイトルを付けたチャンク。"""
+    id: int
+    episode_id: int
+    chunk_index: int
+    text: str
+    char_start: Optional[int]
+    char_end: Optional[int]
+    episode_number: Optional[int]
+    episode_title: Optional[str]
+
+
+READ_MODEL_COLUMNS: Dict[Type[Any], tuple] = {
+    NovelRow: (Novel.id, Novel.title, Novel.author, Novel.url, Novel.platform, Novel.synopsis, Novel.updated_at),
+    EpisodeRow: (Episode.id, Episode.novel_id, Episode.episode_number, Episode.episode_title, Episode.episode_url,
+                 Episode.publication_date, Episode.char_count, Episode.summary_generation_status),
+    EpisodeTextRow: (Episode.id, Episode.novel_id, Episode.episode_number, Episode.episode_title,
+                     Episode.content_cleaned, Episode.summary_short, Episode.summary_generation_status),
+    EpisodeSummaryRow: (Episode.id, Episode.novel_id, Episode.episode_number, Episode.episode_title,
+                        Episode.summary_short, Episode.summary_generation_status),
+    CharacterRow: (Character.id, Character.novel_id, Character.name, Character.reading, Character.aliases,
+                   Character.role_in_story_llm, Character.importance_score_llm, Character.status),
+    WorldSettingRow: (WorldSetting.id, WorldSetting.novel_id, WorldSetting.setting_key, WorldSetting.setting_value,
+                      WorldSetting.category),
+    ChunkRow: (EpisodeChunk.id, EpisodeChunk.episode_id, EpisodeChunk.chunk_index, EpisodeChunk.text,
+               EpisodeChunk.char_start, EpisodeChunk.char_end, Episode.episode_number, Episode.episode_title),
+}
+
+
+def select_for(row_type: Type[Any]) -> Select:
+    """行モデルの列だけを読む ``select()`` を返します。"""
+    return select(*READ_MODEL_COLUMNS[row_type])
+
+
+def hydrate(row_type: Type[Any], rows: Iterable[Any]) -> List[Any]:
+    """``select_for`` の結果行を行モデルに変換します。"""
+    make = row_type._make
+    return [make(row) for row in rows]
@@ -0,0 +1,248 @@
+"""ディスク上のファイルをメモリマップして使う、追記型のベクトル索引。
+
+1つの索引は1つのディレクトリで、行ごとに次のファイルへ固定長で追記します。
+
+- ``vectors.f32``: L2 正規化済みベクトル (float32, 行 x 次元)
+- ``ids.i64``: 行に対応するID (``EpisodeChunk.id``)
+- ``keys.i32``: 絞り込み用のキー (話数)。``max_key`` 以下の行だけを検索できます
+- ``lists.i32`` / ``centroids.f32``: IVF モードのクラスタ割り当てと重心
+- ``meta.json``: 次元・件数などのメタ情報。件数はデータの追記後に更新するため、
+  途中で落ちても ``meta.json`` の件数までは常に整合しています
+
+追記・学習はディレクトリの ``flock`` を取り、``meta.json`` を読み直してから行うため、
+同じ索引を複数のプロセス・インスタンスから書き込めます (``fcntl`` のない環境ではプロセス内だけ)。
+
+``flat`` モードは全件との内積 (厳密解)、``ivf`` モードは k-means の重心で候補を
+``n_probe`` 個のクラスタに絞ってから内積を取る近似検索です。
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.file_lock import FileLock
+from core.logger_setup import setup_logger
+
+logger = setup_logger()
+
+INDEX_MODES = ("flat", "ivf")
+DEFAULT_N_LISTS = 256
+DEFAULT_N_PROBE = 8
+MIN_ROWS_PER_LIST = 39  # k-means の学習に必要な1クラスタあたりの最小件数の目安
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_SIZE = 100000
+RETRAIN_GROWTH = 2.0  # 学習時の件数からこの倍率まで増えたら重心を学習し直す
+ASSIGN_BLOCK_ROWS = 16384
+
+_FILES = {"vectors": ("vectors.f32", np.float32), "ids": ("ids.i64", np.int64),
+          "keys": ("keys.i32", np.int32), "lists": ("lists.i32", np.int32)}
+
+
+class VectorIndex:
+    """メモリマップした float32 ベクトルに対する top-k 検索。
+
+    Args:
+        directory (str): 索引ファイルを置くディレクトリ (なければ作成します)。
+        dim (int): ベクトルの次元。既存の索引と異なる場合は ValueError。
+        mode (str): ``"flat"`` (全件探索) または ``"ivf"`` (近似探索)。
+        model (Optional[str]): 埋め込みモデル名。既存の索引と異なる場合は ValueError。
+        n_lists (int): IVF のクラスタ数。件数が少ない間は自動的に減らします。
+        n_probe (int): IVF で探索するクラスタ数。
+    """
+
+    def __init__(self, directory: str, dim: int, mode: str = "flat", model: Optional[str] = None,
+                 n_lists: int = DEFAULT_N_LISTS, n_probe: int = DEFAULT_N_PROBE):
+        if mode not in INDEX_MODES:
+            raise ValueError(f"Unknown index mode: {mode}. Choose from {', '.join(INDEX_MODES)}.")
+        self.directory = directory
+        self.dim = dim
+        self.mode = mode
+        self.model = model
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.count = 0
+        self.trained_count = 0
+        self._centroids: Optional[np.ndarray] = None
+        self._maps: Dict[str, np.ndarray] = {}
+        os.makedirs(directory, exist_ok=True)
+        self._lock = FileLock(directory)
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self) -> None:
+        with self._lock:
+            meta_path = self._path("meta.json")
+            if not os.path.exists(meta_path):
+                self._write_meta()
+                return
+            meta = self._read_meta()
+            if meta["dim"] != self.dim:
+                raise ValueError(f"Index at {self.directory} has dim {meta['dim']}, expected {self.dim}")
+            if self.model and meta.get("model") and meta["model"] != self.model:
+                raise ValueError(f"Index at {self.directory} was built with {meta['model']}, not {self.model}")
+            self.model = self.model or meta.get("model")
+            self._refresh(meta)
+            self._truncate_partial_rows()
+
+    def _read_meta(self) -> Dict[str, Any]:
+        with open(self._path("meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _refresh(self, meta: Optional[Dict[str, Any]] = None) -> None:
+        # 他のインスタンスの追記・学習を取り込む (ロックを保持した状態で呼ぶこと)
+        meta = meta or self._read_meta()
+        trained_count = meta.get("trained_count", 0)
+        if trained_count != self.trained_count or (trained_count and self._centroids is None):
+            self._centroids = (np.fromfile(self._path("centroids.f32"), dtype=np.float32).reshape(-1, self.dim)
+                               if trained_count else None)
+            self._maps.pop("lists", None)
+        self.trained_count = trained_count
+        self.count = meta["count"]
+
+    def _truncate_partial_rows(self) -> None:
+        # meta.json の件数より後ろは書き込み途中で中断した行なので切り詰める (ロックを保持した状態で呼ぶこと)
+        for name, (filename, dtype) in _FILES.items():
+            path = self._path(filename)
+            rows = self.count if name != "lists" or self.trained_count else 0
+            expected = rows * np.dtype(dtype).itemsize * (self.dim if name == "vectors" else 1)
+            if os.path.exists(path) and os.path.getsize(path) > expected:
+                os.truncate(path, expected)
+
+    def _write_meta(self) -> None:
+        meta = {"dim": self.dim, "count": self.count, "model": self.model,
+                "trained_count": self.trained_count}
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path("meta.json"))
+
+    def _map(self, name: str) -> np.ndarray:
+        filename, dtype = _FILES[name]
+        cached = self._maps.get(name)
+        if cached is not None and len(cached) == self.count:
+            return cached
+        shape = (self.count, self.dim) if name == "vectors" else (self.count,)
+        array = np.memmap(self._path(filename), dtype=dtype, mode="r", shape=shape)
+        self._maps[name] = array
+        return array
+
+    def append(self, ids: Sequence[int], vectors: np.ndarray, keys: Optional[Sequence[int]] = None) -> None:
+        """ベクトルを追記します。
+
+        Args:
+            ids (Sequence[int]): 行ごとのID。
+            vectors (np.ndarray): 形状 (len(ids), dim) の L2 正規化済みベクトル。
+            keys (Optional[Sequence[int]]): 絞り込み用のキー (話数)。省略時は 0。
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape != (len(ids), self.dim):
+            raise ValueError(f"Expected vectors of shape ({len(ids)}, {self.dim}), got {vectors.shape}")
+        if not len(ids):
+            return
+        keys_array = np.zeros(len(ids), dtype=np.int32) if keys is None else np.asarray(keys, dtype=np.int32)
+        with self._lock:
+            # 他のインスタンスが追記した後ろに書くよう、件数を読み直して中断した行を切り詰める
+            self._refresh()
+            self._truncate_partial_rows()
+            columns = {"vectors": vectors, "ids": np.asarray(ids, dtype=np.int64), "keys": keys_array}
+            if self._centroids is not None:
+                columns["lists"] = self._assign(vectors)
+            for name, data in columns.items():
+                with open(self._path(_FILES[name][0]), "ab") as f:
+                    f.write(data.tobytes())
+            self.count += len(ids)
+            self._write_meta()
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + ASSIGN_BLOCK_ROWS])
+            assignments[start:start + len(block)] = np.argmax(block @ self._centroids.T, axis=1)
+        return assignments
+
+    def train(self, seed: int = 0) -> None:
+        """既存のベクトルから IVF の重心を学習し、全行をクラスタに割り当て直します。"""
+        with self._lock:
+            self._refresh()
+            n_lists = min(self.n_lists, max(1, self.count // MIN_ROWS_PER_LIST))
+            vectors = self._map("vectors")
+            rng = np.random.default_rng(seed)
+            sample_rows = np.sort(rng.choice(self.count, size=min(self.count, KMEANS_SAMPLE_SIZE), replace=False))
+            sample = np.asarray(vectors[sample_rows])
+            centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+            # 正規化済みベクトルなので、内積で割り当てる球面 k-means
+            for _ in range(KMEANS_ITERATIONS):
+                sums = np.zeros_like(centroids)
+                for start in range(0, len(sample), ASSIGN_BLOCK_ROWS):
+                    block = sample[start:start + ASSIGN_BLOCK_ROWS]
+                    # クラスタごとの和を one-hot 行列との積 (BLAS) で求める
+                    one_hot = np.zeros((len(block), n_lists), dtype=np.float32)
+                    one_hot[np.arange(len(block)), np.argmax(block @ centroids.T, axis=1)] = 1.0
+                    sums += one_hot.T @ block
+                norms = np.linalg.norm(sums, axis=1, keepdims=True)
+                filled = norms[:, 0] > 0
+                centroids[filled] = sums[filled] / norms[filled]
+            self._centroids = centroids.astype(np.float32)
+            # 他のインスタンスがメモリマップ中のファイルを書き換えないよう、別ファイルに書いて置き換える
+            self._replace_file("centroids.f32", self._centroids)
+            self._replace_file(_FILES["lists"][0], self._assign(vectors))
+            self._maps.pop("lists", None)
+            self.trained_count = self.count
+            self._write_meta()
+            logger.info("Trained IVF index at %s: %d lists over %d vectors", self.directory, n_lists, self.count)
+
+    def _replace_file(self, filename: str, data: np.ndarray) -> None:
+        tmp_path = self._path(f"{filename}.tmp")
+        data.tofile(tmp_path)
+        os.replace(tmp_path, self._path(filename))
+
+    def _needs_training(self) -> bool:
+        if self.mode != "ivf" or self.count < MIN_ROWS_PER_LIST * 2:
+            return False
+        return self._centroids is None or self.count >= self.trained_count * RETRAIN_GROWTH
+
+    def search(self, query: np.ndarray, k: int = 10, max_key: Optional[int] = None,
+               n_probe: Optional[int] = None) -> List[Tuple[int, float]]:
+        """クエリに近い順に (ID, コサイン類似度) を最大 k 件返します。
+
+        Args:
+            query (np.ndarray): L2 正規化済みのクエリベクトル (形状 (dim,) または (1, dim))。
+            k (int): 返す件数。
+            max_key (Optional[int]): 指定時、キー (話数) がこの値以下の行だけを対象にします。
+            n_probe (Optional[int]): IVF で探索するクラスタ数。省略時はコンストラクタの値。
+
+        Returns:
+            List[Tuple[int, float]]: 類似度の降順に並んだ (ID, 類似度)。
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        with self._lock:
+            self._refresh()
+            if self._needs_training():
+                self.train()
+            if self.count == 0:
+                return []
+            vectors, ids, keys = self._map("vectors"), self._map("ids"), self._map("keys")
+            centroids = self._centroids if self.mode == "ivf" else None
+            lists = self._map("lists") if centroids is not None else None
+        if centroids is not None:
+            probed = np.zeros(len(centroids), dtype=bool)
+            probed[np.argsort(centroids @ query)[-(n_probe or self.n_probe):]] = True
+            rows = np.flatnonzero(probed[lists])
+            scores = np.asarray(vectors[rows]) @ query
+        else:
+            rows = None
+            scores = np.asarray(vectors @ query)
+        if max_key is not None:
+            row_keys = keys if rows is None else keys[rows]
+            scores = np.where(row_keys <= max_key, scores, -np.inf)
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[np.isfinite(scores[top])]
+        row_ids = ids[top] if rows is None else ids[rows[top]]
+        return [(int(i), float(s)) for i, s in zip(row_ids, scores[top])]
@@ -1,12 +1,320 @@
+import argparse
+import logging
+import os
+import sys
+from contextlib import nullcontext
+from datetime import datetime
+
+from core import logger_setup, metrics
 from core.logger_setup import setup_logger
 from core.config import config
+from core.profiling import DEFAULT_SAMPLE_INTERVAL_SEC, DEFAULT_TOP_N, PROFILE_MODES, PipelineProfiler
 
 logger = setup_logger()
 
-def main():
+DEFAULT_PROFILE_DIR = "data/profiles"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Novel LLM Project")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the command and write a flamegraph-compatible output plus a top-N summary.")
+    parser.add_argument("--profile-mode", choices=PROFILE_MODES, default="both",
+                        help="cProfile, stage-tagged sampling, or both (default).")
+    parser.add_argument("--profile-dir", default=DEFAULT_PROFILE_DIR,
+                        help="Directory where profile results are written.")
+    parser.add_argument("--profile-top", type=int, default=DEFAULT_TOP_N,
+                        help="Number of functions listed in the summary.")
+    parser.add_argument("--profile-interval", type=float, default=DEFAULT_SAMPLE_INTERVAL_SEC,
+                        help="Sampling interval in seconds.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    ingest_parser = subparsers.add_parser("ingest", help="Scrape a novel and store its episodes.")
+    ingest_parser.add_argument("novel_url")
+    ingest_parser.add_argument("--max-episodes", type=int, default=None)
+    ingest_parser.add_argument("--delay", type=float, default=1.0, help="Delay between requests (sec).")
+    ingest_parser.add_argument("--refetch", action="store_true", help="Re-fetch already stored episodes.")
+
+    analyze_parser = subparsers.add_parser("analyze", help="Generate episode summaries with the LLM.")
+    analyze_parser.add_argument("novel_id", type=int)
+    analyze_parser.add_argument("--limit", type=int, default=None)
+
+    summarize_parser = subparsers.add_parser(
+        "summarize", help="Summarize pending episodes of all novels. Safe to run on several nodes.")
+    summarize_parser.add_argument("--novel-id", type=int, default=None)
+    summarize_parser.add_argument("--batch-size", type=int, default=10, help="Episodes claimed at a time.")
+    summarize_parser.add_argument("--limit", type=int, default=None)
+
+    crawl_parser = subparsers.add_parser("crawl", help="Crawl registered novels within a request budget.")
+    crawl_parser.add_argument("--add", nargs="+", default=[], metavar="NOVEL_URL",
+                              help="Register novels in the crawl frontier before crawling.")
+    crawl_parser.add_argument("--priority", type=float, default=1.0, help="Weight for novels added with --add.")
+    crawl_parser.add_argument("--budget", type=int, default=100, help="Maximum number of requests.")
+    crawl_parser.add_argument("--host-delay", type=float, default=1.0, help="Delay between requests to a host (sec).")
+    crawl_parser.add_argument("--max-episodes-per-visit", type=int, default=20)
+
+    index_parser = subparsers.add_parser("index", help="Build the vector index over stored episodes.")
+    index_parser.add_argument("novel_id", type=int)
+    index_parser.add_argument("--reindex", action="store_true", help="Re-chunk already indexed episodes.")
+
+    search_parser = subparsers.add_parser("search", help="Retrieve passages related to a query.")
+    search_parser.add_argument("novel_id", type=int)
+    search_parser.add_argument("query")
+    search_parser.add_argument("-k", type=int, default=5, help="Number of passages.")
+    search_parser.add_argument("--before-episode", type=int, default=None,
+                               help="Only search episodes before this episode number.")
+
+    pack_parser = subparsers.add_parser("pack", help="Append stored episodes to the novel's corpus pack.")
+    pack_parser.add_argument("novel_id", type=int)
+    pack_parser.add_argument("--rebuild", action="store_true", help="Delete the pack and write it again.")
+
+    serve_parser = subparsers.add_parser("serve", help="Serve novels, episodes and summaries over a read-only HTTP API.")
+    serve_parser.add_argument("--host", default=config.READ_API_HOST)
+    serve_parser.add_argument("--port", type=int, default=config.READ_API_PORT)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Apply pending schema migrations.")
+    migrate_parser.add_argument("--status", action="store_true",
+                                help="Only show the current version and pending migrations.")
+
+    export_parser = subparsers.add_parser("export", help="Export tables to partitioned Parquet files.")
+    export_parser.add_argument("--output", default="data/export", help="Output directory.")
+    export_parser.add_argument("--tables", nargs="+", default=None, help="Tables to export (default: all).")
+    export_parser.add_argument("--columns", action="append", default=[], metavar="TABLE=COL,COL",
+                               help="Columns to export for a table. Can be repeated.")
+    export_parser.add_argument("--full", action="store_true", help="Ignore watermarks and export every row.")
+    export_parser.add_argument("--batch-size", type=int, default=5000)
+    export_parser.add_argument("--no-snapshot", action="store_true",
+                               help="Read the live SQLite file instead of a backup snapshot.")
+    return parser
+
+
+def run_ingest(args):
+    from core.context_db import ContextDB
+    from core.pipeline import ingest_novel
+    from scrapers.narou_scraper import NarouScraper
+
+    if "syosetu.com" not in args.novel_url:
+        logger.error(f"No scraper available for URL: {args.novel_url}")
+        return 1
+    novel_id = ingest_novel(ContextDB(), NarouScraper(request_delay_sec=args.delay), args.novel_url,
+                            max_episodes=args.max_episodes, refetch=args.refetch,
+                            event_bus=args.event_bus)
+    if novel_id is None:
+        return 1
+    print(f"Ingested novel ID: {novel_id}")
+    return 0
+
+
+def run_analyze(args):
+    from core.context_db import ContextDB
+    from core.llm_client import LLMClient
+    from core.pipeline import analyze_novel
+
+    processed = analyze_novel(ContextDB(), LLMClient(), args.novel_id, limit=args.limit,
+                              event_bus=args.event_bus)
+    print(f"Summarized episodes: {processed}")
+    return 0
+
+
+def run_summarize(args):
+    from core.context_db import ContextDB
+    from core.llm_client import LLMClient
+    from core.pipeline import summarize_pending
+
+    processed = summarize_pending(ContextDB(), LLMClient(), novel_id=args.novel_id,
+                                  batch_size=args.batch_size, limit=args.limit, event_bus=args.event_bus)
+    print(f"Summarized episodes: {processed}")
+    return 0
+
+
+def run_crawl(args):
+    from core.context_db import ContextDB
+    from scrapers.crawl_scheduler import CrawlScheduler
+    from scrapers.narou_scraper import NarouScraper
+
+    # リクエスト間隔はスケジューラがホストごとに管理する
+    scheduler = CrawlScheduler(ContextDB(), {"ncode.syosetu.com": NarouScraper(request_delay_sec=0)},
+                               host_delay_sec=args.host_delay,
+                               max_episodes_per_visit=args.max_episodes_per_visit, event_bus=args.event_bus)
+    for novel_url in args.add:
+        scheduler.add_target(novel_url, priority=args.priority)
+    report = scheduler.run(args.budget)
+    print(f"Requests: {report.requests}, novels visited: {report.visits}, "
+          f"episodes fetched: {report.episodes_fetched}, novels updated: {report.novels_changed}")
+    return 0
+
+
+def _build_context_builder():
+    from core.context_builder import ContextBuilder
+    from core.context_db import ContextDB
+    from core.embeddings import create_backend
+
+    return ContextBuilder(ContextDB(), create_backend(config.EMBEDDING_BACKEND),
+                          index_dir=config.VECTOR_INDEX_DIR, mode=config.VECTOR_INDEX_MODE)
+
+
+def run_index(args):
+    chunks = _build_context_builder().index_novel(args.novel_id, reindex=args.reindex)
+    print(f"Indexed chunks: {chunks}")
+    return 0
+
+
+def run_search(args):
+    passages = _build_context_builder().retrieve(args.novel_id, args.query, k=args.k,
+                                                 before_episode=args.before_episode)
+    for passage in passages:
+        print(f"[{passage.score:.3f}] Episode {passage.episode_number}: {passage.episode_title or ''}")
+        print(passage.text)
+        print()
+    return 0
+
+
+def run_pack(args):
+    from core.context_db import ContextDB
+    from core.corpus_pack import sync_novel_pack
+
+    appended = sync_novel_pack(ContextDB(), args.novel_id, root=config.CORPUS_PACK_DIR, rebuild=args.rebuild)
+    print(f"Packed episodes: {appended}")
+    return 0
+
+
+def run_serve(args):
+    import asyncio
+    from core.context_db import ContextDB
+    from core.read_api import ReadAPI
+
+    api = ReadAPI(ContextDB(), workers=config.READ_API_WORKERS, cache_entries=config.READ_API_CACHE_ENTRIES,
+                  cache_ttl_sec=config.READ_API_CACHE_TTL_SEC, gzip_min_bytes=config.READ_API_GZIP_MIN_BYTES,
+                  page_size=config.READ_API_PAGE_SIZE, max_page_size=config.READ_API_MAX_PAGE_SIZE)
+    print(f"Serving on http://{args.host}:{args.port}/novels (Ctrl+C to stop)")
+    try:
+        asyncio.run(api.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.close()
+    return 0
+
+
+def run_migrate(args):
+    from core import migrations
+    from core.context_db import ContextDB
+
+    db = ContextDB()
+    with db.engine.connect() as conn:
+        print(f"Current schema version: {migrations.current_version(conn)}")
+        pending = migrations.pending_migrations(conn)
+    for migration in pending:
+        print(f"Pending: {migration.version} {migration.description}")
+    if args.status:
+        return 0
+    try:
+        db.ensure_schema()
+    except migrations.MigrationError as e:
+        print(f"Migration failed: {e}")
+        return 1
+    with db.engine.connect() as conn:
+        version = migrations.current_version(conn)
+    print(f"Schema version: {version}")
+    return 0 if version == migrations.SCHEMA_VERSION else 1
+
+
+def run_export(args):
+    from core.context_db import ContextDB
+    from core.exporter import ParquetExporter
+
+    columns = {}
+    for spec in args.columns:
+        table, _, names = spec.partition("=")
+        columns[table] = [name.strip() for name in names.split(",") if name.strip()]
+    exporter = ParquetExporter(ContextDB(), args.output, batch_size=args.batch_size,
+                               snapshot=not args.no_snapshot)
+    counts = exporter.export(tables=args.tables, columns=columns, full=args.full)
+    for table, count in counts.items():
+        print(f"{table}: {count} rows")
+    return 0
+
+
+COMMANDS = {"ingest": run_ingest, "analyze": run_analyze, "summarize": run_summarize, "crawl": run_crawl,
+            "index": run_index, "search": run_search, "pack": run_pack, "serve": run_serve,
+            "migrate": run_migrate, "export": run_export}
+# イベントを発行するコマンド。プラグインはこれらのコマンドでだけ読み込む
+EVENT_COMMANDS = ("ingest", "analyze", "summarize", "crawl")
+
+
+def build_event_bus():
+    """プラグインを読み込み、購読イベントがあれば EventBus とともに返します。
+
+    Returns:
+        tuple: (EventBus, PluginManager)。購読するプラグインがなければ (None, PluginManager)。
+    """
+    from core.events import EventBus
+    from core.plugin_manager import PluginManager
+
+    plugin_manager = PluginManager(config.PLUGIN_DIRECTORY, executor_type=config.PLUGIN_EXECUTOR,
+                                   max_workers=config.PLUGIN_MAX_WORKERS,
+                                   default_timeout_sec=config.PLUGIN_TIMEOUT_SEC,
+                                   manifest_path=config.PLUGIN_MANIFEST_PATH)
+    if not plugin_manager.subscribed_events():
+        return None, plugin_manager
+    event_bus = EventBus(batch_size=config.EVENT_BATCH_SIZE,
+                         flush_interval_sec=config.EVENT_FLUSH_INTERVAL_SEC)
+    plugin_manager.attach(event_bus)
+    return event_bus, plugin_manager
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    metrics.setup_metrics(
+        config.METRICS_ENABLED, config.METRICS_EXPORTERS, host=config.METRICS_HOST,
+        port=config.METRICS_PORT, json_path=config.METRICS_JSON_PATH,
+        json_interval_sec=config.METRICS_JSON_INTERVAL_SEC)
     logger.info("Novel LLM Project - Main Application Started")
     logger.info(f"Gemini API Key Loaded: {'Yes' if config.GEMINI_API_KEY else 'No'}")
-    print("Hello, Novel LLM Project!")
+    if not args.command:
+        print("Hello, Novel LLM Project!")
+        return 0
+
+    profiler = None
+    if args.profile:
+        output_dir = os.path.join(
+            args.profile_dir, f"{args.command}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        profiler = PipelineProfiler(output_dir, mode=args.profile_mode,
+                                    sample_interval_sec=args.profile_interval, top_n=args.profile_top)
+    event_bus, plugin_manager = build_event_bus() if args.command in EVENT_COMMANDS else (None, None)
+    args.event_bus = event_bus
+    idle = True
+    with profiler or nullcontext():
+        with event_bus or nullcontext():
+            exit_code = COMMANDS[args.command](args)
+        if plugin_manager is not None:
+            # 残りのバッチをプラグインが処理し終えるまで待つ (止まったプラグインは待ちきらずに切り捨てる)
+            idle = plugin_manager.wait_idle(timeout_sec=config.PLUGIN_SHUTDOWN_TIMEOUT_SEC)
+            if idle:
+                plugin_manager.shutdown()
+    if profiler:
+        print(profiler.summary_text)
+    if not idle:
+        logger.error("Plugins did not finish within %ss; exiting without waiting for them",
+                     config.PLUGIN_SHUTDOWN_TIMEOUT_SEC)
+        _exit_now(exit_code, plugin_manager)
+    return exit_code
+
+
+def _exit_now(exit_code, plugin_manager):
+    """止まったプラグインのワーカーを待たずにプロセスを終了します。
+
+    実行中のワーカースレッドはインタプリタ終了時に join されて終了が止まるため、プラグインの
+    実行プール・メトリクスのエクスポーター・ログを明示的に停止して書き出してから ``os._exit`` します。
+    """
+    plugin_manager.shutdown(wait=False, cancel_futures=True)
+    metrics.shutdown_metrics()
+    logger_setup.shutdown_logging()
+    logging.shutdown()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(exit_code)
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
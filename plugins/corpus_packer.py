@@ -0,0 +1,27 @@
+from core.base_plugin import BasePlugin
+from core.events import NOVEL_SYNCED
+
+
+class CorpusPackerPlugin(BasePlugin):
+    """取り込みが終わった作品の本文を、コーパスパックに追記するプラグイン。
+
+    ``CORPUS_PACK_ENABLED`` が有効なときだけ動作します。追記されるのは未追記の話と改稿された話だけです。
+    """
+    subscribed_events = (NOVEL_SYNCED,)
+
+    def __init__(self):
+        super().__init__("corpus_packer")
+        self._db = None
+
+    def execute(self, event_name=None, events=(), **kwargs):
+        from core.config import config
+
+        if not config.CORPUS_PACK_ENABLED:
+            return 0
+        from core.context_db import ContextDB
+        from core.corpus_pack import sync_novel_pack
+
+        if self._db is None:
+            self._db = ContextDB()
+        novel_ids = {event.payload["novel_id"] for event in events}
+        return sum(sync_novel_pack(self._db, novel_id, root=config.CORPUS_PACK_DIR) for novel_id in sorted(novel_ids))
@@ -0,0 +1,34 @@
+from core.base_plugin import BasePlugin
+from core.events import EPISODE_STORED
+
+
+class EpisodeIndexerPlugin(BasePlugin):
+    """保存された話の本文をチャンクに分割し、ベクトル索引に追記するプラグイン。
+
+    ``VECTOR_INDEX_ENABLED`` が有効なときだけ動作します。埋め込みと索引の読み込みは
+    初回のイベント処理時まで遅延します。
+    """
+    subscribed_events = (EPISODE_STORED,)
+
+    def __init__(self):
+        super().__init__("episode_indexer")
+        self._builder = None
+
+    def _get_builder(self):
+        if self._builder is None:
+            from core.config import config
+            from core.context_builder import ContextBuilder
+            from core.context_db import ContextDB
+            from core.embeddings import create_backend
+
+            self._builder = ContextBuilder(ContextDB(), create_backend(config.EMBEDDING_BACKEND),
+                                           index_dir=config.VECTOR_INDEX_DIR, mode=config.VECTOR_INDEX_MODE)
+        return self._builder
+
+    def execute(self, event_name=None, events=(), **kwargs):
+        from core.config import config
+
+        if not config.VECTOR_INDEX_ENABLED:
+            return 0
+        builder = self._get_builder()
+        return sum(builder.index_episode(event.payload["episode_id"]) for event in events)
@@ -0,0 +1,321 @@
+"""複数作品を巡回するクロールスケジューラ。
+
+クロール対象 (``CrawlTarget``) は DB に永続化したフロンティアで、作品ごとに
+投稿日時の履歴から推定した更新間隔をもとに次回の巡回時刻を決めます。
+
+1回の ``run`` ではリクエスト予算の範囲で巡回し、次のように公平に割り振ります。
+
+- ホスト (プラットフォーム) 間: 次にリクエストを送ってよい時刻が最も早いホストから
+  1リクエストずつ処理します。ホストごとに ``host_delay_sec`` の間隔を空けます (politeness)
+- 作品間: ホストごとに最大 ``max_active_per_host`` 作品を同時に扱い、1リクエストずつ
+  ラウンドロビンします。1回の巡回で取得する話数は ``max_episodes_per_visit`` までで、
+  残りは次回に持ち越すため、長編の一括取得が更新の多い連載を待たせません
+- 巡回順: "前回の巡回から新しい話が出ていそうな数" (経過時間 / 更新間隔) に重みを掛けた
+  スコアの高い順です
+
+巡回する対象は ``ContextDB.claim_due_crawl_targets`` で取り出し、``next_crawl_at`` を
+``claim_lease_sec`` 先に進めてから巡回するため、複数ノードのスケジューラが同じ作品を重複して
+巡回しません。予算切れで巡回しなかった対象は実行の最後に戻します。
+"""
+import statistics
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Sequence
+from urllib.parse import urlparse
+
+from core import events
+from core.context_db import ContextDB
+from core.db_schemas import DEFAULT_UPDATE_INTERVAL_SEC, CrawlTarget
+from core.logger_setup import setup_logger
+from core.pipeline import NOVEL_METADATA_KEYS, needs_fetch, parse_publication_date
+from scrapers.base_scraper import BaseScraper
+
+logger = setup_logger()
+
+DEFAULT_HOST_DELAY_SEC = 1.0
+DEFAULT_MAX_EPISODES_PER_VISIT = 20
+DEFAULT_MAX_ACTIVE_PER_HOST = 4
+RECENT_INTERVALS = 10  # 更新間隔の推定に使う直近の投稿間隔の数
+RECRAWL_FRACTION = 0.5  # 推定更新間隔のこの割合が経過したら再巡回する
+MIN_RECRAWL_SEC = 3600.0
+MAX_RECRAWL_SEC = 30 * 24 * 3600.0
+FAILURE_BACKOFF_SEC = 600.0
+CLAIM_LEASE_SEC = 3600.0  # 取り出した対象を他のスケジューラから隠す秒数 (異常終了時はこの後に再巡回)
+
+
+class CrawlReport(NamedTuple):
+    """``CrawlScheduler.run`` の結果。"""
+    requests: int
+    visits: int
+    episodes_fetched: int
+    novels_changed: int
+    waited_sec: float
+
+
+def estimate_update_interval(publication_dates: Sequence[Optional[datetime]]) -> Optional[float]:
+    """投稿日時の履歴から更新間隔 (秒) を推定します。
+
+    直近 ``RECENT_INTERVALS`` 回の投稿間隔の中央値を使うため、一時的な休載や
+    まとめ投稿の影響を受けにくくなります。
+
+    Returns:
+        Optional[float]: 推定した更新間隔。投稿日時が2件未満の場合は None。
+    """
+    dates = sorted(d for d in publication_dates if d is not None)[-(RECENT_INTERVALS + 1):]
+    gaps = [(later - earlier).total_seconds() for earlier, later in zip(dates, dates[1:])]
+    gaps = [gap for gap in gaps if gap > 0]
+    return statistics.median(gaps) if gaps else None
+
+
+def recrawl_delay_sec(update_interval_sec: Optional[float], last_published_at: Optional[datetime],
+                      now: datetime) -> float:
+    """次回の巡回までの待ち時間を返します。
+
+    最終投稿から推定間隔以上に時間が空いている作品 (休載・完結) は、空いた時間を
+    更新間隔とみなして巡回を徐々に減らします。
+    """
+    interval = update_interval_sec or DEFAULT_UPDATE_INTERVAL_SEC
+    if last_published_at is not None:
+        interval = max(interval, (now - last_published_at).total_seconds())
+    return min(MAX_RECRAWL_SEC, max(MIN_RECRAWL_SEC, interval * RECRAWL_FRACTION))
+
+
+def crawl_score(target: CrawlTarget, now: datetime) -> float:
+    """巡回の優先度 (前回の巡回以降に出ていそうな新しい話の数 x 重み) を返します。
+
+    ``ContextDB.claim_due_crawl_targets`` は同じスコアの高い順に対象を取り出します。
+    """
+    if target.last_crawled_at is None:
+        return float("inf")
+    interval = target.update_interval_sec or DEFAULT_UPDATE_INTERVAL_SEC
+    elapsed = (now - target.last_crawled_at).total_seconds()
+    return (target.priority or 1.0) * elapsed / interval
+
+
+class _Visit:
+    """1作品の1回分の巡回状態。1ステップで1リクエストだけ送る。"""
+
+    def __init__(self, target: CrawlTarget):
+        self.target = target
+        self.metadata_fetched = False
+        self.failed = False
+        self.novel_id: Optional[int] = target.novel_id
+        self.pending: Deque[Dict[str, Any]] = deque()
+        self.new_episodes = 0
+        self.fetched = 0
+        self.update_interval_sec: Optional[float] = target.update_interval_sec
+        self.last_published_at: Optional[datetime] = target.last_published_at
+
+
+class _HostQueue:
+    def __init__(self, host: str, scraper: BaseScraper):
+        self.host = host
+        self.scraper = scraper
+        self.next_allowed_at = 0.0
+        self.waiting: Deque[_Visit] = deque()
+        self.active: Deque[_Visit] = deque()
+
+
+class CrawlScheduler:
+    """永続化したクロールフロンティアを、予算・politeness・公平性を守って巡回します。
+
+    Args:
+        db (ContextDB): フロンティアと取得結果の保存先。
+        scrapers (Dict[str, BaseScraper]): ホスト名 (``ncode.syosetu.com`` 等) ごとのスクレイパー。
+            待ち時間はスケジューラが管理するため、スクレイパー側の遅延は 0 にしてください。
+        host_delay_sec (float): 同じホストへのリクエスト間隔 (秒)。
+        max_episodes_per_visit (int): 1回の巡回で1作品から取得する最大話数。
+        max_active_per_host (int): ホストごとに同時にラウンドロビンする作品数。
+        event_bus (Optional[EventBus]): 指定時、``episode_stored`` / ``novel_synced`` を発行します。
+        claim_lease_sec (float): 取り出した対象を他のスケジューラから隠す秒数。1回の ``run`` より長くしてください。
+        clock / sleep / now: テスト用に差し替え可能な時計。
+    """
+
+    def __init__(self, db: ContextDB, scrapers: Dict[str, BaseScraper],
+                 host_delay_sec: float = DEFAULT_HOST_DELAY_SEC,
+                 max_episodes_per_visit: int = DEFAULT_MAX_EPISODES_PER_VISIT,
+                 max_active_per_host: int = DEFAULT_MAX_ACTIVE_PER_HOST,
+                 event_bus: Optional[events.EventBus] = None,
+                 claim_lease_sec: float = CLAIM_LEASE_SEC,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep,
+                 now: Callable[[], datetime] = datetime.now):
+        self.db = db
+        self.scrapers = scrapers
+        self.host_delay_sec = host_delay_sec
+        self.max_episodes_per_visit = max_episodes_per_visit
+        self.max_active_per_host = max(1, max_active_per_host)
+        self.event_bus = event_bus
+        self.claim_lease_sec = claim_lease_sec
+        self.clock = clock
+        self.sleep = sleep
+        self.now = now
+
+    def add_target(self, novel_url: str, priority: float = 1.0) -> Optional[CrawlTarget]:
+        """作品をフロンティアに登録します (登録済みなら重みだけ更新します)。"""
+        host = urlparse(novel_url).netloc
+        scraper = self.scrapers.get(host)
+        if scraper is None:
+            logger.warning("No scraper registered for host %s, target not added: %s", host, novel_url)
+            return None
+        target, _ = self.db.add_crawl_target(
+            novel_url, defaults={"priority": priority, "platform": scraper.PLATFORM_NAME})
+        return target
+
+    def plan(self, now: Optional[datetime] = None) -> List[CrawlTarget]:
+        """巡回時刻を過ぎた対象をスコアの高い順に返します (取り出さずに読むだけです)。"""
+        now = now or self.now()
+        return self.db.get_due_crawl_targets(now, hosts=list(self.scrapers))
+
+    def run(self, request_budget: int) -> CrawlReport:
+        """リクエスト予算を使い切るか、巡回すべき対象がなくなるまで巡回します。
+
+        Args:
+            request_budget (int): この実行で送る最大リクエスト数 (スクレイパーの呼び出し回数)。
+
+        Returns:
+            CrawlReport: 実行結果。
+        """
+        now = self.now()
+        # 1リクエストで最大1作品しか巡回を始められないため、スコアの高い順に予算分だけ取り出す
+        claimed = self.db.claim_due_crawl_targets(now, self.claim_lease_sec, limit=request_budget,
+                                                  hosts=list(self.scrapers))
+        hosts: Dict[str, _HostQueue] = {}
+        for target in sorted(claimed, key=lambda t: crawl_score(t, now), reverse=True):
+            queue = hosts.setdefault(target.host, _HostQueue(target.host, self.scrapers[target.host]))
+            queue.waiting.append(_Visit(target))
+
+        requests = 0
+        waited = 0.0
+        finished: List[_Visit] = []
+        while requests < request_budget:
+            for queue in hosts.values():
+                while queue.waiting and len(queue.active) < self.max_active_per_host:
+                    queue.active.append(queue.waiting.popleft())
+            ready = [queue for queue in hosts.values() if queue.active]
+            if not ready:
+                break
+            queue = min(ready, key=lambda q: q.next_allowed_at)
+            wait = queue.next_allowed_at - self.clock()
+            if wait > 0:
+                self.sleep(wait)
+                waited += wait
+            visit = queue.active.popleft()
+            self._step(queue.scraper, visit)
+            requests += 1
+            queue.next_allowed_at = self.clock() + self.host_delay_sec
+            if self._visit_done(visit):
+                self._finish(visit)
+                finished.append(visit)
+            else:
+                queue.active.append(visit)
+
+        finished += self._settle(hosts, now)
+        report = CrawlReport(requests, len(finished), sum(visit.fetched for visit in finished),
+                             sum(1 for visit in finished if visit.new_episodes), waited)
+        logger.info("Crawl finished: %s", report)
+        return report
+
+    def _settle(self, hosts: Dict[str, _HostQueue], claimed_at: datetime) -> List[_Visit]:
+        """予算切れで途中になった巡回を片付け、記録した巡回を返します。
+
+        取得済みの分がある巡回は記録して残りを次回に回し、始めなかった対象は貸出期限まで
+        待たせずにすぐ巡回対象へ戻します。
+        """
+        finished: List[_Visit] = []
+        unvisited: List[CrawlTarget] = []
+        for queue in hosts.values():
+            for visit in queue.active:
+                if visit.metadata_fetched:
+                    self._finish(visit)
+                    finished.append(visit)
+                else:
+                    unvisited.append(visit.target)
+            unvisited.extend(visit.target for visit in queue.waiting)
+        leased_until = claimed_at + timedelta(seconds=self.claim_lease_sec)
+        self.db.release_crawl_claims([t.id for t in unvisited], leased_until, claimed_at)
+        return finished
+
+    def _visit_done(self, visit: _Visit) -> bool:
+        return visit.failed or (visit.metadata_fetched and (
+            not visit.pending or visit.fetched >= self.max_episodes_per_visit))
+
+    def _step(self, scraper: BaseScraper, visit: _Visit) -> None:
+        if not visit.metadata_fetched:
+            self._fetch_metadata(scraper, visit)
+            return
+        raw = visit.pending.popleft()
+        content = scraper.fetch_episode_content(raw["url"])
+        visit.fetched += 1
+        if content is None:
+            return
+        result = self.db.store_episode_content(raw["id"], content, len(content), revised_at=raw["revised_at"])
+        if result and result.changed and self.event_bus is not None:
+            self.event_bus.publish(events.EPISODE_STORED, novel_id=visit.novel_id, episode_id=raw["id"],
+                                   episode_number=raw["number"])
+
+    def _fetch_metadata(self, scraper: BaseScraper, visit: _Visit) -> None:
+        url = visit.target.novel_url
+        metadata = scraper.fetch_novel_metadata(url)
+        if not metadata:
+            logger.warning("Failed to fetch metadata for crawl target: %s", url)
+            visit.failed = True
+            return
+        visit.metadata_fetched = True
+        defaults = {k: metadata[k] for k in NOVEL_METADATA_KEYS if k in metadata}
+        raw_episodes = metadata.get("raw_episode_data", [])
+        dates = [parse_publication_date(raw.get("publication_date_str")) for raw in raw_episodes]
+        visit.update_interval_sec = estimate_update_interval(dates) or visit.update_interval_sec
+        visit.last_published_at = max((d for d in dates if d is not None), default=visit.last_published_at)
+
+        try:
+            # 作品と目次の全話を1トランザクションで登録する
+            with self.db.transaction() as tx:
+                novel, _ = tx.upsert_novel(url, **defaults)
+                episodes = []
+                for raw, published in zip(raw_episodes, dates):
+                    episode, created = tx.upsert_episode(
+                        novel.id, raw["url"], episode_title=raw["title"], episode_number=raw["number"],
+                        publication_date=published)
+                    visit.new_episodes += created
+                    episodes.append(episode)
+        except Exception as e:
+            logger.error("Failed to store episode list for crawl target %s: %s", url, e, exc_info=True)
+            visit.failed = True
+            return
+        visit.novel_id = novel.id
+        for raw, episode in zip(raw_episodes, episodes):
+            revised_at = parse_publication_date(raw.get("update_time_str"))
+            if needs_fetch(episode, revised_at):
+                visit.pending.append({"id": episode.id, "url": raw["url"], "number": raw["number"],
+                                      "revised_at": revised_at})
+
+    def _finish(self, visit: _Visit) -> None:
+        now = self.now()
+        target = visit.target
+        updates: Dict[str, Any] = {"last_crawled_at": now}
+        if visit.failed:
+            failures = (target.consecutive_failures or 0) + 1
+            updates["consecutive_failures"] = failures
+            updates["next_crawl_at"] = now + timedelta(
+                seconds=min(MAX_RECRAWL_SEC, FAILURE_BACKOFF_SEC * 2 ** (failures - 1)))
+        else:
+            updates.update({
+                "novel_id": visit.novel_id,
+                "consecutive_failures": 0,
+                "update_interval_sec": visit.update_interval_sec,
+                "last_published_at": visit.last_published_at,
+            })
+            if visit.new_episodes:
+                updates["last_changed_at"] = now
+            if visit.pending:
+                # 取得しきれなかった話は次回すぐに続きを取る
+                updates["next_crawl_at"] = now
+            else:
+                updates["next_crawl_at"] = now + timedelta(
+                    seconds=recrawl_delay_sec(visit.update_interval_sec, visit.last_published_at, now))
+            if self.event_bus is not None:
+                self.event_bus.publish(events.NOVEL_SYNCED, novel_id=visit.novel_id,
+                                       episodes_fetched=visit.fetched)
+        self.db.update_crawl_target(target.id, updates)
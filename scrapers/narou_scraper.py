@@ -1,19 +1,28 @@
+from core import metrics, profiling
 from core.logger_setup import setup_logger
 from scrapers.base_scraper import BaseScraper
-import requests
-from bs4 import BeautifulSoup, NavigableString, Tag
 import time
-from typing import Dict, List, Optional, Any, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Tuple
 import re
 from urllib.parse import urljoin
 from datetime import datetime
 
 import logging
 
+# requests / BeautifulSoup は import に時間がかかるため、実際にスクレイピングする関数内で読み込む
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, Tag
+
 logger = setup_logger()
 
 REQUEST_TIMEOUT_SECONDS = 20
 
+REQUEST_SECONDS = metrics.histogram(
+    "scraper_request_seconds", "Latency of scraper HTTP requests including HTML parsing.",
+    label_names=("platform",))
+REQUESTS_TOTAL = metrics.counter(
+    "scraper_requests_total", "Scraper HTTP requests by outcome.", label_names=("platform", "outcome"))
+
 
 class NarouScraper(BaseScraper):
     PLATFORM_NAME = "narou"
@@ -21,49 +30,63 @@ class NarouScraper(BaseScraper):
     def __init__(self, request_delay_sec: float = 1.0):
         self.request_delay_sec = request_delay_sec
         logger.info(
-            f"NarouScraper initialized with delay: {self.request_delay_sec} sec")
+            "NarouScraper initialized with delay: %s sec", self.request_delay_sec)
+
+    def _make_request(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional["BeautifulSoup"]:
+        time.sleep(self.request_delay_sec)
+        # 待機時間はレイテンシに含めない
+        with REQUEST_SECONDS.time(platform=self.PLATFORM_NAME):
+            return self._fetch_soup(url, headers)
+
+    def _fetch_soup(self, url: str, headers: Optional[Dict[str, str]]) -> Optional["BeautifulSoup"]:
+        import requests
+        from bs4 import BeautifulSoup
 
-    def _make_request(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[BeautifulSoup]:
         try:
-            time.sleep(self.request_delay_sec)
             default_headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
             if headers:
                 default_headers.update(headers)
-            logger.debug(f"Requesting URL: {url}")
-            response = requests.get(url, timeout=REQUEST_TIMEOUT_SECONDS, headers=default_headers)
+            logger.debug("Requesting URL: %s", url)
+            with profiling.stage("scrape"):
+                response = requests.get(url, timeout=REQUEST_TIMEOUT_SECONDS, headers=default_headers)
             response.raise_for_status()
             response.encoding = response.apparent_encoding
             soup = BeautifulSoup(response.text, "html.parser")
-            logger.debug(f"Successfully fetched content from {url}")
+            logger.debug("Successfully fetched content from %s", url)
+            REQUESTS_TOTAL.inc(platform=self.PLATFORM_NAME, outcome="ok")
             return soup
         except requests.exceptions.Timeout:
-            logger.error(f"Request timed out for {url}")
+            REQUESTS_TOTAL.inc(platform=self.PLATFORM_NAME, outcome="timeout")
+            logger.error("Request timed out for %s", url)
             return None
         except requests.exceptions.RequestException as e:
+            REQUESTS_TOTAL.inc(platform=self.PLATFORM_NAME, outcome="error")
             logger.error(
-                f"Request failed for {url}: {e}", exc_info=logger.level == logging.DEBUG)
+                "Request failed for %s: %s", url, e, exc_info=logger.level == logging.DEBUG)
             return None
         # BeautifulSoupのパースエラーは通常Exceptionだが、requests例外以外は上位に伝播
 
     def fetch_novel_metadata(self, novel_url: str) -> Optional[Dict[str, Any]]:
+        from bs4 import Tag
+
         # infotopページ対応
         is_infotop = False
         if "/novelview/infotop/" in novel_url:
             is_infotop = True
         # ncodeページ or infotopページどちらも許可
         if not (re.match(r"https?://ncode\.syosetu\.com/n\d+[a-z]{2,3}/", novel_url) or "/novelview/infotop/" in novel_url):
-            logger.error(f"Invalid URL format for NarouScraper: {novel_url}")
+            logger.error("Invalid URL format for NarouScraper: %s", novel_url)
             return None
         soup = self._make_request(novel_url)
         if not soup:
             logger.error(
-                f"Failed to fetch HTML content for metadata: {novel_url}")
+                "Failed to fetch HTML content for metadata: %s", novel_url)
             return None
         metadata: Dict[str, Any] = {
             "novel_url": novel_url, "platform": self.PLATFORM_NAME}
-        logger.info(f"Start fetching metadata for: {novel_url}")
+        logger.info("Start fetching metadata for: %s", novel_url)
         try:
             if is_infotop:
                 # infotopページ用のパース
@@ -105,7 +128,7 @@ class NarouScraper(BaseScraper):
                 # infotopページではエピソードリストは取得不可
                 metadata["raw_episode_data"] = []
                 logger.info(
-                    f"Fetched infotop metadata for {novel_url}: Title='{metadata['title']}'")
+                    "Fetched infotop metadata for %s: Title='%s'", novel_url, metadata['title'])
                 return metadata
             # ncodeメインページ用のパース（現行HTML構造対応）
             title_tag = soup.find("h1", class_="p-novel__title")
@@ -163,26 +186,37 @@ class NarouScraper(BaseScraper):
                                 r"(\d{4}/\d{2}/\d{2} \d{2}:\d{2})", date_text)
                             if m:
                                 publication_date_str = m.group(1)
+                            # 改稿日時は「改」の title 属性にある
+                            revised_span = update_div.find("span", title=True)
+                            if revised_span:
+                                m = re.search(
+                                    r"(\d{4}/\d{2}/\d{2} \d{2}:\d{2})", revised_span["title"])
+                                if m:
+                                    update_time_str = m.group(1)
                         raw_episode_data.append({
                             "url": episode_full_url,
                             "title": full_title,
                             "number": episode_number_counter,
                             "publication_date_str": publication_date_str,
+                            "update_time_str": update_time_str,
                         })
                         episode_number_counter += 1
             else:
                 logger.warning(
-                    f"Episode list ('div.p-eplist') not found for {novel_url}. Cannot fetch episode list.")
+                    "Episode list ('div.p-eplist') not found for %s. Cannot fetch episode list.", novel_url)
             metadata["raw_episode_data"] = raw_episode_data
             logger.info(
-                f"Fetched metadata for {novel_url}: Title='{metadata['title']}', Episodes found: {len(raw_episode_data)}")
+                "Fetched metadata for %s: Title='%s', Episodes found: %d", novel_url, metadata['title'],
+                len(raw_episode_data))
             return metadata
         except Exception as e:
             logger.error(
-                f"Error parsing metadata for {novel_url}: {e}", exc_info=logger.level == logging.DEBUG)
+                "Error parsing metadata for %s: %s", novel_url, e, exc_info=logger.level == logging.DEBUG)
             return None
 
-    def _extract_text_with_ruby_as_plain(self, soup_element: Tag) -> str:
+    def _extract_text_with_ruby_as_plain(self, soup_element: "Tag") -> str:
+        from bs4 import NavigableString, Tag
+
         if not soup_element:
             return ""
         paragraphs = []
@@ -225,7 +259,7 @@ class NarouScraper(BaseScraper):
         soup = self._make_request(episode_url)
         if not soup:
             logger.error(
-                f"Failed to fetch HTML content for episode: {episode_url}")
+                "Failed to fetch HTML content for episode: %s", episode_url)
             return None
         try:
             honbun_div = soup.find("div", id="novel_honbun")
@@ -237,7 +271,8 @@ class NarouScraper(BaseScraper):
                     "div", class_="js-novel-text p-novel__text")
             if not honbun_div:
                 logger.error(
-                    f"Main text block (novel_honbun, novel_view, or js-novel-text p-novel__text) not found for {episode_url}")
+                    "Main text block (novel_honbun, novel_view, or js-novel-text p-novel__text) not found for %s",
+                    episode_url)
                 return None
             if honbun_div.get("class") and "js-novel-text" in honbun_div.get("class"):
                 logger.debug(
@@ -251,13 +286,13 @@ class NarouScraper(BaseScraper):
             cleaned_text = self._extract_text_with_ruby_as_plain(honbun_div)
             if not cleaned_text:
                 logger.warning(
-                    f"Extracted empty content for episode {episode_url}. HTML structure might have changed.")
+                    "Extracted empty content for episode %s. HTML structure might have changed.", episode_url)
             logger.info(
-                f"Successfully fetched and cleaned episode content for {episode_url}. Length: {len(cleaned_text)}")
+                "Successfully fetched and cleaned episode content for %s. Length: %d", episode_url, len(cleaned_text))
             return cleaned_text
         except Exception as e:
             logger.error(
-                f"Error parsing episode content for {episode_url}: {e}", exc_info=logger.level == logging.DEBUG)
+                "Error parsing episode content for %s: %s", episode_url, e, exc_info=logger.level == logging.DEBUG)
             return None
 
 
@@ -0,0 +1,35 @@
+from benchmarks import synthetic
+from benchmarks.cases import FIXTURE_NOVEL_URL, FixtureNarouScraper, run_all
+from benchmarks.harness import build_report, compare_results
+
+
+def test_fixture_metadata_parsing():
+    scraper = FixtureNarouScraper(
+        {FIXTURE_NOVEL_URL: synthetic.load_fixture(synthetic.NOVEL_TOP_FIXTURE)},
+        episode_html=synthetic.load_fixture(synthetic.EPISODE_FIXTURE))
+    metadata = scraper.fetch_novel_metadata(FIXTURE_NOVEL_URL)
+    assert metadata["title"] == "星降る街の図書館司書"
+    assert metadata["author"] == "月野しおり"
+    episodes = metadata["raw_episode_data"]
+    assert len(episodes) == 8
+    assert episodes[1]["title"] == "第一章　見習い司書 第2話　記憶を読む指先"
+    assert episodes[1]["publication_date_str"] == "2023/04/02 18:00"
+
+    content = scraper.fetch_episode_content(episodes[0]["url"])
+    assert content.startswith("その図書館は")
+    assert "見習い司書のリラは" in content
+    assert "みならい" not in content
+
+
+def test_benchmark_suite_smoke(tmp_path):
+    results = run_all([20], repeat=1, groups=["scraper", "db", "pipeline"], work_dir=str(tmp_path))
+    report = build_report(results)
+    keys = {r["key"] for r in report["results"]}
+    assert "pipeline.ingest_and_analyze[episodes=20,paragraphs=30]" in keys
+    assert "context_db.get_or_create_episode[episodes=20]" in keys
+
+    slower = build_report(results)
+    for row in slower["results"]:
+        row["timings_sec"]["median"] *= 2
+    statuses = {row["status"] for row in compare_results(report, slower)}
+    assert statuses == {"regression"}
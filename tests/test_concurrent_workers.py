@@ -0,0 +1,171 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.context_db import ContextDB
+from core.db_schemas import Base, Novel, ProcessingStatus
+from core.pipeline import analyze_novel, summarize_pending
+
+NOVEL_URL = "https://example.com/novels/1/"
+
+
+class CountingLLM:
+    def __init__(self):
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def generate_text(self, prompt, **kwargs):
+        with self.lock:
+            self.prompts.append(prompt)
+        return "要約"
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def db(request, tmp_path):
+    if request.param == "sqlite":
+        yield ContextDB(db_url=f"sqlite:///{tmp_path / 'workers.db'}")
+        return
+    url = os.getenv("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    db = ContextDB(db_url=url)
+    Base.metadata.drop_all(db.engine)
+    yield db
+    Base.metadata.drop_all(db.engine)
+    db.engine.dispose()
+
+
+def _run_threads(count, target):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(i):
+        barrier.wait()
+        results[i] = target(i)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _add_episodes(db, count):
+    novel, _ = db.get_or_create_novel(NOVEL_URL, defaults={"title": "作品"})
+    for number in range(1, count + 1):
+        episode, _ = db.get_or_create_episode(novel.id, f"{NOVEL_URL}{number}/", defaults={"episode_number": number})
+        db.update_episode_content(episode.id, f"第{number}話の本文", 6)
+    return novel
+
+
+def test_concurrent_get_or_create_does_not_duplicate(db):
+    results = _run_threads(8, lambda i: db.get_or_create_novel(NOVEL_URL, defaults={"title": "作品"}))
+    assert all(novel is not None for novel, _ in results)
+    assert len({novel.id for novel, _ in results}) == 1
+    assert sum(created for _, created in results) >= 1
+    with db.get_db() as session:
+        assert session.query(Novel).filter_by(url=NOVEL_URL).count() == 1
+
+
+def test_claims_are_disjoint(db):
+    novel = _add_episodes(db, 20)
+
+    def claim_all(_):
+        claimed = []
+        while True:
+            batch = db.claim_pending_episodes(3)
+            if not batch:
+                return claimed
+            claimed.extend(e.id for e in batch)
+
+    results = _run_threads(4, claim_all)
+    claimed = [episode_id for ids in results for episode_id in ids]
+    assert len(claimed) == len(set(claimed)) == 20
+    assert db.claim_pending_episodes(3) == []
+    assert db.release_episode_claims(claimed[:5]) == 5
+    assert [e.episode_number for e in db.claim_pending_episodes(10)] == sorted(
+        e.episode_number for e in db.get_episodes_for_novel(novel.id) if e.id in claimed[:5])
+
+
+def test_crawl_target_claims_are_disjoint(db):
+    now = datetime(2024, 1, 1)
+    urls = [f"https://ncode.syosetu.com/n{number:04d}aa/" for number in range(12)]
+    for url in urls:
+        db.add_crawl_target(url)
+    db.add_crawl_target("https://example.com/novels/1/")
+
+    def claim_all(_):
+        claimed = []
+        while True:
+            batch = db.claim_due_crawl_targets(now, 600, limit=2, hosts=["ncode.syosetu.com"])
+            if not batch:
+                return claimed
+            claimed.extend(t.id for t in batch)
+
+    results = _run_threads(4, claim_all)
+    claimed = [target_id for ids in results for target_id in ids]
+    assert len(claimed) == len(set(claimed)) == len(urls)
+    leased_until = now + timedelta(seconds=600)
+    assert db.release_crawl_claims(claimed[:3], leased_until, now) == 3
+    assert {t.id for t in db.claim_due_crawl_targets(now, 600, hosts=["ncode.syosetu.com"])} == set(claimed[:3])
+    assert db.release_crawl_claims(claimed[:3], now, now) == 0
+
+
+def test_crawl_target_claims_follow_score(db):
+    now = datetime(2024, 1, 1)
+    urls = {name: f"https://ncode.syosetu.com/{name}/" for name in ("new", "hot", "stale")}
+    targets = {name: db.add_crawl_target(url)[0] for name, url in urls.items()}
+    # 巡回時刻は "stale" が最も古いが、重みと更新頻度から "hot" の方が新しい話が出ていそう
+    db.update_crawl_target(targets["hot"].id, {
+        "priority": 5.0, "update_interval_sec": 86400, "last_crawled_at": now - timedelta(days=1),
+        "next_crawl_at": now - timedelta(hours=1)})
+    db.update_crawl_target(targets["stale"].id, {
+        "update_interval_sec": 30 * 86400, "last_crawled_at": now - timedelta(days=40),
+        "next_crawl_at": now - timedelta(days=25)})
+
+    assert [t.novel_url for t in db.get_due_crawl_targets(now)] == [urls["new"], urls["hot"], urls["stale"]]
+    assert {t.novel_url for t in db.claim_due_crawl_targets(now, 600, limit=2)} == {urls["new"], urls["hot"]}
+    assert [t.novel_url for t in db.claim_due_crawl_targets(now, 600)] == [urls["stale"]]
+
+
+def test_summarize_pending_workers_share_the_queue(db):
+    novel = _add_episodes(db, 12)
+    llm = CountingLLM()
+    processed = _run_threads(3, lambda i: summarize_pending(db, llm, batch_size=2))
+    assert sum(processed) == len(llm.prompts) == 12
+    episodes = db.get_episodes_for_novel(novel.id)
+    assert all(e.summary_generation_status == ProcessingStatus.COMPLETED for e in episodes)
+
+
+def test_analyze_skips_claimed_episodes(db):
+    novel = _add_episodes(db, 5)
+    claimed = {e.id for e in db.claim_pending_episodes(2)}
+    llm = CountingLLM()
+    assert analyze_novel(db, llm, novel.id) == 3
+    statuses = {e.id: e.summary_generation_status for e in db.get_episodes_for_novel(novel.id)}
+    assert all(statuses[i] == ProcessingStatus.PROCESSING for i in claimed)
+    assert all(s == ProcessingStatus.COMPLETED for i, s in statuses.items() if i not in claimed)
+
+
+def test_analyze_leaves_episodes_claimed_while_it_runs(db):
+    novel = _add_episodes(db, 14)
+    episodes = db.get_episodes_for_novel(novel.id)
+    db.update_episode_llm_results(episodes[0].id, {"summary_generation_status": ProcessingStatus.FAILED})
+    claimed = []
+
+    class ClaimingLLM(CountingLLM):
+        def generate_text(self, prompt, **kwargs):
+            # 最初のバッチの要約中に、別のワーカーが残りの話を取り出す
+            if not claimed:
+                claimed.extend(e.id for e in db.claim_pending_episodes(3, novel_id=novel.id))
+            return super().generate_text(prompt, **kwargs)
+
+    llm = ClaimingLLM()
+    processed = analyze_novel(db, llm, novel.id)
+    assert processed == len(llm.prompts) == 14 - len(claimed) and len(claimed) == 3
+    statuses = {e.id: e.summary_generation_status for e in db.get_episodes_for_novel(novel.id)}
+    assert statuses[episodes[0].id] == ProcessingStatus.COMPLETED
+    assert all(statuses[i] == ProcessingStatus.PROCESSING for i in claimed)
@@ -1,8 +1,12 @@
+import tempfile
+from pathlib import Path
+
 from core.context_db import ContextDB
 
 
-def test_contextdb_basic():
-    db = ContextDB()
+def test_contextdb_basic(tmp_path):
+    # 実運用の data/novel_context.db を汚さないよう一時DBを使う
+    db = ContextDB(db_url=f"sqlite:///{tmp_path / 'novel_context.db'}")
     # Novel追加
     novel, created = db.get_or_create_novel(
         url="https://example.com/novel/1",
@@ -58,4 +62,5 @@ def test_contextdb_basic():
 
 
 if __name__ == "__main__":
-    test_contextdb_basic()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_contextdb_basic(Path(tmp_dir))
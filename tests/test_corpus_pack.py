@@ -0,0 +1,82 @@
+import pytest
+
+from core.context_db import ContextDB
+from core.corpus_pack import CorpusPack, pack_path, sync_novel_pack
+
+NOVEL_URL = "https://example.com/novels/1/"
+
+
+def _episode_text(number, paragraphs=4):
+    return "\n".join(f"第{number}話の{k}段落目。" for k in range(paragraphs))
+
+
+def test_random_paragraph_access_and_crash_recovery(tmp_path):
+    directory = str(tmp_path / "pack")
+    with CorpusPack(directory) as pack:
+        pack.append_episode(10, 1, "冒頭の段落\n\n二つ目は空行の後")
+        pack.append_episode(11, 2, "éé\n漢字")
+        view = pack.paragraph(2, 1)
+        assert isinstance(view, memoryview) and view.tobytes() == "漢字".encode("utf-8")
+        assert pack.paragraph_text(1, 2) == "二つ目は空行の後"
+        assert pack.paragraph_text(1, 1) == ""
+        assert pack.episode_text(1) == "冒頭の段落\n\n二つ目は空行の後"
+        with pytest.raises(IndexError):
+            pack.paragraph(2, 2)
+        with pytest.raises(KeyError):
+            pack.paragraph(3, 0)
+
+    # meta.json の更新前に落ちた追記は、開き直したときに切り捨てられる
+    with open(f"{directory}/text.utf8", "ab") as f:
+        f.write("書きかけ".encode("utf-8"))
+    reopened = CorpusPack(directory)
+    assert reopened.episode_numbers() == [1, 2]
+    reopened.append_episode(12, 3, "三話目")
+    assert reopened.episode_text(3) == "三話目" and reopened.episode_text(2) == "éé\n漢字"
+
+
+def test_sync_appends_new_and_revised_episodes(tmp_path):
+    db = ContextDB(db_url=f"sqlite:///{tmp_path / 'pack.db'}")
+    novel, _ = db.get_or_create_novel(NOVEL_URL, defaults={"title": "作品"})
+    episode_ids = []
+    for number in range(1, 6):
+        episode, _ = db.get_or_create_episode(novel.id, f"{NOVEL_URL}{number}/", defaults={"episode_number": number})
+        episode_ids.append(episode.id)
+        if number < 5:
+            db.store_episode_content(episode.id, _episode_text(number))
+    root = str(tmp_path / "corpus")
+
+    assert sync_novel_pack(db, novel.id, root=root) == 4
+    assert sync_novel_pack(db, novel.id, root=root) == 0
+    db.store_episode_content(episode_ids[4], _episode_text(5))
+    revised = _episode_text(2).replace("第2話の1段落目。", "改稿した段落。")
+    db.store_episode_content(episode_ids[1], revised)
+    assert sync_novel_pack(db, novel.id, root=root, compact_ratio=1.0) == 2
+
+    pack = CorpusPack(pack_path(root, novel.id))
+    assert pack.episode_numbers() == [1, 2, 3, 4, 5]
+    assert pack.paragraph_text(2, 1) == "改稿した段落。"
+    assert pack.episode(2).revision == 1
+    assert pack.garbage_ratio > 0
+    pack.compact()
+    assert pack.garbage_ratio == 0
+    assert [pack.episode_text(n) for n in range(1, 6)] == [db.get_episode_by_id(i).content_cleaned
+                                                           for i in episode_ids]
+
+
+def test_concurrent_handles_append_and_compact(tmp_path):
+    directory = str(tmp_path / "pack")
+    first, second = CorpusPack(directory), CorpusPack(directory)
+    first.append_episode(1, 1, "a")
+    # 両方のハンドルが開いた後の追記も、他方の追記を上書きしない
+    second.append_episode(2, 2, "ccc")
+    first.append_episode(3, 3, "dd")
+    assert second.episode_text(3) == "dd" and first.episode_text(2) == "ccc"
+
+    second.append_episode(11, 1, "改稿")
+    second.compact()
+    # compact でディレクトリが置き換わっても、他のハンドルは読み直して追記を続けられる
+    first.append_episode(4, 4, "eeee")
+    assert first.episode_text(1) == "改稿"
+    reopened = CorpusPack(directory)
+    assert [reopened.episode_text(n) for n in reopened.episode_numbers()] == ["改稿", "ccc", "dd", "eeee"]
+    assert reopened.garbage_ratio == 0
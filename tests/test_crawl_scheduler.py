@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+
+from benchmarks import synthetic
+from benchmarks.cases import FixtureNarouScraper
+from core.context_db import ContextDB
+from scrapers.base_scraper import BaseScraper
+from scrapers.crawl_scheduler import CrawlScheduler, estimate_update_interval
+
+LONG_URL = "https://ncode.syosetu.com/n1111aa/"
+SHORT_URL = "https://ncode.syosetu.com/n2222bb/"
+OTHER_URL = "https://example.com/novels/1/"
+START = datetime(2024, 1, 1)
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 0.0
+
+    def clock(self):
+        return self.t
+
+    def sleep(self, seconds):
+        self.t += seconds
+
+    def now(self):
+        return START + timedelta(seconds=self.t)
+
+
+class RecordingScraper(FixtureNarouScraper):
+    def __init__(self, clock, calls, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.clock = clock
+        self.calls = calls
+
+    def fetch_novel_metadata(self, novel_url):
+        self.calls.append((self.clock.t, novel_url))
+        return super().fetch_novel_metadata(novel_url)
+
+    def fetch_episode_content(self, episode_url):
+        self.calls.append((self.clock.t, episode_url))
+        return super().fetch_episode_content(episode_url)
+
+
+class OtherHostScraper(BaseScraper):
+    PLATFORM_NAME = "Example"
+
+    def __init__(self, clock, calls):
+        self.clock = clock
+        self.calls = calls
+
+    def fetch_novel_metadata(self, novel_url):
+        self.calls.append((self.clock.t, novel_url))
+        return {"title": "other", "author": "a", "novel_url": novel_url, "platform": self.PLATFORM_NAME,
+                "raw_episode_data": [{"url": f"{novel_url}{n}/", "title": f"{n}", "number": n,
+                                      "publication_date_str": f"2023/12/{n:02d} 12:00"} for n in (1, 2)]}
+
+    def fetch_episode_content(self, episode_url):
+        self.calls.append((self.clock.t, episode_url))
+        return "本文"
+
+
+def test_estimate_update_interval_uses_recent_median():
+    dates = [datetime(2024, 1, 1) + timedelta(days=7 * i) for i in range(5)]
+    dates += [dates[-1] + timedelta(days=1), dates[-1] + timedelta(days=2), dates[-1] + timedelta(days=3)]
+    assert estimate_update_interval(dates) == 7 * 86400
+    assert estimate_update_interval([datetime(2024, 1, 1)]) is None
+
+
+def test_run_respects_budget_politeness_and_fairness(tmp_path):
+    clock = FakeClock()
+    narou_calls, other_calls = [], []
+    narou = RecordingScraper(clock, narou_calls, {
+        LONG_URL: synthetic.build_novel_top_html(30, ncode="n1111aa"),
+        SHORT_URL: synthetic.build_novel_top_html(3, ncode="n2222bb"),
+    }, episode_html=synthetic.build_episode_html(2))
+    db = ContextDB(db_url=f"sqlite:///{tmp_path / 'crawl.db'}")
+    scheduler = CrawlScheduler(
+        db, {"ncode.syosetu.com": narou, "example.com": OtherHostScraper(clock, other_calls)},
+        host_delay_sec=1.0, max_episodes_per_visit=5, clock=clock.clock, sleep=clock.sleep, now=clock.now)
+    for url in (LONG_URL, SHORT_URL, OTHER_URL):
+        assert scheduler.add_target(url) is not None
+
+    report = scheduler.run(request_budget=12)
+
+    assert report.requests == len(narou_calls) + len(other_calls) == 12
+    for calls in (narou_calls, other_calls):
+        times = [t for t, _ in calls]
+        assert all(later - earlier >= 1.0 for earlier, later in zip(times, times[1:]))
+    # 短編と別ホストの作品は、長編の取得待ちにならずに完了する
+    assert len(other_calls) == 3
+    short_novel, _ = db.get_or_create_novel(SHORT_URL)
+    assert all(e.char_count for e in db.get_episodes_for_novel(short_novel.id))
+
+    targets = {t.novel_url: t for t in db.get_due_crawl_targets(clock.now() + timedelta(days=365))}
+    assert targets[LONG_URL].next_crawl_at <= clock.now()
+    assert targets[SHORT_URL].next_crawl_at > clock.now()
+    assert targets[SHORT_URL].update_interval_sec == 86400
+    assert [t.novel_url for t in scheduler.plan()] == [LONG_URL]
+
+
+def test_run_releases_claimed_targets_it_did_not_visit(tmp_path):
+    clock = FakeClock()
+    calls = []
+    narou = RecordingScraper(clock, calls, {
+        LONG_URL: synthetic.build_novel_top_html(30, ncode="n1111aa"),
+        SHORT_URL: synthetic.build_novel_top_html(3, ncode="n2222bb"),
+    }, episode_html=synthetic.build_episode_html(2))
+    db = ContextDB(db_url=f"sqlite:///{tmp_path / 'crawl.db'}")
+    scheduler = CrawlScheduler(db, {"ncode.syosetu.com": narou}, host_delay_sec=1.0, max_active_per_host=1,
+                               clock=clock.clock, sleep=clock.sleep, now=clock.now)
+    for url in (LONG_URL, SHORT_URL):
+        scheduler.add_target(url)
+    started = clock.now()
+    # 巡回中の対象は別のスケジューラから取り出せない
+    original_claim = db.claim_due_crawl_targets
+
+    def claim_then_check(*args, **kwargs):
+        claimed = original_claim(*args, **kwargs)
+        assert len(claimed) == 2 and original_claim(started, 600) == []
+        return claimed
+
+    db.claim_due_crawl_targets = claim_then_check
+    assert scheduler.run(request_budget=2).requests == 2
+
+    # 予算切れで始めなかった作品は、貸出期限を待たずに次の実行で巡回される
+    targets = {t.novel_url: t for t in db.get_due_crawl_targets(clock.now() + timedelta(days=365))}
+    assert targets[SHORT_URL].next_crawl_at == started
+    assert [url for _, url in calls] == [LONG_URL, f"{LONG_URL}1/"]
+    assert SHORT_URL in [t.novel_url for t in scheduler.plan()]
+
+
+def test_run_claims_highest_score_first_when_budget_is_short(tmp_path):
+    clock = FakeClock()
+    calls = []
+    narou = RecordingScraper(clock, calls, {
+        LONG_URL: synthetic.build_novel_top_html(30, ncode="n1111aa"),
+        SHORT_URL: synthetic.build_novel_top_html(3, ncode="n2222bb"),
+    }, episode_html=synthetic.build_episode_html(2))
+    db = ContextDB(db_url=f"sqlite:///{tmp_path / 'crawl.db'}")
+    scheduler = CrawlScheduler(db, {"ncode.syosetu.com": narou}, clock=clock.clock, sleep=clock.sleep, now=clock.now)
+    stale = scheduler.add_target(LONG_URL)
+    hot = scheduler.add_target(SHORT_URL, priority=5.0)
+    # 長く巡回時刻を過ぎた更新の少ない作品より、重みが大きく毎日更新される作品を先に巡回する
+    db.update_crawl_target(stale.id, {"update_interval_sec": 30 * 86400, "last_crawled_at": START - timedelta(days=40),
+                                      "next_crawl_at": START - timedelta(days=25)})
+    db.update_crawl_target(hot.id, {"update_interval_sec": 86400, "last_crawled_at": START - timedelta(days=1),
+                                    "next_crawl_at": START - timedelta(hours=1)})
+    assert [t.novel_url for t in scheduler.plan()] == [SHORT_URL, LONG_URL]
+
+    assert scheduler.run(request_budget=1).requests == 1
+    assert calls == [(0.0, SHORT_URL)]
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import pytest
+
+from core.context_db import ContextDB
+from core.db_schemas import Episode, Novel
+from core.exporter import ParquetExporter
+
+pa_dataset = pytest.importorskip("pyarrow.dataset")
+
+
+def _add_episodes(db, novel_id, numbers, fetched_at):
+    for number in numbers:
+        episode, _ = db.get_or_create_episode(novel_id, f"https://example.com/{novel_id}/{number}/", defaults={
+            "episode_number": number, "episode_title": f"第{number}話"})
+        db.update_episode_content(episode.id, "本文" * number, number * 2)
+    # 取得時刻を明示的に決め、エクスポート時の DB の時計 (_current_second) と比べられるようにする
+    with db.engine.begin() as conn:
+        conn.execute(Episode.__table__.update().where(
+            Episode.novel_id == novel_id, Episode.episode_number.in_(list(numbers))
+        ).values(last_fetched_at=fetched_at))
+
+
+@pytest.fixture
+def db_clock(monkeypatch):
+    clock = {"now": datetime(2024, 1, 1, 0, 0, 1)}
+    monkeypatch.setattr(ParquetExporter, "_current_second", staticmethod(lambda conn: clock["now"]))
+    return clock
+
+
+def _new_db(tmp_path):
+    db = ContextDB(db_url=f"sqlite:///{tmp_path / 'export.db'}")
+    novel_ids = [db.get_or_create_novel(f"https://example.com/{i}/", defaults={"title": f"作品{i}"})[0].id
+                 for i in (1, 2)]
+    with db.engine.begin() as conn:
+        conn.execute(Novel.__table__.update().values(updated_at=datetime(2024, 1, 1)))
+    return db, novel_ids
+
+
+def _read_rows(output_dir):
+    return pa_dataset.dataset(str(output_dir / "episodes"), format="parquet", partitioning="hive").to_table()
+
+
+def test_incremental_partitioned_export(tmp_path, db_clock):
+    db, novel_ids = _new_db(tmp_path)
+    _add_episodes(db, novel_ids[0], range(1, 6), datetime(2024, 1, 1))
+    _add_episodes(db, novel_ids[1], range(1, 4), datetime(2024, 1, 1))
+    output_dir = tmp_path / "export"
+    exporter = ParquetExporter(db, str(output_dir), batch_size=2)
+
+    counts = exporter.export(tables=["episodes", "novels"],
+                             columns={"episodes": ["id", "episode_number", "char_count"]})
+    assert counts == {"episodes": 8, "novels": 2}
+    table = _read_rows(output_dir)
+    assert table.num_rows == 8
+    assert set(table.column_names) == {"id", "episode_number", "char_count", "novel_id"}
+    assert sorted(p.name for p in (output_dir / "episodes").iterdir()) == [f"novel_id={i}" for i in novel_ids]
+
+    _add_episodes(db, novel_ids[0], range(6, 8), datetime(2024, 1, 2))
+    db_clock["now"] = datetime(2024, 1, 3)
+    assert exporter.export(tables=["episodes"]) == {"episodes": 2}
+    assert _read_rows(output_dir).num_rows == 10
+    assert exporter.export(tables=["episodes"]) == {"episodes": 0}
+    assert exporter.load_watermarks()["episodes"]["value"].startswith("2024-01-03")
+
+
+def test_rows_in_the_current_second_wait_for_the_next_export(tmp_path, db_clock):
+    db, novel_ids = _new_db(tmp_path)
+    _add_episodes(db, novel_ids[0], range(1, 3), datetime(2024, 1, 1))
+    exporter = ParquetExporter(db, str(tmp_path / "export"))
+    assert exporter.export(tables=["episodes"]) == {"episodes": 2}
+
+    # 秒単位の時計では、エクスポート中の秒に書き込まれた行が最大値と同じ時刻で後からコミットされうる
+    db_clock["now"] = datetime(2024, 1, 2, 12, 0, 0)
+    _add_episodes(db, novel_ids[0], [3], datetime(2024, 1, 2, 12, 0, 0))
+    assert exporter.export(tables=["episodes"]) == {"episodes": 0}
+    _add_episodes(db, novel_ids[0], [4], datetime(2024, 1, 2, 12, 0, 0))
+    db_clock["now"] = datetime(2024, 1, 2, 12, 0, 1)
+    assert exporter.export(tables=["episodes"]) == {"episodes": 2}
+    assert sorted(_read_rows(tmp_path / "export").column("episode_number").to_pylist()) == [1, 2, 3, 4]
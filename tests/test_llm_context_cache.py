@@ -0,0 +1,53 @@
+from benchmarks.fake_llm import FakeLLMClient
+from core.context_db import ContextDB
+from core.db_schemas import Episode, ProcessingStatus
+from core.llm_client import LLMClient
+from core.novel_context import build_novel_context, novel_context_key, register_novel_context
+from core.pipeline import analyze_novel
+
+NOVEL_URL = "https://example.com/novels/1/"
+
+
+def _new_novel(tmp_path, episodes=3):
+    db = ContextDB(db_url=f"sqlite:///{tmp_path / 'context.db'}")
+    novel, _ = db.get_or_create_novel(NOVEL_URL, defaults={"title": "作品", "synopsis": "勇者が旅に出る話。" * 20})
+    db.get_or_create_character(novel.id, "アリス", defaults={"reading": "ありす", "role_in_story_llm": "主人公"})
+    for number in range(1, episodes + 1):
+        episode, _ = db.get_or_create_episode(novel.id, f"{NOVEL_URL}{number}/", defaults={"episode_number": number})
+        db.store_episode_content(episode.id, f"第{number}話の本文。" * 50)
+    return db, novel.id
+
+
+def test_context_is_reused_until_rows_change(tmp_path):
+    db, novel_id = _new_novel(tmp_path)
+    llm = LLMClient(api_key="")
+    first = register_novel_context(db, llm, novel_id)
+    assert first.key == novel_context_key(novel_id) and first.handle is None
+    assert "アリス（ありす）: 主人公" in first.text
+    assert register_novel_context(db, llm, novel_id) is first
+
+    db.get_or_create_character(novel_id, "ボブ")
+    refreshed = register_novel_context(db, llm, novel_id)
+    assert refreshed.fingerprint != first.fingerprint and "- ボブ" in refreshed.text
+    assert build_novel_context(db, novel_id + 1) is None
+
+
+def test_analyze_sends_context_once_when_cached(tmp_path):
+    # キャッシュの作成料・保存料があるため、数話程度では前置きを毎回送る方が安い
+    db, novel_id = _new_novel(tmp_path, episodes=12)
+    context_text = build_novel_context(db, novel_id)
+    llms = {}
+    for mode in ("inline", "cached"):
+        llm = FakeLLMClient(prefix_cache=mode == "cached")
+        llm.record_prompts = True
+        assert analyze_novel(db, llm, novel_id) == 12
+        assert all(prompt.startswith(context_text) for prompt in llm.prompts)
+        llms[mode] = llm
+        with db.engine.begin() as conn:
+            conn.execute(Episode.__table__.update().values(summary_generation_status=ProcessingStatus.PENDING))
+
+    inline, cached = llms["inline"], llms["cached"]
+    assert inline.prompts == cached.prompts
+    assert cached.cache_writes == 1 and inline.cached_tokens == 0
+    assert cached.prompt_tokens < inline.prompt_tokens
+    assert cached.cost_usd < inline.cost_usd and cached.simulated_sec < inline.simulated_sec
@@ -0,0 +1,71 @@
+import logging
+
+import queue
+
+from core.logger_setup import DeferredQueueHandler, RateLimitFilter, attach_queue_handler
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+
+
+def _make_logger(name):
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = _ListHandler()
+    logger.addHandler(handler)
+    return logger, handler
+
+
+def test_rate_limit_filter_suppresses_repeated_templates():
+    logger, handler = _make_logger("tests.logging.rate_limit")
+    rate_filter = RateLimitFilter(max_per_window=2, window_sec=3600)
+    logger.addFilter(rate_filter)
+    for i in range(5):
+        logger.info("Episode found: ID=%s", i)
+    logger.info("Episode created: ID=%s", 99)
+    logger.warning("Episode found: ID=%s", 100)
+    assert handler.messages == [
+        "Episode found: ID=0", "Episode found: ID=1", "Episode created: ID=99", "Episode found: ID=100"]
+
+    # 時間枠が切り替わると、抑制件数が付記される
+    rate_filter.window_sec = 0
+    logger.info("Episode found: ID=%s", 5)
+    assert handler.messages[-1] == "Episode found: ID=5 (suppressed 3 similar messages in the last 0s)"
+
+
+def test_rate_limit_filter_keeps_a_bounded_number_of_templates():
+    logger, handler = _make_logger("tests.logging.rate_limit_keys")
+    rate_filter = RateLimitFilter(max_per_window=1, window_sec=3600, max_keys=3)
+    logger.addFilter(rate_filter)
+    for i in range(10):
+        logger.info(f"Fetched {i}")
+    logger.info("Fetched 9")
+    assert len(rate_filter._windows) == 3
+    assert handler.messages == [f"Fetched {i}" for i in range(10)]
+
+
+def test_queue_handler_formats_in_listener_thread():
+    logger, handler = _make_logger("tests.logging.queue")
+    listener = attach_queue_handler(logger, queue_size=100)
+    payload = ["mutable"]
+    logger.info("payload=%s", payload)
+    payload.append("changed")
+    listener.stop()
+    assert handler.messages == ["payload=['mutable']"]
+    assert [type(h).__name__ for h in logger.handlers] == ["DeferredQueueHandler"]
+
+
+def test_queue_handler_counts_dropped_records():
+    handler = DeferredQueueHandler(queue.Queue(maxsize=1))
+    logger, _ = _make_logger("tests.logging.dropped")
+    logger.handlers = [handler]
+    for i in range(3):
+        logger.info("record %s", i)
+    assert handler.dropped == 2
@@ -0,0 +1,74 @@
+import json
+import urllib.request
+
+from core import metrics
+
+
+def test_disabled_registry_records_nothing():
+    registry = metrics.MetricsRegistry(enabled=False)
+    counter = registry.counter("c_total", "test counter")
+    histogram = registry.histogram("h_seconds", "test histogram")
+    counter.inc()
+    with histogram.time():
+        pass
+    assert counter.value() == 0
+    assert histogram.count() == 0
+
+
+def test_counter_histogram_and_prometheus_text():
+    registry = metrics.MetricsRegistry(enabled=True)
+    counter = registry.counter("requests_total", "Requests.", label_names=("outcome",))
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+
+    @metrics.timed(histogram)
+    def work():
+        return "done"
+
+    counter.inc(outcome="ok")
+    counter.inc(2, outcome="error")
+    counter.inc(outcome='bad "plugin"\\x\n')
+    assert work() == "done"
+    histogram.observe(0.5)
+
+    assert counter.value(outcome="error") == 2
+    assert histogram.count() == 2
+    text = registry.render_prometheus()
+    assert 'requests_total{outcome="ok"} 1.0' in text
+    assert 'requests_total{outcome="bad \\"plugin\\"\\\\x\\n"} 1.0' in text
+    assert 'latency_seconds_bucket{le="1.0"} 2' in text
+    assert "latency_seconds_count 2" in text
+    snapshot = registry.snapshot()["metrics"]["latency_seconds"]["values"][0]
+    assert snapshot["count"] == 2 and "p99" in snapshot
+
+
+def test_exporters(tmp_path):
+    registry = metrics.MetricsRegistry(enabled=True)
+    registry.counter("exported_total", "Exported.").inc()
+
+    path = tmp_path / "metrics.json"
+    metrics.write_json_snapshot(str(path), registry)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["metrics"]["exported_total"]["values"][0]["value"] == 1.0
+
+    server = metrics.start_prometheus_server(port=0, registry=registry)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert "exported_total 1.0" in response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_shutdown_metrics_stops_exporters_and_writes_last_snapshot(tmp_path):
+    path = tmp_path / "metrics.json"
+    metrics.setup_metrics(True, ["prometheus", "json"], port=0, json_path=str(path), json_interval_sec=3600)
+    try:
+        metrics.counter("shutdown_test_total", "Shutdown test.").inc()
+        assert not path.exists()
+        metrics.shutdown_metrics()
+        data = json.loads(path.read_text(encoding="utf-8"))
+        assert data["metrics"]["shutdown_test_total"]["values"][0]["value"] == 1.0
+        metrics.shutdown_metrics()  # 停止済みなら何もしない
+    finally:
+        metrics.REGISTRY.enabled = False
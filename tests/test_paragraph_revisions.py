@@ -0,0 +1,140 @@
+from sqlalchemy import create_engine, inspect, text
+
+from benchmarks import synthetic
+from benchmarks.cases import FixtureNarouScraper
+from core import migrations
+from core.context_builder import ContextBuilder
+from core.context_db import ContextDB
+from core.db_schemas import Base, Episode, EpisodeParagraph, Foreshadowing, ProcessingStatus, SCHEMA_VERSION
+from core.embeddings import HashingEmbeddingBackend
+from core.pipeline import ingest_novel
+
+NOVEL_URL = "https://example.com/novels/1/"
+PARAGRAPHS = [f"{synthetic.build_paragraph_text(i)}（{i}）" for i in range(20)]
+
+
+def _new_episode(tmp_path):
+    db = ContextDB(db_url=f"sqlite:///{tmp_path / 'revisions.db'}")
+    novel, _ = db.get_or_create_novel(NOVEL_URL, defaults={"title": "作品"})
+    episode, _ = db.get_or_create_episode(novel.id, f"{NOVEL_URL}1/", defaults={"episode_number": 1})
+    return db, episode.id
+
+
+def test_revisions_are_stored_as_reverse_deltas(tmp_path):
+    db, episode_id = _new_episode(tmp_path)
+    versions = ["\n".join(PARAGRAPHS)]
+    versions.append("\n".join(PARAGRAPHS[:3] + ["書き直した段落"] + PARAGRAPHS[4:]))
+    versions.append("\n".join(["追加した冒頭"] + PARAGRAPHS[:3] + ["書き直した段落"] + PARAGRAPHS[4:15]))
+
+    first = db.store_episode_content(episode_id, versions[0])
+    assert first.changed and first.revision is None
+    second = db.store_episode_content(episode_id, versions[1])
+    assert second.revision == 1 and second.diff.changed_positions == [3]
+    assert second.diff.changed_ratio < 0.1
+    third = db.store_episode_content(episode_id, versions[2])
+    assert third.revision == 2 and third.diff.changed_positions == [0]
+    assert not db.store_episode_content(episode_id, versions[2]).changed
+
+    assert [db.get_episode_version(episode_id, n) for n in range(3)] == versions
+    assert db.get_episode_version(episode_id, 3) is None
+    with db.get_db() as session:
+        rows = session.query(EpisodeParagraph).filter(EpisodeParagraph.episode_id == episode_id).count()
+    assert rows == 16
+    assert db.get_episode_by_id(episode_id).char_count == len(versions[2])
+
+
+def test_small_revision_only_invalidates_dependent_work(tmp_path):
+    db, episode_id = _new_episode(tmp_path)
+    db.store_episode_content(episode_id, "\n".join(PARAGRAPHS))
+    db.update_episode_llm_results(episode_id, {"summary_generation_status": ProcessingStatus.COMPLETED})
+    with db.engine.begin() as conn:
+        for snippet in (PARAGRAPHS[2], PARAGRAPHS[10]):
+            conn.execute(Foreshadowing.__table__.insert().values(
+                novel_id=1, raised_episode_id=episode_id, context_snippet=snippet,
+                llm_analysis_status=ProcessingStatus.COMPLETED))
+
+    db.store_episode_content(episode_id, "\n".join(PARAGRAPHS[:2] + ["伏線の段落を差し替え"] + PARAGRAPHS[3:]))
+    assert db.get_episode_by_id(episode_id).summary_generation_status == ProcessingStatus.COMPLETED
+    with db.get_db() as session:
+        statuses = [f.llm_analysis_status for f in session.query(Foreshadowing).order_by(Foreshadowing.id)]
+    assert statuses == [ProcessingStatus.PENDING, ProcessingStatus.COMPLETED]
+
+    db.store_episode_content(episode_id, "\n".join(PARAGRAPHS[:10]))
+    assert db.get_episode_by_id(episode_id).summary_generation_status == ProcessingStatus.PENDING
+
+
+def test_repeated_small_revisions_accumulate(tmp_path):
+    db, episode_id = _new_episode(tmp_path)
+    db.store_episode_content(episode_id, "\n".join(PARAGRAPHS))
+    db.update_episode_llm_results(episode_id, {"summary_generation_status": ProcessingStatus.COMPLETED})
+
+    text = list(PARAGRAPHS)
+    statuses = []
+    for position in range(4):
+        text[position] = f"書き直した段落（{position}）"
+        result = db.store_episode_content(episode_id, "\n".join(text))
+        assert result.diff.changed_ratio < 0.1
+        statuses.append(db.get_episode_by_id(episode_id).summary_generation_status)
+    # 1回ごとの変更は小さくても、累計が閾値に達した時点で要約を作り直す
+    assert statuses[0] == ProcessingStatus.COMPLETED and statuses[-1] == ProcessingStatus.PENDING
+
+    db.update_episode_llm_results(episode_id, {"summary_generation_status": ProcessingStatus.COMPLETED})
+    text[10] = "要約後の小さな改稿"
+    db.store_episode_content(episode_id, "\n".join(text))
+    assert db.get_episode_by_id(episode_id).summary_generation_status == ProcessingStatus.COMPLETED
+
+
+def test_reindex_embeds_only_changed_chunks(tmp_path):
+    db, episode_id = _new_episode(tmp_path)
+    builder = ContextBuilder(db, HashingEmbeddingBackend(dim=64), index_dir=str(tmp_path / "index"),
+                             chunk_chars=200, overlap_chars=20)
+    db.store_episode_content(episode_id, "\n".join(PARAGRAPHS))
+    total = builder.index_episode(episode_id)
+    assert total > 3
+
+    db.store_episode_content(episode_id, "\n".join(PARAGRAPHS[:-1] + ["最後の段落を改稿"]))
+    assert builder.index_episode(episode_id) == 1
+    assert builder.index_episode(episode_id) == 0
+    assert builder.retrieve(1, "最後の段落を改稿", k=1)[0].text.endswith("最後の段落を改稿")
+
+
+def test_ingest_refetches_episodes_revised_in_the_table_of_contents(tmp_path):
+    db = ContextDB(db_url=f"sqlite:///{tmp_path / 'ingest.db'}")
+    toc = synthetic.build_novel_top_html(10)
+    scraper = FixtureNarouScraper({synthetic.SYNTHETIC_NOVEL_URL: toc},
+                                  episode_html=synthetic.build_episode_html(5))
+    fetched = []
+    fetch = scraper.fetch_episode_content
+    scraper.fetch_episode_content = lambda url: fetched.append(url) or fetch(url)
+
+    novel_id = ingest_novel(db, scraper, synthetic.SYNTHETIC_NOVEL_URL)
+    assert len(fetched) == 10
+    assert db.get_episodes_for_novel(novel_id)[9].revised_at is not None
+
+    fetched.clear()
+    ingest_novel(db, scraper, synthetic.SYNTHETIC_NOVEL_URL)
+    assert fetched == []
+    # 第10話の改稿日時を進めると、その話だけを取り直す
+    scraper.pages[synthetic.SYNTHETIC_NOVEL_URL] = toc.replace("2020/02/10 18:00 改稿", "2021/01/01 18:00 改稿")
+    ingest_novel(db, scraper, synthetic.SYNTHETIC_NOVEL_URL)
+    assert fetched == [f"{synthetic.SYNTHETIC_NOVEL_URL}10/"]
+
+
+def test_version_4_database_gains_revision_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'v4.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE episode_paragraphs"))
+        conn.execute(text("DROP TABLE episode_revisions"))
+        conn.execute(text("DROP INDEX ix_episodes_summary_queue"))
+        conn.execute(text("ALTER TABLE episodes DROP COLUMN revised_at"))
+        conn.execute(text("ALTER TABLE episodes DROP COLUMN unanalyzed_change_ratio"))
+        conn.execute(text("CREATE INDEX ix_episodes_summary_queue ON episodes "
+                          "(summary_generation_status, novel_id, episode_number)"))
+        conn.execute(text("INSERT INTO schema_version (id, version) VALUES (1, 4)"))
+    with engine.begin() as conn:
+        assert migrations.upgrade(conn) == [5, 6, 7]
+        assert migrations.current_version(conn) == SCHEMA_VERSION
+    assert {"revised_at", "unanalyzed_change_ratio"} <= {
+        c["name"] for c in inspect(engine).get_columns(Episode.__tablename__)}
+    assert {"episode_paragraphs", "episode_revisions"} <= set(inspect(engine).get_table_names())
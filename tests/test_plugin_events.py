@@ -0,0 +1,109 @@
+import textwrap
+
+from benchmarks import synthetic
+from benchmarks.cases import FixtureNarouScraper
+from core import events
+from core.context_db import ContextDB
+from core.events import EventBus
+from core.pipeline import ingest_novel
+from core.plugin_manager import PluginManager
+
+RECORDER_SOURCE = textwrap.dedent('''
+    from core.base_plugin import BasePlugin
+
+
+    class RecorderPlugin(BasePlugin):
+        subscribed_events = ("episode_stored", "novel_synced")
+
+        def __init__(self):
+            super().__init__("recorder")
+            self.received = []
+
+        def execute(self, event_name=None, events=(), **kwargs):
+            self.received.append((event_name, len(events)))
+            return len(events)
+''')
+
+SLOW_SOURCE = textwrap.dedent('''
+    import threading
+    import time
+
+    from core.base_plugin import BasePlugin
+
+
+    class SlowPlugin(BasePlugin):
+        subscribed_events = ("episode_stored",)
+        timeout_sec = 0.05
+
+        def __init__(self):
+            super().__init__("slow")
+            self.calls = 0
+            self.running = 0
+            self.max_running = 0
+            self._lock = threading.Lock()
+
+        def execute(self, event_name=None, events=(), **kwargs):
+            with self._lock:
+                self.calls += 1
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            time.sleep(0.5)
+            with self._lock:
+                self.running -= 1
+''')
+
+
+def _write_plugins(tmp_path):
+    # 他のテストのプラグインと import 名が衝突しないよう、固有のモジュール名にする
+    (tmp_path / "events_recorder_plugin.py").write_text(RECORDER_SOURCE, encoding="utf-8")
+    (tmp_path / "events_slow_plugin.py").write_text(SLOW_SOURCE, encoding="utf-8")
+
+
+def test_execute_plugin_returns_value(tmp_path):
+    _write_plugins(tmp_path)
+    manager = PluginManager(str(tmp_path), manifest_path=str(tmp_path / "manifest.json"))
+    assert manager.execute_plugin("events_recorder_plugin", event_name="x", events=(1, 2)) == 2
+    assert manager.execute_plugin("missing") is None
+
+
+def test_batched_delivery_does_not_wait_for_slow_plugin(tmp_path):
+    _write_plugins(tmp_path)
+    manager = PluginManager(str(tmp_path), max_workers=4, default_timeout_sec=5.0,
+                            manifest_path=str(tmp_path / "manifest.json"))
+    bus = EventBus(batch_size=4)
+    manager.attach(bus)
+    db = ContextDB(db_url=f"sqlite:///{tmp_path / 'events.db'}")
+    scraper = FixtureNarouScraper(
+        {synthetic.SYNTHETIC_NOVEL_URL: synthetic.build_novel_top_html(10)},
+        episode_html=synthetic.build_episode_html(3))
+
+    with bus:
+        novel_id = ingest_novel(db, scraper, synthetic.SYNTHETIC_NOVEL_URL, event_bus=bus)
+    assert novel_id is not None
+    assert manager.wait_idle(timeout_sec=5.0)
+
+    recorder = manager.get_plugin("events_recorder_plugin")
+    stored = sum(n for name, n in recorder.received if name == events.EPISODE_STORED)
+    assert stored == 10
+    assert (events.NOVEL_SYNCED, 1) in recorder.received
+    # 遅いプラグインはタイムアウトで打ち切られ、他のプラグインの配送は止めない
+    assert manager.stats()["events_slow_plugin"]["timeouts"] >= 1
+    # タイムアウトしても実行が終わるまで次のバッチは渡さず、同じプラグインを並行に動かさない
+    slow = manager.get_plugin("events_slow_plugin")
+    assert slow.calls >= 2 and slow.max_running == 1
+    manager.shutdown(wait=False)
+
+
+def test_wait_idle_gives_up_on_stuck_plugin(tmp_path):
+    _write_plugins(tmp_path)
+    manager = PluginManager(str(tmp_path), manifest_path=str(tmp_path / "manifest.json"))
+    bus = EventBus(batch_size=1)
+    manager.attach(bus)
+    with bus:
+        bus.publish(events.EPISODE_STORED, episode_id=1)
+        bus.publish(events.EPISODE_STORED, episode_id=2)
+    assert not manager.wait_idle(timeout_sec=0.2)
+    assert manager.stats()["events_slow_plugin"]["timeouts"] == 1
+    assert manager.get_plugin("events_slow_plugin").calls == 1
+    manager.shutdown(wait=False, cancel_futures=True)
+    assert manager.get_plugin("events_slow_plugin").calls == 1
@@ -0,0 +1,89 @@
+import json
+import shutil
+import sys
+import textwrap
+
+from core.plugin_manager import PluginManager
+
+LAZY_PLUGIN_SOURCE = textwrap.dedent('''
+    from core import events
+    from core.base_plugin import BasePlugin
+
+
+    class LazyPlugin(BasePlugin):
+        subscribed_events = (events.EPISODE_STORED, "summary_ready")
+        timeout_sec = 3
+
+        def __init__(self):
+            super().__init__("lazy")
+
+        def execute(self, *args, **kwargs):
+            return "lazy"
+''')
+
+DYNAMIC_PLUGIN_SOURCE = textwrap.dedent('''
+    from core.base_plugin import BasePlugin
+
+    EVENTS = ["novel_synced"]
+
+
+    class DynamicPlugin(BasePlugin):
+        subscribed_events = tuple(EVENTS)
+
+        def __init__(self):
+            super().__init__("dynamic")
+''')
+
+
+def test_plugins_are_imported_on_first_use(tmp_path):
+    (tmp_path / "manifest_lazy_plugin.py").write_text(LAZY_PLUGIN_SOURCE, encoding="utf-8")
+    manager = PluginManager(str(tmp_path), manifest_path=str(tmp_path / "manifest.json"))
+
+    assert "manifest_lazy_plugin" not in sys.modules
+    assert manager.subscribed_events() == {"episode_stored", "summary_ready"}
+    assert manager.manifest["manifest_lazy_plugin"].timeout_sec == 3
+    assert manager.plugins == {}
+
+    assert manager.execute_plugin("manifest_lazy_plugin") == "lazy"
+    assert set(manager.load_times()) == {"manifest_lazy_plugin"}
+    assert "manifest_lazy_plugin" in sys.modules
+
+
+def test_manifest_is_reused_until_file_changes(tmp_path, monkeypatch):
+    plugin_path = tmp_path / "manifest_cached_plugin.py"
+    plugin_path.write_text(LAZY_PLUGIN_SOURCE, encoding="utf-8")
+    (tmp_path / "manifest_dynamic_plugin.py").write_text(DYNAMIC_PLUGIN_SOURCE, encoding="utf-8")
+    manifest_path = tmp_path / "manifest.json"
+    PluginManager(str(tmp_path), manifest_path=str(manifest_path))
+    entries = json.loads(manifest_path.read_text(encoding="utf-8"))["plugins"]
+    # 属性が動的なプラグインは一度だけ import して調べた結果が記録される
+    assert entries["manifest_dynamic_plugin"]["subscribed_events"] == ["novel_synced"]
+
+    scanned = []
+    original_scan = PluginManager._scan_plugin
+    monkeypatch.setattr(PluginManager, "_scan_plugin",
+                        lambda self, name, path, stat: scanned.append(name) or original_scan(self, name, path, stat))
+    PluginManager(str(tmp_path), manifest_path=str(manifest_path))
+    assert scanned == []
+
+    plugin_path.write_text(LAZY_PLUGIN_SOURCE.replace('"summary_ready"', '"novel_synced"'), encoding="utf-8")
+    manager = PluginManager(str(tmp_path), manifest_path=str(manifest_path))
+    assert scanned == ["manifest_cached_plugin"]
+    assert manager.manifest["manifest_cached_plugin"].subscribed_events == ("episode_stored", "novel_synced")
+
+
+def test_manifest_records_directory_relative_to_itself(tmp_path, monkeypatch):
+    checkout = tmp_path / "checkout"
+    (checkout / "plugins").mkdir(parents=True)
+    (checkout / "plugins" / "manifest_relative_plugin.py").write_text(LAZY_PLUGIN_SOURCE, encoding="utf-8")
+    PluginManager(str(checkout / "plugins"), manifest_path=str(checkout / "data" / "manifest.json"))
+    data = json.loads((checkout / "data" / "manifest.json").read_text(encoding="utf-8"))
+    assert data["plugin_directory"] == "../plugins"
+
+    # チェックアウトを移動してもマニフェストはそのまま使える
+    moved = tmp_path / "moved"
+    shutil.copytree(str(checkout), str(moved))
+    scanned = []
+    monkeypatch.setattr(PluginManager, "_scan_plugin", lambda self, name, path, stat: scanned.append(name))
+    manager = PluginManager(str(moved / "plugins"), manifest_path=str(moved / "data" / "manifest.json"))
+    assert scanned == [] and "manifest_relative_plugin" in manager.manifest
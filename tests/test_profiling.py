@@ -0,0 +1,28 @@
+from benchmarks import synthetic
+from benchmarks.cases import FixtureNarouScraper
+from benchmarks.fake_llm import FakeLLMClient
+from core import profiling
+from core.context_db import ContextDB
+from core.pipeline import analyze_novel, ingest_novel
+
+
+def test_stage_is_noop_without_profiler():
+    assert profiling.stage("store") is profiling.stage("llm")
+
+
+def test_profiler_tags_pipeline_stages(tmp_path):
+    db = ContextDB(db_url=f"sqlite:///{tmp_path / 'profile.db'}")
+    scraper = FixtureNarouScraper(
+        {synthetic.SYNTHETIC_NOVEL_URL: synthetic.build_novel_top_html(15)},
+        episode_html=synthetic.build_episode_html(20))
+    output_dir = tmp_path / "profile"
+
+    with profiling.PipelineProfiler(str(output_dir), sample_interval_sec=0.001, top_n=5) as profiler:
+        novel_id = ingest_novel(db, scraper, synthetic.SYNTHETIC_NOVEL_URL)
+        assert analyze_novel(db, FakeLLMClient(), novel_id) == 15
+
+    assert {"parse", "store", "llm"} <= set(profiler.stage_seconds)
+    assert (output_dir / "profile.pstats").exists()
+    assert "Time by stage:" in (output_dir / "profile_summary.txt").read_text(encoding="utf-8")
+    collapsed = (output_dir / "profile.collapsed").read_text(encoding="utf-8").splitlines()
+    assert collapsed and all(line.startswith("stage:") for line in collapsed)
@@ -0,0 +1,91 @@
+import asyncio
+import gzip
+import json
+
+from core.context_db import ContextDB
+from core.read_api import ReadAPI
+
+NOVEL_URL = "https://example.com/novels/1/"
+
+
+def _new_api(tmp_path, **kwargs):
+    db = ContextDB(db_url=f"sqlite:///{tmp_path / 'api.db'}")
+    novel, _ = db.get_or_create_novel(NOVEL_URL, defaults={"title": "作品", "author": "作者"})
+    for number in range(1, 6):
+        episode, _ = db.get_or_create_episode(novel.id, f"{NOVEL_URL}{number}/", defaults={
+            "episode_number": number, "episode_title": f"第{number}話"})
+        db.store_episode_content(episode.id, f"第{number}話の本文。" * 200)
+    character, _ = db.get_or_create_character(novel.id, "アリス", defaults={"role_in_story_llm": "主人公"})
+    return db, ReadAPI(db, **kwargs), novel.id, character.id
+
+
+def _get(api, target, **headers):
+    return asyncio.run(api.respond("GET", target, {k.replace("_", "-"): v for k, v in headers.items()}))
+
+
+def test_pagination_etag_and_gzip(tmp_path):
+    db, api, novel_id, character_id = _new_api(tmp_path)
+    try:
+        page = json.loads(_get(api, f"/novels/{novel_id}/episodes?limit=2").body)
+        assert [e["episode_number"] for e in page["items"]] == [1, 2]
+        assert page["next"] == f"/novels/{novel_id}/episodes?after=2&limit=2"
+        last = json.loads(_get(api, f"/novels/{novel_id}/episodes?after=4&limit=2").body)
+        assert [e["episode_number"] for e in last["items"]] == [5] and last["next"] is None
+
+        response = _get(api, f"/novels/{novel_id}/episodes/3", accept_encoding="gzip, deflate")
+        headers = dict(response.headers)
+        assert response.status == 200 and headers["Content-Encoding"] == "gzip"
+        assert json.loads(gzip.decompress(response.body))["content_cleaned"].startswith("第3話の本文。")
+        not_modified = _get(api, f"/novels/{novel_id}/episodes/3", if_none_match=headers["ETag"])
+        assert not_modified.status == 304 and not_modified.body == b""
+
+        assert json.loads(_get(api, f"/novels/{novel_id}").body)["episode_count"] == 5
+        assert json.loads(_get(api, f"/novels/{novel_id}/characters/{character_id}").body)["name"] == "アリス"
+        assert _get(api, f"/novels/{novel_id}/episodes/9").status == 404
+        assert _get(api, "/novels/99/characters").status == 404
+        assert _get(api, f"/novels/{novel_id}/episodes?limit=x").status == 400
+        assert asyncio.run(api.respond("POST", "/novels", {})).status == 405
+    finally:
+        api.close()
+
+
+def test_cached_views_until_ttl(tmp_path):
+    db, api, novel_id, _ = _new_api(tmp_path, cache_ttl_sec=60)
+    try:
+        before = _get(api, f"/novels/{novel_id}/characters")
+        db.get_or_create_character(novel_id, "ボブ")
+        assert _get(api, f"/novels/{novel_id}/characters").body == before.body
+        api.cache.ttl_sec = 0
+        after = _get(api, f"/novels/{novel_id}/characters")
+        assert dict(after.headers)["ETag"] != dict(before.headers)["ETag"]
+        assert [c["name"] for c in json.loads(after.body)["items"]] == ["アリス", "ボブ"]
+    finally:
+        api.close()
+
+
+def test_keep_alive_over_socket(tmp_path):
+    db, api, novel_id, _ = _new_api(tmp_path)
+
+    async def scenario():
+        server = await api.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        statuses = []
+        for target in ("/novels", f"/novels/{novel_id}/summaries", "/missing"):
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("latin-1"))
+            head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+            length = int(head.split("Content-Length: ")[1].split("\r\n")[0])
+            body = await reader.readexactly(length)
+            statuses.append((int(head.split(" ")[1]), json.loads(body)))
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return statuses
+
+    try:
+        statuses = asyncio.run(scenario())
+    finally:
+        api.close()
+    assert [status for status, _ in statuses] == [200, 200, 404]
+    assert statuses[0][1]["items"][0]["title"] == "作品"
+    assert len(statuses[1][1]["items"]) == 5
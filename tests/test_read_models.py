@@ -0,0 +1,45 @@
+import gc
+import tracemalloc
+
+from core.context_db import ContextDB
+from core.read_models import EpisodeRow
+
+NOVEL_URL = "https://example.com/novels/1/"
+COLUMNS = list(EpisodeRow._fields)
+
+
+def _retained_bytes(load):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        rows = load()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return rows, size
+
+
+def test_read_models_match_orm_and_are_smaller(tmp_path):
+    db = ContextDB(db_url=f"sqlite:///{tmp_path / 'read.db'}")
+    with db.transaction() as tx:
+        novel, _ = tx.upsert_novel(NOVEL_URL, title="作品")
+        for n in range(1, 201):
+            tx.upsert_episode(novel.id, f"{NOVEL_URL}{n}/", episode_number=n, episode_title=f"第{n}話")
+        tx.upsert_character(novel.id, "主人公", reading="しゅじんこう")
+    db.update_episode_content(1, "本文", 2)
+
+    db.read_episodes(novel.id)  # スキーマ確認などの初回コストを除く
+    rows, row_bytes = _retained_bytes(lambda: db.read_episodes(novel.id))
+    orm, orm_bytes = _retained_bytes(lambda: db.get_episodes_for_novel(novel.id, only_fields=COLUMNS))
+    assert [tuple(getattr(e, c) for c in COLUMNS) for e in orm] == [tuple(r) for r in rows]
+    assert row_bytes * 3 < orm_bytes
+
+    assert [r.episode_number for r in db.read_episodes(novel.id, start_num=5, end_num=7)] == [5, 6, 7]
+    assert db.read_episode_text(1).content_cleaned == "本文"
+    assert db.read_novel(novel.id).title == "作品"
+    assert db.read_novel(999) is None
+    assert db.read_characters(novel.id)[0].reading == "しゅじんこう"
+    # transaction() の中では未コミットの行も読める
+    with db.transaction() as tx:
+        tx.upsert_episode(novel.id, f"{NOVEL_URL}201/", episode_number=201)
+        assert len(db.read_episodes(novel.id)) == 201
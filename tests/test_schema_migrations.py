@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from core import migrations
+from core.context_db import ContextDB
+from core.db_schemas import Base, Character, Episode, Novel, SCHEMA_VERSION
+from tools.check_query_plans import check_query_plans
+
+NEW_INDEXES = ["ix_episodes_novel_number", "ix_episodes_summary_queue", "uq_characters_novel_name",
+               "uq_locations_novel_name", "uq_items_novel_name", "ix_foreshadowings_novel_status",
+               "ix_episode_chunks_novel_episode", "ix_crawl_targets_host_next"]
+
+
+def _build_version_3_db(db_url, duplicate_character=False):
+    engine = create_engine(db_url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for name in NEW_INDEXES:
+            conn.execute(text(f"DROP INDEX {name}"))
+        for table in ("episodes", "characters", "locations", "items", "foreshadowings", "episode_chunks"):
+            conn.execute(text(f"CREATE INDEX ix_{table}_novel_id ON {table} (novel_id)"))
+        conn.execute(text("CREATE INDEX ix_crawl_targets_host ON crawl_targets (host)"))
+        conn.execute(text("INSERT INTO schema_version (id, version) VALUES (1, 3)"))
+        conn.execute(Novel.__table__.insert().values(id=1, title="作品", url="https://example.com/1/"))
+        names = ["主人公", "主人公"] if duplicate_character else ["主人公", "相棒"]
+        for name in names:
+            conn.execute(Character.__table__.insert().values(novel_id=1, name=name))
+    return engine
+
+
+def _index_names(engine, table):
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def test_upgrade_adds_composite_indexes(tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'v3.db'}"
+    engine = _build_version_3_db(db_url)
+    db = ContextDB(db_url=db_url)
+    assert db.get_characters_for_novel(1)[0].name == "主人公"
+    assert db._stored_schema_version() == SCHEMA_VERSION
+    assert {"ix_episodes_novel_number", "ix_episodes_summary_queue"} <= _index_names(engine, "episodes")
+    assert "ix_episodes_novel_id" not in _index_names(engine, "episodes")
+    assert "uq_characters_novel_name" in _index_names(engine, "characters")
+    assert "ix_crawl_targets_host_next" in _index_names(engine, "crawl_targets")
+    assert "ix_crawl_targets_host" not in _index_names(engine, "crawl_targets")
+    # 一意索引により、同名の登場人物は新規作成されずに既存の行が返る
+    character, created = db.get_or_create_character(1, "主人公")
+    assert not created and character.name == "主人公"
+
+
+def test_duplicates_block_the_unique_index(tmp_path):
+    engine = _build_version_3_db(f"sqlite:///{tmp_path / 'dup.db'}", duplicate_character=True)
+    with pytest.raises(migrations.MigrationError, match="characters"):
+        with engine.begin() as conn:
+            migrations.upgrade(conn)
+    with engine.connect() as conn:
+        assert migrations.current_version(conn) == 3
+        assert [m.version for m in migrations.pending_migrations(conn)] == [4, 5, 6, 7]
+
+    # ContextDB は移行に失敗した DB を使わず、以後も同じエラーを返す
+    db = ContextDB(db_url=str(engine.url))
+    with pytest.raises(migrations.MigrationError):
+        db.ensure_schema()
+    assert db.get_characters_for_novel(1) == []
+    with pytest.raises(migrations.MigrationError):
+        db.ensure_schema()
+
+
+def test_unversioned_database_is_migrated_from_baseline(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(engine, tables=[Novel.__table__, Episode.__table__, Character.__table__])
+    with engine.begin() as conn:
+        assert migrations.upgrade(conn) == [2, 3, 4, 5, 6, 7]
+        assert migrations.current_version(conn) == SCHEMA_VERSION
+    assert {"episode_chunks", "crawl_targets"} <= set(inspect(engine).get_table_names())
+
+
+def test_context_db_queries_use_indexes(tmp_path):
+    plans = check_query_plans(f"sqlite:///{tmp_path / 'plans.db'}")
+    assert plans
+    # 巡回対象は時刻に依存するスコア順に並べるため、巡回時刻を過ぎた対象だけを並べ替える
+    scored = {"get_due_crawl_targets", "claim_due_crawl_targets"}
+    assert [(p.method, p.plan) for p in plans if p.full_scans or (p.sorts and p.method not in scored)] == []
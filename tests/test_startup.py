@@ -0,0 +1,28 @@
+from benchmarks.import_time import FORBIDDEN_EAGER_IMPORTS, measure_import
+from core import context_db
+from core.context_db import ContextDB
+from core.db_schemas import SCHEMA_VERSION
+
+
+def test_heavy_dependencies_are_imported_lazily():
+    for module, forbidden in FORBIDDEN_EAGER_IMPORTS.items():
+        _, loaded = measure_import(module, forbidden)
+        assert loaded == [], f"{module} eagerly imports {loaded}"
+
+
+def test_schema_created_once_per_version(tmp_path, monkeypatch):
+    db_url = f"sqlite:///{tmp_path / 'schema.db'}"
+    calls = []
+    original_create_all = context_db.Base.metadata.create_all
+    monkeypatch.setattr(context_db.Base.metadata, "create_all",
+                        lambda *args, **kwargs: calls.append(1) or original_create_all(*args, **kwargs))
+
+    first = ContextDB(db_url=db_url)
+    assert calls == []  # 生成時点ではスキーマに触れない
+    assert first.get_novel_by_id(1) is None
+    assert first._stored_schema_version() == SCHEMA_VERSION
+    assert len(calls) == 1
+
+    second = ContextDB(db_url=db_url)
+    assert second.get_novel_by_id(1) is None
+    assert len(calls) == 1
@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import IntegrityError
+
+from core.context_db import ContextDB
+
+NOVEL_URL = "https://example.com/novels/1/"
+
+
+def _count_commits(db):
+    commits = []
+    event.listen(db.engine, "commit", lambda conn: commits.append(1))
+    return commits
+
+
+def test_multi_step_write_commits_once(tmp_path):
+    db = ContextDB(db_url=f"sqlite:///{tmp_path / 'tx.db'}")
+    db.ensure_schema()
+    commits = _count_commits(db)
+    with db.transaction(flush_every=50) as tx:
+        novel, created = tx.upsert_novel(NOVEL_URL, title="作品")
+        episodes = [tx.upsert_episode(novel.id, f"{NOVEL_URL}{n}/", episode_number=n)[0] for n in range(1, 121)]
+        for name in ("主人公", "相棒", "主人公"):
+            tx.upsert_character(novel.id, name)
+        # ブロック内の既存メソッドも同じトランザクションで動き、未 flush の行も見える
+        assert len(db.get_episodes_for_novel(novel.id)) == 120
+        db.update_episode_content(episodes[0].id, "本文", 2)
+    assert created and len(commits) == 1
+    # コミット後も expire されず、そのまま属性を読める
+    assert episodes[-1].id is not None and episodes[-1].episode_number == 120
+    assert [c.name for c in db.get_characters_for_novel(novel.id)] == ["主人公", "相棒"]
+    assert db.get_episode_by_id(episodes[0].id).char_count == 2
+
+    with db.transaction(expire_on_commit=True) as tx:
+        episode, created = tx.upsert_episode(novel.id, f"{NOVEL_URL}1/", episode_title="改題")
+    assert not created and inspect(episode).expired
+
+
+def test_failure_rolls_back_everything(tmp_path):
+    db = ContextDB(db_url=f"sqlite:///{tmp_path / 'tx.db'}")
+    with pytest.raises(RuntimeError):
+        with db.transaction() as tx:
+            novel, _ = tx.upsert_novel(NOVEL_URL, title="作品")
+            tx.upsert_episode(novel.id, f"{NOVEL_URL}1/", episode_number=1)
+            raise RuntimeError("scraper failed")
+    assert db.get_novel_by_id(1) is None
+
+    # ブロック内の ContextDB メソッドが握りつぶしたエラーも、終了時にロールバックして送出する
+    with pytest.raises(IntegrityError):
+        with db.transaction() as tx:
+            tx.upsert_novel(f"{NOVEL_URL}ok/", title="作品")
+            assert db.get_or_create_novel(f"{NOVEL_URL}untitled/") == (None, False)
+    assert db.get_novel_by_id(1) is None
+
+
+def test_bulk_insert_tolerates_episode_created_by_another_writer(tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'tx.db'}"
+    db, other = ContextDB(db_url=db_url), ContextDB(db_url=db_url)
+    novel, _ = db.get_or_create_novel(NOVEL_URL, defaults={"title": "作品"})
+    with db.transaction() as tx:
+        tx.upsert_episode(novel.id, f"{NOVEL_URL}1/", episode_number=1)
+        raced, created = tx.upsert_episode(novel.id, f"{NOVEL_URL}2/", episode_number=2, episode_title="一括")
+        # 先読みの後、flush の前に別のワーカーが同じ話を作る
+        theirs, _ = other.get_or_create_episode(novel.id, f"{NOVEL_URL}2/", defaults={"episode_number": 2})
+    assert created and raced.id == theirs.id
+    episodes = db.get_episodes_for_novel(novel.id)
+    assert [(e.episode_number, e.episode_title) for e in episodes] == [(1, None), (2, "一括")]
@@ -0,0 +1,81 @@
+import numpy as np
+
+from core.context_builder import ContextBuilder, chunk_text
+from core.context_db import ContextDB
+from core.embeddings import HashingEmbeddingBackend, normalize_rows
+from core.vector_index import VectorIndex
+
+EPISODE_TEXTS = [
+    "王都の図書館で、司書のリナは古い星図を見つけた。\n星図の裏には見知らぬ紋章が描かれていた。",
+    "北の砦では騎士団が雪に閉ざされていた。\n団長は補給の遅れに苛立っていた。",
+    "リナは紋章の意味を調べるため、図書館の地下書庫へ向かった。\n書庫の奥には封印された扉があった。",
+]
+
+
+def test_chunk_text_keeps_offsets_and_limits():
+    text = "あ" * 100 + "\n\n" + "い" * 250 + "\n" + "う" * 900
+    chunks = chunk_text(text, max_chars=400, overlap_chars=80)
+    assert all(text[start:end] == body for start, end, body in chunks)
+    assert all(len(body) <= 400 for _, _, body in chunks)
+    assert chunks[0][2].startswith("あ") and chunks[-1][2].endswith("う")
+
+
+def test_flat_and_ivf_search_with_persistence(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = normalize_rows(rng.normal(size=(2000, 32)).astype(np.float32))
+    index = VectorIndex(str(tmp_path / "index"), 32, mode="flat")
+    index.append(range(1000), vectors[:1000], keys=[i // 100 for i in range(1000)])
+    index.append(range(1000, 2000), vectors[1000:], keys=[i // 100 for i in range(1000, 2000)])
+
+    assert index.search(vectors[1234], k=1)[0][0] == 1234
+    assert all(i < 300 for i, _ in index.search(vectors[1234], k=5, max_key=2))
+
+    reopened = VectorIndex(str(tmp_path / "index"), 32, mode="ivf", n_lists=16, n_probe=4)
+    assert reopened.count == 2000
+    assert reopened.search(vectors[42], k=1)[0][0] == 42
+    assert reopened.trained_count == 2000
+    # 学習後の追記も割り当て済みクラスタから検索できる
+    extra = normalize_rows(rng.normal(size=(1, 32)).astype(np.float32))
+    reopened.append([5000], extra)
+    assert reopened.search(extra[0], k=1)[0][0] == 5000
+
+
+def test_hashing_backend_is_deterministic():
+    first = HashingEmbeddingBackend(dim=64).embed(["星図と紋章"])
+    second = HashingEmbeddingBackend(dim=64).embed(["星図と紋章"])
+    assert np.array_equal(first, second)
+    assert abs(float(np.linalg.norm(first[0])) - 1.0) < 1e-5
+
+
+def test_context_builder_retrieves_relevant_episode(tmp_path):
+    db = ContextDB(db_url=f"sqlite:///{tmp_path / 'vector.db'}")
+    novel, _ = db.get_or_create_novel("https://example.com/novel/", defaults={"title": "星図"})
+    for number, text in enumerate(EPISODE_TEXTS, start=1):
+        episode, _ = db.get_or_create_episode(novel.id, f"https://example.com/novel/{number}/", defaults={
+            "episode_number": number, "episode_title": f"第{number}話"})
+        db.update_episode_content(episode.id, text, len(text))
+    builder = ContextBuilder(db, HashingEmbeddingBackend(dim=128), index_dir=str(tmp_path / "index"))
+
+    assert builder.index_novel(novel.id) > 0
+    assert builder.index_novel(novel.id) == 0
+
+    passages = builder.retrieve(novel.id, "騎士団と砦", k=1)
+    assert passages[0].episode_number == 2
+    earlier = builder.retrieve(novel.id, "地下書庫の封印された扉", k=3, before_episode=3)
+    assert earlier and all(p.episode_number < 3 for p in earlier)
+    assert "【第1話" in builder.build_context(novel.id, "星図の紋章", k=1)
+
+
+def test_concurrent_writers_append_after_each_other(tmp_path):
+    rng = np.random.default_rng(1)
+    vectors = normalize_rows(rng.normal(size=(5, 16)).astype(np.float32))
+    first = VectorIndex(str(tmp_path / "index"), 16)
+    second = VectorIndex(str(tmp_path / "index"), 16)
+    first.append([1, 2], vectors[:2])
+    # second は開いた時点の件数 (0) を持っているが、追記前に meta.json を読み直す
+    second.append([3, 4, 5], vectors[2:])
+    assert first.search(vectors[4], k=1)[0][0] == 5
+
+    reopened = VectorIndex(str(tmp_path / "index"), 16)
+    assert reopened.count == 5
+    assert [reopened.search(vector, k=1)[0][0] for vector in vectors] == [1, 2, 3, 4, 5]
@@ -0,0 +1,210 @@
+"""ContextDB の各クエリに EXPLAIN をかけ、全件走査 (フルスキャン) になるものを報告するCLI。
+
+ContextDB の公開メソッドを小さな合成データに対して一通り呼び、その間に発行された
+SELECT / UPDATE / DELETE 文を記録してから、SQLite では ``EXPLAIN QUERY PLAN``、
+PostgreSQL では ``EXPLAIN`` (``enable_seqscan = off``) で実行計画を確認します。
+
+使用例:
+    python -m tools.check_query_plans                      # 一時 SQLite DB で確認
+    python -m tools.check_query_plans --db-url postgresql+psycopg2://user:pw@host/scratch
+
+``--db-url`` には空の検証用DBを指定してください (合成データを書き込みます)。
+全件走査が見つかった場合は終了コード 1 を返します。索引で順序を賄えず並べ替えが
+発生する文は ``sort`` として表示します (終了コードには影響しません)。
+"""
+import argparse
+import functools
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import event
+
+SEED_EPISODES = 30
+_EXPLAINED_STATEMENTS = ("SELECT", "UPDATE", "DELETE", "WITH")
+# "SCAN episodes" は全件走査、"SCAN episodes USING INDEX ..." は索引順の走査なので対象外
+_SQLITE_FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+_POSTGRES_FULL_SCAN = re.compile(r"Seq Scan on (\w+)")
+# 索引で順序を賄えず、結果を一時的に並べ替えている (失敗にはせず注意として表示する)
+_SORT_MARKERS = ("USE TEMP B-TREE", "Sort Key")
+
+
+class QueryPlan(NamedTuple):
+    method: str
+    statement: str
+    plan: List[str]
+    full_scans: List[str]
+    sorts: bool
+
+
+class _QueryRecorder:
+    """エンジンで実行された文を、呼び出し中の ContextDB メソッド名とともに記録します。"""
+
+    def __init__(self):
+        self.current: List[str] = []
+        self.queries: Dict[str, Any] = {}
+
+    def wrap(self, db) -> None:
+        for name in dir(type(db)):
+            attribute = getattr(type(db), name)
+            if name.startswith("_") or not callable(attribute) or name in ("get_db", "ensure_schema"):
+                continue
+            setattr(db, name, self._wrap_method(name, getattr(db, name)))
+
+    def _wrap_method(self, name: str, method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            self.current.append(name)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.current.pop()
+        return wrapper
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not self.current or executemany:
+            return
+        if statement.lstrip().upper().startswith(_EXPLAINED_STATEMENTS) and statement not in self.queries:
+            self.queries[statement] = (self.current[-1], parameters)
+
+
+def exercise(db) -> None:
+    """ContextDB の公開メソッドを合成データに対して一通り呼び出します。"""
+    from core.db_schemas import ProcessingStatus
+
+    novel_url = "https://example.com/novels/plan-check/"
+    novel, _ = db.get_or_create_novel(novel_url, defaults={"title": "実行計画の確認"})
+    db.get_or_create_novel(novel_url, defaults={"title": "実行計画の確認 (更新)"})
+    db.get_novel_by_id(novel.id)
+    db.update_novel_metadata(novel.id, {"synopsis": "あらすじ"})
+    episode_ids = []
+    for number in range(1, SEED_EPISODES + 1):
+        episode, _ = db.get_or_create_episode(novel.id, f"{novel_url}{number}/", defaults={"episode_number": number})
+        db.update_episode_content(episode.id, f"第{number}話の本文。", 8)
+        episode_ids.append(episode.id)
+    db.store_episode_content(episode_ids[0], "第1話の本文。\n改稿した段落。", revised_at=datetime.now())
+    db.get_episode_version(episode_ids[0], 0)
+    db.get_latest_revisions(novel.id)
+    db.get_or_create_episode(novel.id, f"{novel_url}1/")
+    db.get_episode_by_id(episode_ids[0])
+    db.get_episodes_for_novel(novel.id)
+    db.get_episodes_for_novel(novel.id, start_num=5, end_num=10, only_fields=["id", "episode_number"])
+    claimed = db.claim_pending_episodes(5, novel_id=novel.id)
+    db.claim_pending_episodes(5)
+    db.update_episode_llm_results(claimed[0].id, {"summary_generation_status": ProcessingStatus.COMPLETED})
+    db.release_episode_claims([e.id for e in claimed])
+    db.requeue_failed_episodes(novel.id)
+    chunks = db.replace_episode_chunks(episode_ids[0], [{"text": "本文", "char_start": 0, "char_end": 2}])
+    db.replace_episode_chunks(episode_ids[0], [{"text": "本文", "char_start": 0, "char_end": 2}])
+    db.sync_episode_chunks(episode_ids[0], [{"text": "本文", "char_start": 0, "char_end": 2}])
+    db.get_chunks_by_ids([c.id for c in chunks])
+    db.get_chunked_episode_ids(novel.id)
+    target, _ = db.add_crawl_target(novel_url, defaults={"novel_id": novel.id})
+    db.add_crawl_target(novel_url, defaults={"priority": 2.0})
+    db.get_due_crawl_targets(datetime.now(), limit=10)
+    now = datetime.now()
+    claimed_targets = db.claim_due_crawl_targets(now, 600, limit=10, hosts=["example.com"])
+    db.release_crawl_claims([t.id for t in claimed_targets], now + timedelta(seconds=600), now)
+    db.update_crawl_target(target.id, {"next_crawl_at": datetime.now()})
+    db.get_or_create_character(novel.id, "主人公", defaults={"description_by_author": "説明"})
+    db.get_or_create_character(novel.id, "主人公")
+    db.get_characters_for_novel(novel.id)
+    db.read_novel(novel.id)
+    db.read_novels(after_id=0, limit=50)
+    db.count_episodes(novel.id)
+    db.read_episodes(novel.id, start_num=5, end_num=10)
+    db.read_episodes(novel.id, start_num=5, limit=50)
+    db.read_episode_summaries(novel.id, start_num=5, limit=50)
+    db.read_episode_texts(novel.id)
+    db.read_episode_text(episode_ids[0])
+    db.read_characters(novel.id)
+    db.read_character(1)
+    db.read_world_settings(novel.id)
+    db.read_chunks([c.id for c in chunks])
+
+
+def _explain(conn, statement: str, parameters: Any) -> List[str]:
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        return [row[-1] for row in rows]
+    if conn.dialect.name == "postgresql":
+        # 件数の少ない検証用DBでも、索引を使えるかどうかを確認できるよう逐次走査を避けさせる
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        return [row[0] for row in conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).fetchall()]
+    raise ValueError(f"Unsupported database for EXPLAIN: {conn.dialect.name}")
+
+
+def _full_scans(dialect: str, plan: List[str]) -> List[str]:
+    pattern = _SQLITE_FULL_SCAN if dialect == "sqlite" else _POSTGRES_FULL_SCAN
+    tables = []
+    for line in plan:
+        match = pattern.search(line.strip())
+        if match:
+            tables.append(match.group(1))
+    return tables
+
+
+def check_query_plans(db_url: str) -> List[QueryPlan]:
+    """``db_url`` の DB で ContextDB のクエリを実行し、文ごとの実行計画を返します。"""
+    from core.context_db import ContextDB
+
+    db = ContextDB(db_url=db_url)
+    db.ensure_schema()  # スキーマ作成・移行時の文は対象外
+    recorder = _QueryRecorder()
+    recorder.wrap(db)
+    event.listen(db.engine, "before_cursor_execute", recorder.before_cursor_execute)
+    try:
+        exercise(db)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", recorder.before_cursor_execute)
+    plans = []
+    with db.engine.connect() as conn:
+        for statement, (method, parameters) in recorder.queries.items():
+            plan = _explain(conn, statement, parameters)
+            sorts = any(marker in line for line in plan for marker in _SORT_MARKERS)
+            plans.append(QueryPlan(method, statement, plan, _full_scans(conn.dialect.name, plan), sorts))
+        conn.rollback()
+    db.engine.dispose()
+    return plans
+
+
+def _print_plans(plans: List[QueryPlan], verbose: bool) -> None:
+    for plan in plans:
+        if plan.full_scans:
+            status = f"FULL SCAN ({', '.join(plan.full_scans)})"
+        else:
+            status = "sort" if plan.sorts else "ok"
+        print(f"{status:<30} {plan.method:<28} {' '.join(plan.statement.split())[:100]}")
+        if verbose or plan.full_scans:
+            for line in plan.plan:
+                print(f"    {line}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI エントリーポイント。全件走査が見つかった場合は 1 を返します。"""
+    parser = argparse.ArgumentParser(description="Run EXPLAIN on every ContextDB query and flag full scans.")
+    parser.add_argument("--db-url", default=None,
+                        help="Scratch database to use (default: a temporary SQLite file).")
+    parser.add_argument("--verbose", action="store_true", help="Print the plan of every query.")
+    parser.add_argument("--log-level", default="WARNING", help="Application log level while checking.")
+    args = parser.parse_args(argv)
+
+    from core.config import config  # noqa: F401
+    from core.logger_setup import setup_logger
+    setup_logger().setLevel(args.log_level.upper())
+
+    with tempfile.TemporaryDirectory(prefix="query_plans_") as tmp_dir:
+        db_url = args.db_url or f"sqlite:///{os.path.join(tmp_dir, 'plans.db')}"
+        plans = check_query_plans(db_url)
+    _print_plans(plans, args.verbose)
+    flagged = [p for p in plans if p.full_scans]
+    print(f"{len(plans)} statements checked, {len(flagged)} with full scans, "
+          f"{sum(p.sorts for p in plans)} with an extra sort step")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())